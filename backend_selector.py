@@ -0,0 +1,270 @@
+"""
+控制方式选择器 - 记录每种触控板控制方式的延迟和成功率，自动选择最快的可用方式
+
+延迟保存在对数分桶的在线直方图中(固定内存)，成功率按最近 N 次调用计算。
+成功率达到阈值且样本足够的方式中 p50 延迟最低者被提升为首选，其余方式
+按默认顺序作为后备；未被选中的方式每隔 retest_interval 秒在后台重新测试一次。
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+logger = logging.getLogger("touchpad_manager.backend")
+
+# 默认优先级(与原有固定顺序一致)
+DEFAULT_ORDER = ("registry", "shortcut", "compatibility")
+
+BACKEND_NAMES = {
+    "registry": "注册表",
+    "shortcut": "键盘快捷键",
+    "compatibility": "设备管理器(兼容模式)",
+}
+
+DEFAULT_MIN_SUCCESS_RATE = 0.8
+DEFAULT_MIN_SAMPLES = 3
+DEFAULT_RETEST_INTERVAL = 300.0
+DEFAULT_WINDOW = 50
+
+# 直方图: 10us 起，每个桶上界为前一个的 2^(1/4) 倍，共覆盖约 10us - 160s
+HISTOGRAM_MIN = 1e-5
+HISTOGRAM_GROWTH = 2 ** 0.25
+HISTOGRAM_BUCKETS = 96
+
+
+class LatencyHistogram:
+    """对数分桶的在线延迟直方图(秒)，百分位误差不超过一个桶宽(约19%)
+
+    子类可以覆盖 MIN / GROWTH / BUCKETS 改变覆盖范围。
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    MIN = HISTOGRAM_MIN
+    GROWTH = HISTOGRAM_GROWTH
+    BUCKETS = HISTOGRAM_BUCKETS
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def bucket_upper(self, index: int) -> float:
+        return self.MIN * self.GROWTH ** index
+
+    def add(self, seconds: float):
+        if seconds <= self.MIN:
+            index = 0
+        else:
+            index = min(self.BUCKETS - 1, math.ceil(math.log(seconds / self.MIN, self.GROWTH)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """返回 q 百分位(0-100)所在桶的上界，最大不超过实际最大值"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q / 100.0 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict:
+        """百分位(毫秒)和非空桶的计数(键为桶上界，毫秒)"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "p999_ms": round(self.percentile(99.9) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": {f"{self.bucket_upper(index) * 1000:.4g}": count
+                        for index, count in enumerate(self.counts) if count},
+        }
+
+
+class BackendStats:
+    """单个控制方式的统计"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.latency = LatencyHistogram()  # 只记录成功调用
+        self.recent = deque(maxlen=window)  # 最近调用是否成功
+        self.successes = 0
+        self.failures = 0
+        self.last_attempt_ns: Optional[int] = None
+
+    def record(self, latency: float, success: bool, now_ns: int):
+        if success:
+            self.successes += 1
+            self.latency.add(latency)
+        else:
+            self.failures += 1
+        self.recent.append(success)
+        self.last_attempt_ns = now_ns
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        if not self.recent:
+            return None
+        return sum(self.recent) / len(self.recent)
+
+    def snapshot(self) -> Dict:
+        rate = self.success_rate
+        return {
+            "attempts": self.successes + self.failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "success_rate": round(rate, 3) if rate is not None else None,
+            "p50_ms": round(self.latency.percentile(50) * 1000, 3),
+            "p99_ms": round(self.latency.percentile(99) * 1000, 3),
+            "mean_ms": round(self.latency.mean * 1000, 3),
+        }
+
+
+class BackendSelector:
+    """按延迟和成功率为触控板控制方式排序"""
+
+    def __init__(self, backends: Iterable[str] = DEFAULT_ORDER,
+                 min_success_rate: float = DEFAULT_MIN_SUCCESS_RATE,
+                 min_samples: int = DEFAULT_MIN_SAMPLES,
+                 retest_interval: float = DEFAULT_RETEST_INTERVAL,
+                 window: int = DEFAULT_WINDOW,
+                 clock: Optional[Clock] = None):
+        self.default_order = tuple(backends)
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.retest_interval = retest_interval
+        self.enabled = True
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.stats = {name: BackendStats(window) for name in self.default_order}
+        self.preferred: Optional[str] = None
+        self._created_ns = self.clock.monotonic_ns()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, min_success_rate=None, min_samples=None, retest_interval=None):
+        """应用配置(None 表示保持不变)"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if min_success_rate is not None:
+            self.min_success_rate = float(min_success_rate)
+        if min_samples is not None:
+            self.min_samples = max(1, int(min_samples))
+        if retest_interval is not None:
+            self.retest_interval = float(retest_interval)
+
+    def record(self, name: str, latency: float, success: bool):
+        """记录一次调用结果"""
+        with self._lock:
+            self.stats[name].record(latency, success, self.clock.monotonic_ns())
+
+    def is_qualified(self, name: str) -> bool:
+        """样本足够且成功率达到阈值"""
+        stats = self.stats[name]
+        rate = stats.success_rate
+        return (len(stats.recent) >= self.min_samples and stats.latency.count > 0
+                and rate is not None and rate >= self.min_success_rate)
+
+    def is_demoted(self, name: str) -> bool:
+        """样本足够但成功率低于阈值"""
+        stats = self.stats[name]
+        rate = stats.success_rate
+        return len(stats.recent) >= self.min_samples and rate is not None and rate < self.min_success_rate
+
+    def order(self, available: Iterable[str]) -> List[str]:
+        """返回本次调用应依次尝试的控制方式"""
+        available = [name for name in self.default_order if name in set(available)]
+        if not self.enabled:
+            return available
+
+        with self._lock:
+            qualified = [name for name in available if self.is_qualified(name)]
+            preferred = min(qualified, key=lambda name: self.stats[name].latency.percentile(50)) if qualified else None
+            self._update_decision(preferred)
+
+            # 首选方式优先，成功率不足的方式排在最后
+            rest = [name for name in available if name != preferred]
+            rest.sort(key=self.is_demoted)
+        return ([preferred] if preferred else []) + rest
+
+    def _update_decision(self, preferred: Optional[str]):
+        if preferred == self.preferred:
+            return
+        self.preferred = preferred
+        logger.info(f"首选控制方式: {BACKEND_NAMES.get(preferred, '默认顺序') if preferred else '默认顺序'} ({self._reason()})")
+
+    def _reason(self) -> str:
+        if self.preferred is None:
+            if not any(stats.recent for stats in self.stats.values()):
+                return "尚无测量数据"
+            return "没有成功率达标的控制方式"
+        stats = self.stats[self.preferred]
+        return f"p50 {stats.latency.percentile(50) * 1000:.1f}ms, 成功率 {stats.success_rate:.0%}"
+
+    def due_retests(self, candidates: Iterable[str]) -> List[str]:
+        """返回需要在后台重新测试的方式(非首选，且距上次调用超过 retest_interval)"""
+        if not self.enabled or self.retest_interval <= 0:
+            return []
+
+        now_ns = self.clock.monotonic_ns()
+        interval_ns = self.retest_interval * NS_PER_SECOND
+        due = []
+        with self._lock:
+            for name in candidates:
+                if name == self.preferred or name not in self.stats:
+                    continue
+                last_ns = self.stats[name].last_attempt_ns
+                if now_ns - (last_ns if last_ns is not None else self._created_ns) >= interval_ns:
+                    due.append(name)
+        return due
+
+    def snapshot(self, available: Iterable[str] = ()) -> Dict:
+        """当前决策和各方式的统计"""
+        available = set(available)
+        with self._lock:
+            backends = {}
+            for name in self.default_order:
+                data = self.stats[name].snapshot()
+                data["available"] = name in available
+                data["demoted"] = self.is_demoted(name)
+                backends[name] = data
+            return {
+                "enabled": self.enabled,
+                "preferred": self.preferred,
+                "reason": self._reason(),
+                "backends": backends,
+            }
+
+
+def format_report(snapshot: Dict) -> str:
+    """将 snapshot 格式化为多行文本(统计页显示)"""
+    preferred = snapshot.get("preferred")
+    lines = [f"首选: {BACKEND_NAMES.get(preferred, '默认顺序') if preferred else '默认顺序'} - {snapshot.get('reason', '')}"]
+    for name, data in snapshot.get("backends", {}).items():
+        if not data["available"] and not data["attempts"]:
+            continue
+        rate = data["success_rate"]
+        rate_text = f"{rate:.0%}" if rate is not None else "-"
+        state = "" if data["available"] else " (不可用)"
+        if data["demoted"]:
+            state += " (已降级)"
+        circuit = data.get("circuit")
+        if circuit and circuit["state"] != "closed":
+            state += f" (熔断, {circuit['retry_in']:.0f}秒后重试)" if circuit["state"] == "open" else " (试探中)"
+        lines.append(f"{BACKEND_NAMES.get(name, name)}{state}: p50 {data['p50_ms']:.1f}ms  p99 {data['p99_ms']:.1f}ms  "
+                     f"成功率 {rate_text}  调用 {data['attempts']} 次")
+    return "\n".join(lines)
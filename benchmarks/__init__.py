@@ -0,0 +1,22 @@
+"""
+性能基准测试
+
+    python -m benchmarks run [组名 ...] [--quick] [--output results.json]
+    python -m benchmarks compare baseline.json results.json [--tolerance 0.25]
+"""
+
+import importlib
+from typing import Callable, Dict
+
+# 基准测试组名 -> 模块(模块需提供 run(quick) 函数)
+BENCHMARK_GROUPS = {
+    "latency": "benchmarks.latency",
+    "injection": "benchmarks.injection",
+    "pyautogui": "benchmarks.pyautogui",
+    "history": "benchmarks.history",
+    "timeline": "benchmarks.timeline",
+}
+
+
+def get_benchmark(name: str) -> Callable[[bool], Dict]:
+    return importlib.import_module(BENCHMARK_GROUPS[name]).run
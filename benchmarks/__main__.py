@@ -0,0 +1,87 @@
+"""
+基准测试命令行入口
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# 从仓库根目录导入被测模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import BENCHMARK_GROUPS, get_benchmark
+from benchmarks.common import DEFAULT_TOLERANCE, compare, format_metric, metadata
+
+
+def run_command(args) -> int:
+    groups = args.groups or list(BENCHMARK_GROUPS)
+    unknown = [name for name in groups if name not in BENCHMARK_GROUPS]
+    if unknown:
+        print(f"未知的基准测试组: {', '.join(unknown)} (可选: {', '.join(BENCHMARK_GROUPS)})")
+        return 2
+
+    report = {"meta": metadata(), "quick": args.quick, "results": {}}
+    for name in groups:
+        print(f"运行基准测试: {name} ...")
+        start = time.perf_counter()
+        report["results"][name] = get_benchmark(name)(args.quick)
+        print(f"  完成 ({time.perf_counter() - start:.1f}秒)")
+        for metric_name, metric in report["results"][name].items():
+            print(f"  {metric_name:<32} {format_metric(metric)}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已保存到: {args.output}")
+
+    if args.baseline:
+        return compare_reports(args.baseline, report, args.tolerance)
+    return 0
+
+
+def compare_reports(baseline_path: str, current: dict, tolerance: float) -> int:
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(baseline, current, tolerance)
+    if not regressions:
+        print(f"未发现性能回归 (容差 {tolerance:.0%})")
+        return 0
+
+    print(f"发现 {len(regressions)} 项性能回归 (容差 {tolerance:.0%}):")
+    for item in regressions:
+        change = f"+{item['change']:.0%}" if item["change"] is not None else ""
+        print(f"  {item['metric']:<48} {item['baseline']} -> {item['current']} {item['unit']} {change}")
+    return 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="触控板工具性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("groups", nargs="*", help=f"测试组 (默认全部: {', '.join(BENCHMARK_GROUPS)})")
+    run_parser.add_argument("--quick", action="store_true", help="减少样本数，快速运行")
+    run_parser.add_argument("--output", help="结果JSON文件")
+    run_parser.add_argument("--baseline", help="运行后与此基线对比")
+    run_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    compare_parser = subparsers.add_parser("compare", help="对比两份结果")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        return run_command(args)
+
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    return compare_reports(args.baseline, current, args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
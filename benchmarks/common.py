@@ -0,0 +1,113 @@
+"""
+基准测试公共工具: 百分位统计、结果格式、基线对比
+"""
+
+import contextlib
+import logging
+import math
+import platform
+import sys
+import time
+from typing import Dict, Iterable, List
+
+# 结果中每个指标的统计项
+PERCENTILE_KEYS = ("p50", "p99", "p999")
+
+# 对比时默认允许的相对波动
+DEFAULT_TOLERANCE = 0.25
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """最近秩百分位 (q 取 0-100)"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def distribution(samples: Iterable[float], unit: str, noise_floor: float = 0.0) -> Dict:
+    """汇总样本为 p50/p99/p999 指标
+
+    noise_floor 为对比时可忽略的绝对差值(与 unit 相同单位)。
+    """
+    ordered = sorted(samples)
+    result = {
+        "unit": unit,
+        "n": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        "noise_floor": noise_floor,
+    }
+    for key, q in zip(PERCENTILE_KEYS, (50, 99, 99.9)):
+        result[key] = round(percentile(ordered, q), 4)
+    return result
+
+
+def single_value(value: float, unit: str, noise_floor: float = 0.0) -> Dict:
+    """单值指标"""
+    return {"unit": unit, "value": round(value, 4), "noise_floor": noise_floor}
+
+
+def metadata() -> Dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+class _NullWriter:
+    """丢弃输出(不缓存，避免影响内存测量)"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测代码的 print 和 INFO 日志"""
+    app_logger = logging.getLogger("touchpad_manager")
+    level = app_logger.level
+    app_logger.setLevel(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(_NullWriter()):
+            yield
+    finally:
+        app_logger.setLevel(level)
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """对比两份结果，返回回归列表(数值越低越好)"""
+    regressions = []
+    base_results = baseline.get("results", {})
+
+    for group, metrics in current.get("results", {}).items():
+        for name, metric in metrics.items():
+            base_metric = base_results.get(group, {}).get(name)
+            if not base_metric:
+                continue
+
+            noise_floor = max(metric.get("noise_floor", 0.0), base_metric.get("noise_floor", 0.0))
+            for key in PERCENTILE_KEYS + ("value",):
+                if key not in metric or key not in base_metric:
+                    continue
+                old, new = base_metric[key], metric[key]
+                if new > old * (1 + tolerance) and new - old > noise_floor:
+                    regressions.append({
+                        "metric": f"{group}.{name}.{key}",
+                        "baseline": old,
+                        "current": new,
+                        "unit": metric.get("unit", ""),
+                        "change": round((new - old) / old, 4) if old else None,
+                    })
+    return regressions
+
+
+def format_metric(metric: Dict) -> str:
+    unit = metric.get("unit", "")
+    if "value" in metric:
+        return f"{metric['value']} {unit}"
+    return f"p50={metric['p50']} p99={metric['p99']} p999={metric['p999']} {unit} (n={metric['n']})"
@@ -0,0 +1,80 @@
+"""
+切换历史(SQLite)基准测试
+
+    history_record        HistoryStore.record 的耗时(热路径，只写内存队列)
+    history_write_rate    后台写入线程每秒写入的记录数(含小时/天汇总更新)
+    history_query_7d      数月历史下查询"最近7天"汇总的耗时
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict
+
+from history_store import HistoryStore
+
+from .common import distribution, quiet, single_value
+
+CAUSES = ("typing", "idle")
+
+
+def fill_history(store: HistoryStore, days: int, toggles_per_day: int, now: float) -> int:
+    """写入 days 天的模拟切换(每天 toggles_per_day 次禁用+启用)"""
+    rng = random.Random(1)
+    count = 0
+    for day in range(days, 0, -1):
+        day_start = now - day * 86400
+        for ts in sorted(day_start + rng.uniform(8 * 3600, 22 * 3600) for _ in range(toggles_per_day)):
+            store.record(ts, False, "typing", "registry", rng.uniform(0.001, 0.004))
+            store.record(ts + 1.5, True, "idle", "registry", rng.uniform(0.001, 0.004), 1.5)
+            count += 2
+        if count >= store.batch_size * 8:
+            store.flush()
+    store.flush()
+    return count
+
+
+def run(quick: bool = False) -> Dict:
+    """运行本组基准测试"""
+    directory = tempfile.mkdtemp(prefix="touchpad_history_")
+    try:
+        with quiet():
+            store = HistoryStore(os.path.join(directory, "history.db"), retention_days=365,
+                                 flush_interval=0.05, max_pending=100_000)
+            store.open()
+
+            # 热路径: 只追加到内存队列
+            record_us = []
+            now = time.time()
+            for i in range(2_000 if quick else 20_000):
+                start = time.perf_counter_ns()
+                store.record(now, bool(i & 1), CAUSES[i & 1], "registry", 0.002, 1.0)
+                record_us.append((time.perf_counter_ns() - start) / 1000)
+            store.flush()
+
+            days = 30 if quick else 180
+            start = time.perf_counter()
+            written = fill_history(store, days, 400, now)
+            write_rate = written / (time.perf_counter() - start)
+
+            query_ms = []
+            for _ in range(50 if quick else 500):
+                start = time.perf_counter_ns()
+                rows = store.query_days(7, now)
+                query_ms.append((time.perf_counter_ns() - start) / 1e6)
+            if len(rows) != 7:
+                raise RuntimeError(f"最近7天汇总行数错误: {len(rows)}")
+
+            size = store.stats()["size_bytes"]
+            store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "history_record": distribution(record_us, "us", noise_floor=5.0),
+        "history_write_rate": single_value(write_rate, "records/s"),
+        "history_query_7d": distribution(query_ms, "ms", noise_floor=1.0),
+        f"history_db_size_{days}d": single_value(size, "bytes", noise_floor=1_000_000),
+    }
@@ -0,0 +1,63 @@
+"""
+快捷键注入路径的延迟基准测试
+
+对比旧的逐键 SendMessageW 路径(每个事件后固定等待)与预编译的 SendInput
+批量注入路径。按键由 emulation 包的 FakeUser32 接收(零注入延迟)，
+测量的是 KeyboardSimulator 发送一次切换快捷键的阻塞时间(按键保持时间设为0，只测注入本身)。
+"""
+
+import time
+from typing import Dict, List
+
+from emulation import FakeUser32
+from keyboard_simulator import KeyboardSimulator
+
+from .common import distribution, quiet
+
+SHORTCUTS = (
+    ("F11",),
+    ("control", "F11"),
+)
+
+
+def _simulator(keys):
+    toggles: List[int] = []
+    user32 = FakeUser32(toggle_shortcut=keys, on_toggle=lambda: toggles.append(1))
+    simulator = KeyboardSimulator(user32_api=user32, hold_time=0.0)
+    simulator.set_shortcut(list(keys))
+    return simulator, toggles
+
+
+def bench_toggle(keys, legacy_repeats: int, batched_repeats: int) -> Dict:
+    """一次切换快捷键的阻塞时间: 旧路径 vs 批量路径"""
+    simulator, toggles = _simulator(keys)
+    name = "_".join(key.lower() for key in keys)
+
+    legacy_ms = []
+    for _ in range(legacy_repeats):
+        start = time.perf_counter_ns()
+        simulator.send_shortcut_via_messages(list(keys))
+        legacy_ms.append((time.perf_counter_ns() - start) / 1e6)
+
+    batched_us = []
+    for _ in range(batched_repeats):
+        start = time.perf_counter_ns()
+        simulator.toggle_touchpad_hotkey()
+        batched_us.append((time.perf_counter_ns() - start) / 1000)
+
+    if len(toggles) != legacy_repeats + batched_repeats:
+        raise RuntimeError(f"快捷键 {keys} 未被正确识别: {len(toggles)} 次切换")
+
+    return {
+        f"toggle_legacy_{name}": distribution(legacy_ms, "ms", noise_floor=20.0),
+        f"toggle_batched_{name}": distribution(batched_us, "us", noise_floor=20.0),
+    }
+
+
+def run(quick: bool = False) -> Dict:
+    """运行本组基准测试"""
+    with quiet():
+        results = {}
+        for keys in SHORTCUTS:
+            results.update(bench_toggle(keys, 3 if quick else 20, 2_000 if quick else 50_000))
+    return results
@@ -0,0 +1,157 @@
+"""
+按键禁用 / 空闲启用路径的延迟基准测试
+
+所有测试在虚拟时钟上驱动 TouchpadManager，触控板由 emulation 包的
+EmulatedMachine(精确式触控板注册表预设，零注入延迟)模拟。
+"""
+
+import bisect
+import random
+import time
+import tracemalloc
+from typing import Dict, List
+
+from clock import VirtualClock
+from emulation import EmulatedMachine
+from replay_harness import ReplayDriver, create_manager
+
+from .common import distribution, quiet, single_value
+
+IDLE_THRESHOLD = 1.0
+MIN_DISABLE_TIME = 0.5
+DELAY_BEFORE_ENABLE = 0.2
+
+WPM_RATES = (60, 120, 200)
+CHARS_PER_WORD = 5
+
+
+def _setup(seed: int = 0):
+    clock = VirtualClock()
+    machine = EmulatedMachine(preset="precision", clock=clock)
+    manager = create_manager(machine.create_registry_manager(), clock,
+                             IDLE_THRESHOLD, MIN_DISABLE_TIME, DELAY_BEFORE_ENABLE)
+    driver = ReplayDriver(manager, clock)
+    driver.start()
+    return clock, machine, manager, driver
+
+
+def typing_gaps(wpm: float, count: int, rng: random.Random, pause_probability: float = 0.02):
+    """生成按键间隔: 按 WPM 打字，偶尔停顿超过空闲阈值"""
+    base = 60.0 / (wpm * CHARS_PER_WORD)
+    for _ in range(count):
+        gap = max(0.015, rng.gauss(base, base * 0.35))
+        if rng.random() < pause_probability:
+            gap += IDLE_THRESHOLD + rng.expovariate(1 / 3.0)
+        yield gap
+
+
+def bench_hook_and_backend(keys: int) -> Dict:
+    """on_key_press 回调耗时，以及按键到注册表写入的延迟"""
+    clock, machine, manager, driver = _setup()
+    rng = random.Random(1)
+
+    writes: List[int] = []
+    machine.winreg.add_change_listener(lambda root, path, name: writes.append(time.perf_counter_ns()))
+
+    hook_us: List[float] = []
+    backend_us: List[float] = []
+    key_times: List[float] = []
+    t = clock.monotonic()
+
+    for gap in typing_gaps(120, keys, rng, pause_probability=0.05):
+        t += gap
+        driver.run_until(t)
+        write_count = len(writes)
+
+        start = time.perf_counter_ns()
+        manager.on_key_press(None)
+        end = time.perf_counter_ns()
+
+        hook_us.append((end - start) / 1000)
+        key_times.append(t)
+        if len(writes) > write_count:
+            backend_us.append((writes[write_count] - start) / 1000)
+
+    driver.settle()
+    driver.stop()
+
+    # 空闲截止时间(最后一次按键 + 阈值)到触控板真正启用的虚拟时间差
+    enable_ms = []
+    for when, enabled, _ in machine.transitions:
+        if enabled:
+            index = bisect.bisect_right(key_times, when) - 1
+            if index >= 0:
+                enable_ms.append((when - (key_times[index] + IDLE_THRESHOLD)) * 1000)
+
+    return {
+        "hook_callback": distribution(hook_us, "us", noise_floor=2.0),
+        "keystroke_to_backend": distribution(backend_us, "us", noise_floor=5.0),
+        "idle_deadline_to_enable": distribution(enable_ms, "ms", noise_floor=5.0),
+    }
+
+
+def bench_cpu_per_1000_keys(repeats: int) -> Dict:
+    """每1000次按键(含期间的监控周期)消耗的CPU时间"""
+    results = {}
+    for wpm in WPM_RATES:
+        clock, machine, manager, driver = _setup()
+        rng = random.Random(wpm)
+        samples = []
+        t = clock.monotonic()
+        for _ in range(repeats):
+            gaps = list(typing_gaps(wpm, 1000, rng))
+            start = time.process_time_ns()
+            for gap in gaps:
+                t += gap
+                driver.key_press(t)
+            samples.append((time.process_time_ns() - start) / 1e6)
+        driver.stop()
+        results[f"cpu_per_1000_keys_{wpm}wpm"] = distribution(samples, "ms", noise_floor=2.0)
+    return results
+
+
+def bench_session_memory(hours: float) -> Dict:
+    """模拟长时间会话的内存增长(不计模拟器自身保存的历史)"""
+    clock, machine, manager, driver = _setup()
+    rng = random.Random(8)
+    end = clock.monotonic() + hours * 3600
+    t = clock.monotonic()
+
+    # 保留完整调用栈，以便排除由模拟器分配的内存
+    tracemalloc.start(8)
+    try:
+        before = tracemalloc.take_snapshot()
+        keys = 0
+        while t < end:
+            # 打字约一分钟，然后休息一段时间
+            for gap in typing_gaps(120, 600, rng):
+                t += gap
+                driver.key_press(t)
+            keys += 600
+            t += rng.uniform(5, 120)
+            driver.run_until(t)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        driver.stop()
+
+    exclude = [tracemalloc.Filter(False, "*emulation*", all_frames=True),
+               tracemalloc.Filter(False, tracemalloc.__file__)]
+    growth = sum(stat.size_diff for stat in after.filter_traces(exclude).compare_to(before.filter_traces(exclude), "filename"))
+
+    return {
+        "session_memory_growth": single_value(growth, "bytes", noise_floor=64 * 1024),
+        "session_keystrokes": single_value(keys, "count"),
+        "session_peak_traced": single_value(peak, "bytes", noise_floor=256 * 1024),
+    }
+
+
+def run(quick: bool = False) -> Dict:
+    """运行本组基准测试"""
+    with quiet():
+        results = {}
+        results.update(bench_hook_and_backend(5_000 if quick else 50_000))
+        results.update(bench_cpu_per_1000_keys(5 if quick else 30))
+        results.update(bench_session_memory(1.0 if quick else 8.0))
+    return results
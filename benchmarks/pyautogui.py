@@ -0,0 +1,61 @@
+"""
+PyAutoGUISimulator 备选路径的延迟基准测试
+
+pyautogui 由 emulation 包的 FakePyAutoGUI 替代(保留默认 PAUSE=0.1 秒和
+FAILSAFE 检查)，因此可以在没有显示器的 Linux 上运行。对比 pyautogui.press /
+hotkey 旧路径与低延迟模式(预编译序列，临时关闭 PAUSE/FAILSAFE)。
+"""
+
+import time
+from typing import Dict, List
+
+from emulation import FakePyAutoGUI
+from keyboard_simulator import PyAutoGUISimulator
+
+from .common import distribution, quiet
+
+SHORTCUTS = (
+    ("f11",),
+    ("ctrl", "f11"),
+)
+
+
+def bench_toggle(keys, legacy_repeats: int, fast_repeats: int) -> Dict:
+    """一次切换快捷键的阻塞时间: 旧路径 vs 低延迟模式"""
+    toggles: List[int] = []
+    gui = FakePyAutoGUI(toggle_shortcut=keys, on_toggle=lambda: toggles.append(1))
+    legacy = PyAutoGUISimulator(pyautogui_module=gui, low_latency=False)
+    fast = PyAutoGUISimulator(pyautogui_module=gui, hold_time=0.0)
+    fast.set_shortcut(list(keys))
+    name = "_".join(keys)
+
+    legacy_ms = []
+    for _ in range(legacy_repeats):
+        start = time.perf_counter_ns()
+        legacy.send_shortcut(list(keys))
+        legacy_ms.append((time.perf_counter_ns() - start) / 1e6)
+
+    fast_us = []
+    for _ in range(fast_repeats):
+        start = time.perf_counter_ns()
+        fast.toggle_touchpad_hotkey()
+        fast_us.append((time.perf_counter_ns() - start) / 1000)
+
+    if len(toggles) != legacy_repeats + fast_repeats:
+        raise RuntimeError(f"快捷键 {keys} 未被正确识别: {len(toggles)} 次切换")
+    if (gui.PAUSE, gui.FAILSAFE) != (0.1, True):
+        raise RuntimeError("低延迟模式没有恢复 pyautogui 的 PAUSE/FAILSAFE 设置")
+
+    return {
+        f"pyautogui_legacy_{name}": distribution(legacy_ms, "ms", noise_floor=20.0),
+        f"pyautogui_fast_{name}": distribution(fast_us, "us", noise_floor=20.0),
+    }
+
+
+def run(quick: bool = False) -> Dict:
+    """运行本组基准测试"""
+    with quiet():
+        results = {}
+        for keys in SHORTCUTS:
+            results.update(bench_toggle(keys, 3 if quick else 20, 2_000 if quick else 50_000))
+    return results
@@ -0,0 +1,130 @@
+"""
+状态时间线基准测试(10,000 次切换)
+
+    timeline_ring_append     TransitionRing.append 的耗时
+    timeline_initial_draw    第一次绘制窗口内全部切换的耗时
+    timeline_tick            已有约 10,000 段时，每秒一次增量更新(1 次新切换)的耗时
+    timeline_full_redraw     对比: 删除全部矩形后重新绘制的耗时
+    timeline_canvas_items    运行两个窗口长度后 Canvas 上的矩形数(应保持有界)
+    timeline_tick_memory_growth  第二个窗口长度内的内存增长
+
+有显示器时使用真实的 Tk Canvas，否则使用只记录矩形的 RecordingCanvas(只测量本模块的开销)。
+"""
+
+import time
+import tracemalloc
+from typing import Dict
+
+from timeline import TransitionRing, TimelineView
+
+from .common import distribution, single_value
+
+TRANSITIONS = 10_000
+WINDOW = 3600.0
+WIDTH = 600
+HEIGHT = 24
+
+
+class RecordingCanvas:
+    """与 Tk Canvas 接口相同的最小实现"""
+
+    def __init__(self):
+        self.items = {}
+        self._next_id = 1
+
+    def create_rectangle(self, *coords, **options):
+        item = self._next_id
+        self._next_id += 1
+        self.items[item] = coords
+        return item
+
+    def coords(self, item, *coords):
+        self.items[item] = coords
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def configure(self, **options):
+        pass
+
+    def xview_moveto(self, fraction):
+        pass
+
+
+def create_canvas():
+    """返回 (canvas, root)，没有显示器时 root 为 None"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return tk.Canvas(root, width=WIDTH, height=HEIGHT), root
+    except Exception:
+        return RecordingCanvas(), None
+
+
+def count_items(canvas) -> int:
+    if isinstance(canvas, RecordingCanvas):
+        return len(canvas.items)
+    return len(canvas.find_all())
+
+
+def run(quick: bool = False) -> Dict:
+    """运行本组基准测试"""
+    ring = TransitionRing(TRANSITIONS * 2)
+    interval = WINDOW / TRANSITIONS
+    now = 100_000.0
+
+    append_us = []
+    for i in range(TRANSITIONS):
+        start = time.perf_counter_ns()
+        ring.append(now - WINDOW + i * interval, bool(i & 1))
+        append_us.append((time.perf_counter_ns() - start) / 1000)
+
+    canvas, root = create_canvas()
+    try:
+        view = TimelineView(canvas, ring, WIDTH, HEIGHT, WINDOW, origin=now - WINDOW)
+        start = time.perf_counter()
+        view.update(now)
+        initial_ms = (time.perf_counter() - start) * 1000
+
+        # 稳定状态: 每秒一次更新，期间发生一次切换；内存增长只比较后一半(前一半淘汰初始的 10,000 段)
+        ticks = int(WINDOW * 2) if not quick else 600
+        tick_us = [0.0] * ticks
+        before = 0
+        tracemalloc.start()
+        for i in range(ticks):
+            if i == ticks // 2:
+                before = tracemalloc.get_traced_memory()[0]
+            now += 1.0
+            ring.append(now - 0.5, bool(i & 1))
+            start = time.perf_counter_ns()
+            view.update(now)
+            tick_us[i] = (time.perf_counter_ns() - start) / 1000
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        items = count_items(canvas)
+
+        # 对比: 每次都整体重绘
+        redraw_ms = []
+        for _ in range(3 if quick else 10):
+            start = time.perf_counter()
+            canvas.delete("all")
+            full = TimelineView(canvas, ring, WIDTH, HEIGHT, WINDOW, origin=view.origin)
+            full.update(now)
+            redraw_ms.append((time.perf_counter() - start) * 1000)
+    finally:
+        if root is not None:
+            root.destroy()
+
+    return {
+        "timeline_ring_append": distribution(append_us, "us", noise_floor=2.0),
+        "timeline_initial_draw": single_value(initial_ms, "ms", noise_floor=50.0),
+        "timeline_tick": distribution(tick_us, "us", noise_floor=20.0),
+        "timeline_full_redraw": distribution(redraw_ms, "ms", noise_floor=50.0),
+        "timeline_canvas_items": single_value(items, "items", noise_floor=TRANSITIONS),
+        "timeline_tick_memory_growth": single_value(growth, "bytes", noise_floor=100_000),
+        "timeline_ring_bytes": single_value(ring.memory_bytes(), "bytes"),
+    }
@@ -89,6 +89,11 @@ pyinstaller --onefile ^
             --icon=config\icon.ico ^
             --add-data "config\icon.ico;config" ^
             --add-data "config\default_config.json;config" ^
+            --hidden-import threshold_tuner ^
+            --hidden-import replay_harness ^
+            --hidden-import history_export ^
+            --hidden-import fleet_aggregate ^
+            --hidden-import numpy ^
             --name "触控板自动开关工具" ^
             --clean ^
             --noconfirm ^
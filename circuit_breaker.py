@@ -0,0 +1,132 @@
+"""
+熔断器 - 控制方式连续失败后暂停调用，按指数退避重新试探
+
+    CLOSED     正常调用，连续失败 failure_threshold 次后熔断
+    OPEN       跳过调用，直到退避时间结束
+    HALF_OPEN  放行一次试探调用: 成功则恢复，失败则退避时间加倍后再次熔断
+"""
+
+import threading
+from enum import Enum
+from typing import Callable, Optional
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_BACKOFF = 5.0
+DEFAULT_MAX_BACKOFF = 300.0
+
+
+class CircuitState(Enum):
+    """熔断器状态"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """单个控制方式的熔断器
+
+    on_transition(name, old_state, new_state) 在每次状态变化时调用一次。
+    """
+
+    def __init__(self, name: str,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 base_backoff: float = DEFAULT_BASE_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 clock: Optional[Clock] = None,
+                 on_transition: Optional[Callable[[str, CircuitState, CircuitState], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.on_transition = on_transition
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.backoff = 0.0
+        self.open_until_ns = 0
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def configure(self, failure_threshold=None, base_backoff=None, max_backoff=None):
+        """应用配置(None 表示保持不变)"""
+        if failure_threshold is not None:
+            self.failure_threshold = max(1, int(failure_threshold))
+        if base_backoff is not None:
+            self.base_backoff = max(0.0, float(base_backoff))
+        if max_backoff is not None:
+            self.max_backoff = max(self.base_backoff, float(max_backoff))
+
+    def allow(self) -> bool:
+        """是否允许本次调用(OPEN 状态退避结束后转为 HALF_OPEN 并放行一次)"""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+
+            if self.state == CircuitState.OPEN:
+                if self.clock.monotonic_ns() < self.open_until_ns:
+                    return False
+                transition = self._set_state(CircuitState.HALF_OPEN)
+            elif self._trial_in_flight:
+                return False
+            else:
+                transition = None
+
+            self._trial_in_flight = True
+
+        self._notify(transition)
+        return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.backoff = 0.0
+            self._trial_in_flight = False
+            transition = self._set_state(CircuitState.CLOSED)
+        self._notify(transition)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+
+            if self.state == CircuitState.HALF_OPEN:
+                self.backoff = min(max(self.backoff, self.base_backoff) * 2, self.max_backoff)
+            elif self.state == CircuitState.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self.backoff = min(self.base_backoff, self.max_backoff)
+            else:
+                return
+
+            self.open_until_ns = self.clock.monotonic_ns() + int(self.backoff * NS_PER_SECOND)
+            self.trips += 1
+            transition = self._set_state(CircuitState.OPEN)
+        self._notify(transition)
+
+    def retry_in(self) -> float:
+        """距离下一次试探的秒数(非 OPEN 状态为0)"""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, (self.open_until_ns - self.clock.monotonic_ns()) / NS_PER_SECOND)
+
+    def _set_state(self, state: CircuitState):
+        old_state = self.state
+        if old_state == state:
+            return None
+        self.state = state
+        return old_state, state
+
+    def _notify(self, transition):
+        # 在锁外调用回调，避免回调中再次访问熔断器时死锁
+        if transition is not None and self.on_transition is not None:
+            self.on_transition(self.name, *transition)
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "retry_in": round(self.retry_in(), 1),
+        }
@@ -0,0 +1,87 @@
+"""
+时钟抽象 - 间隔计算统一使用单调时钟，墙上时间只用于显示
+
+SystemClock 基于 time.monotonic_ns()，不受 NTP 校时、睡眠唤醒、夏令时等
+系统时间跳变影响。VirtualClock 的时间只在 sleep/advance 时推进，用于在
+测试和回放中以毫秒级耗时模拟数小时的活动。
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class Clock(ABC):
+    """时钟接口"""
+
+    @abstractmethod
+    def monotonic_ns(self) -> int:
+        """单调时间(纳秒)，只用于计算间隔"""
+
+    @abstractmethod
+    def wall_time(self) -> float:
+        """墙上时间(秒，Unix时间戳)，只用于显示和导出"""
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        """等待指定秒数"""
+
+    def monotonic(self) -> float:
+        """单调时间(秒)"""
+        return self.monotonic_ns() / NS_PER_SECOND
+
+    def to_wall_time(self, monotonic_ns: int) -> float:
+        """将单调时间点换算为墙上时间，用于显示"""
+        return self.wall_time() - (self.monotonic_ns() - monotonic_ns) / NS_PER_SECOND
+
+
+class SystemClock(Clock):
+    """系统时钟"""
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def wall_time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """虚拟时钟 - sleep 立即返回并推进虚拟时间"""
+
+    def __init__(self, start_ns: int = 0, wall_origin: float = None):
+        self._now_ns = start_ns
+        self._wall_origin = time.time() if wall_origin is None else wall_origin
+        self._start_ns = start_ns
+        self._lock = threading.Lock()
+
+    def monotonic_ns(self) -> int:
+        return self._now_ns
+
+    def wall_time(self) -> float:
+        return self._wall_origin + (self._now_ns - self._start_ns) / NS_PER_SECOND
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        """推进虚拟时间"""
+        if seconds > 0:
+            with self._lock:
+                self._now_ns += int(round(seconds * NS_PER_SECOND))
+
+    def advance_to(self, monotonic_seconds: float):
+        """推进到指定的单调时间点(秒)，不会倒退"""
+        target = int(round(monotonic_seconds * NS_PER_SECOND))
+        with self._lock:
+            if target > self._now_ns:
+                self._now_ns = target
+
+
+# 默认时钟实例
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,231 @@
+"""
+性能诊断包 - "报告问题"在后台线程中生成的 zip 文件
+
+    report.json       问题报告(与 log/issue_report_*.json 相同)
+    latency.json      各控制方式、键盘回调、切换和钩子卸载/安装的延迟直方图和百分位
+    wakeups.json      监控循环唤醒次数、锁屏节省的唤醒、看门狗检查次数
+    metrics.txt       与指标端点相同的 Prometheus 文本
+    transitions.csv   最近 HISTORY_DAYS 天的切换明细(没有历史数据库时为内存中的最近切换)
+    errors.json       去重过滤器的抑制统计
+    threads.txt       所有线程的当前调用栈
+    rss.csv           进程内存(RSS)、线程数和 CPU 时间随时间的变化(需要 psutil)
+    benchmark.json    可选: 在真实硬件上对当前控制方式的测试
+    profile.collapsed 最近一次采样分析结果(如果有)
+    touchpad_manager.log 日志文件的末尾部分
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import zipfile
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+logger = logging.getLogger("touchpad_manager.diagnostics")
+
+RSS_INTERVAL = 60.0
+RSS_CAPACITY = 1440  # 按默认间隔保留24小时
+
+HISTORY_DAYS = 7
+LOG_TAIL_BYTES = 512 * 1024
+LOG_FILE = os.path.join("log", "touchpad_manager.log")
+
+
+class ResourceRecorder:
+    """定期记录进程内存和 CPU 时间(监控线程调用 maybe_sample，需要 psutil)"""
+
+    def __init__(self, clock: Optional[Clock] = None, interval: float = RSS_INTERVAL, capacity: int = RSS_CAPACITY):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.interval_ns = int(interval * NS_PER_SECOND)
+        self.samples = deque(maxlen=capacity)
+        self._next_ns = 0
+        self._process = None
+
+    def maybe_sample(self, now_ns: int):
+        if not HAS_PSUTIL or now_ns < self._next_ns:
+            return
+        self._next_ns = now_ns + self.interval_ns
+        self.sample(now_ns)
+
+    def sample(self, now_ns: int):
+        try:
+            if self._process is None:
+                self._process = psutil.Process(os.getpid())
+            with self._process.oneshot():
+                rss = self._process.memory_info().rss
+                threads = self._process.num_threads()
+                cpu = self._process.cpu_times()
+            self.samples.append((self.clock.to_wall_time(now_ns), rss, threads, round(cpu.user + cpu.system, 3)))
+        except Exception as e:
+            logger.debug(f"读取进程资源占用失败: {e}")
+
+
+def latency_report(manager) -> Dict[str, Any]:
+    selector = getattr(manager.registry_manager, "backend_selector", None)
+    return {
+        "backends": {name: stats.latency.summary() for name, stats in selector.stats.items()}
+        if selector is not None else {},
+        "hook_callback": manager.hook_callback_latency.summary(),
+        "toggle": manager.stats.toggle_latency.summary(),
+        "hook_uninstall": manager.hook_uninstall_latency.summary(),
+        "hook_reinstall": manager.hook_reinstall_latency.summary(),
+    }
+
+
+def wakeup_report(manager) -> Dict[str, Any]:
+    report = {"monitor_wakeups": manager.monitor_wakeups,
+              "monitor_interval": manager.MONITOR_INTERVAL}
+    if manager.session_start_ns is not None:
+        hours = (manager.clock.monotonic_ns() - manager.session_start_ns) / NS_PER_SECOND / 3600
+        report["monitor_wakeups_per_hour"] = round(manager.monitor_wakeups / hours, 1) if hours > 0 else None
+    if manager.session_monitor is not None:
+        report["session"] = manager.session_monitor.stats()
+    if manager.hook_watchdog is not None:
+        report["watchdog_checks"] = manager.hook_watchdog.checks
+    return report
+
+
+def thread_stacks() -> str:
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    lines: List[str] = []
+    for ident, frame in sys._current_frames().items():
+        lines.append(f"Thread {names.get(ident, ident)} ({ident}):")
+        lines.extend(line.rstrip("\n") for line in traceback.format_stack(frame))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def write_transitions(manager, f) -> int:
+    """最近的切换明细写入 CSV，返回行数"""
+    if manager.history is not None:
+        from history_export import iter_records, write_records
+        manager.history.flush(timeout=2.0)
+        rows = manager.history.iter_transitions(start=time.time() - HISTORY_DAYS * 86400)
+        return write_records(iter_records(rows), f, "csv")
+
+    # 没有历史数据库: 使用内存中的最近切换(单调时钟秒)
+    writer = csv.writer(f)
+    writer.writerow(("monotonic", "time", "enabled"))
+    ring = manager.transitions
+    count = 0
+    for _, timestamp, state in ring.since(ring.first_sequence):
+        wall = manager.clock.to_wall_time(int(timestamp * NS_PER_SECOND))
+        writer.writerow((round(timestamp, 3), time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)), state))
+        count += 1
+    return count
+
+
+def write_rss(samples, f):
+    writer = csv.writer(f)
+    writer.writerow(("time", "rss_bytes", "threads", "cpu_seconds"))
+    for wall, rss, threads, cpu in samples:
+        writer.writerow((time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)), rss, threads, cpu))
+
+
+def read_log_tail(path: str = LOG_FILE, limit: int = LOG_TAIL_BYTES) -> Optional[bytes]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - limit))
+        return f.read()
+
+
+def create_bundle(manager, report: Dict[str, Any], path: str, dedup_filter=None, benchmark_seconds: float = 0.0,
+                  progress: Optional[Callable[[float, str], None]] = None) -> str:
+    """在调用线程中生成诊断包(不要在 Tk 线程调用)，返回 path
+
+    dedup_filter 为日志使用的 DedupFilter；progress(完成比例 0-1, 当前步骤) 可能被频繁调用。
+    benchmark_seconds 为 0 时不测试控制方式。
+    """
+    def text_step(name, build):
+        return lambda archive: archive.writestr(name, build())
+
+    def csv_step(name, write):
+        def step(archive):
+            with archive.open(name, "w") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                write(f)
+        return step
+
+    def json_dump(data) -> str:
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str)
+
+    def metrics_text() -> str:
+        from metrics_server import collect_metrics
+        return collect_metrics(manager)
+
+    def log_step(archive):
+        data = read_log_tail()
+        if data is not None:
+            archive.writestr("touchpad_manager.log", data)
+
+    def profile_step(archive):
+        profile = report.get("profile")
+        if profile and os.path.exists(profile["path"]):
+            archive.write(profile["path"], "profile.collapsed")
+
+    steps = [
+        ("问题报告", text_step("report.json", lambda: json_dump(report))),
+        ("延迟直方图", text_step("latency.json", lambda: json_dump(latency_report(manager)))),
+        ("唤醒次数", text_step("wakeups.json", lambda: json_dump(wakeup_report(manager)))),
+        ("指标", text_step("metrics.txt", metrics_text)),
+        ("切换历史", csv_step("transitions.csv", lambda f: write_transitions(manager, f))),
+        ("错误汇总", text_step("errors.json", lambda: json_dump(dedup_filter.stats(top=50) if dedup_filter else {}))),
+        ("线程调用栈", text_step("threads.txt", thread_stacks)),
+        ("内存占用", csv_step("rss.csv", lambda f: write_rss(list(manager.resource_recorder.samples), f))),
+        ("采样分析结果", profile_step),
+        ("日志", log_step),
+    ]
+
+    # 控制方式测试按秒计入进度，其余每步计1
+    total = len(steps) + benchmark_seconds
+    done = 0.0
+
+    def report_progress(message: str, extra: float = 0.0):
+        if progress is not None:
+            progress(min(1.0, (done + extra) / total), message)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".part"
+    try:
+        with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for label, step in steps:
+                report_progress(f"正在收集{label}...")
+                try:
+                    step(archive)
+                except Exception as e:
+                    logger.error(f"收集{label}失败: {e}")
+                    archive.writestr(f"errors/{label}.txt", traceback.format_exc())
+                done += 1
+
+            if benchmark_seconds > 0:
+                message = f"正在测试控制方式({benchmark_seconds:.0f}秒，请不要使用触控板)..."
+                report_progress(message)
+                result = manager.benchmark_backend(
+                    benchmark_seconds, progress=lambda fraction: report_progress(message, fraction * benchmark_seconds)
+                )
+                archive.writestr("benchmark.json", json_dump(result))
+                done += benchmark_seconds
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    report_progress("完成")
+    logger.info(f"诊断包已保存: {path}")
+    return path
@@ -0,0 +1,41 @@
+"""
+后端模拟包 - 在没有 Windows 的环境中运行 RegistryManager / KeyboardSimulator / TouchpadManager
+
+    from emulation import EmulatedMachine
+    machine = EmulatedMachine(preset="synaptics")
+    machine.latency.configure("registry.set", latency=0.002, failure_rate=0.01)
+    manager = TouchpadManager(registry_manager=machine.create_registry_manager())
+"""
+
+from .foreground import FakeForegroundEventSource
+from .injector import FakeUser32
+from .keyboard_hook import FakeHookEvent, FakeInputActivitySource, FakeKeyboardHook, FakeKeyboardListener
+from .latency import OPERATIONS, LatencyModel, OperationProfile
+from .machine import REGISTRY_PRESETS, EmulatedMachine, touchpad_key_path
+from .powershell import FakePowerShellHost, PnpDevice
+from .pyautogui_stub import FakePyAutoGUI
+from .registry import FakeKey, FakeRegistryNotifier, FakeWin32Api, FakeWinreg
+from .session import FakeSessionEventSource
+
+__all__ = [
+    "EmulatedMachine",
+    "REGISTRY_PRESETS",
+    "touchpad_key_path",
+    "LatencyModel",
+    "OperationProfile",
+    "OPERATIONS",
+    "FakeWinreg",
+    "FakeWin32Api",
+    "FakeKey",
+    "FakeRegistryNotifier",
+    "FakePowerShellHost",
+    "PnpDevice",
+    "FakeUser32",
+    "FakePyAutoGUI",
+    "FakeSessionEventSource",
+    "FakeForegroundEventSource",
+    "FakeKeyboardHook",
+    "FakeHookEvent",
+    "FakeKeyboardListener",
+    "FakeInputActivitySource",
+]
@@ -0,0 +1,50 @@
+"""
+前台窗口事件来源模拟 - 手动切换前台应用
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+
+
+class FakeForegroundEventSource:
+    """可直接作为 ForegroundMonitor 的 source 使用，事件在调用线程中同步分发"""
+
+    def __init__(self):
+        self.callback: Optional[Callable[[int, int, bool], None]] = None
+        self.pids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.name_queries = 0
+        self.foreground: Optional[Tuple[int, int, bool]] = None  # (窗口, PID, 是否全屏)
+        self._next_pid = 1000
+
+    def start(self, callback: Callable[[int, int, bool], None]):
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def process_name(self, pid: int) -> str:
+        self.name_queries += 1
+        return self.names.get(pid, "")
+
+    def focus(self, process_name: str, fullscreen: bool = False, pid: Optional[int] = None,
+              hwnd: Optional[int] = None):
+        """把 process_name 的窗口切换到前台(同名进程默认复用同一个 PID 和窗口)"""
+        if pid is None:
+            pid = self.pids.get(process_name)
+            if pid is None:
+                pid = self._next_pid
+                self._next_pid += 4
+        self.pids[process_name] = pid
+        self.names[pid] = process_name
+        self.foreground = (hwnd if hwnd is not None else pid * 16, pid, fullscreen)
+        if self.callback is not None:
+            self.callback(*self.foreground)
+
+    def set_fullscreen(self, fullscreen: bool):
+        """前台窗口进入或退出全屏(EVENT_OBJECT_LOCATIONCHANGE)，状态变化时才通知"""
+        if self.foreground is None or self.foreground[2] == fullscreen:
+            return
+        hwnd, pid, _ = self.foreground
+        self.foreground = (hwnd, pid, fullscreen)
+        if self.callback is not None:
+            self.callback(*self.foreground)
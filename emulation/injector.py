@@ -0,0 +1,86 @@
+"""
+按键注入模拟 - 替代 ctypes.windll.user32，识别触控板切换快捷键
+"""
+
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from .latency import LatencyModel
+
+WM_KEYDOWN = 0x0100
+WM_KEYUP = 0x0101
+WM_SYSKEYDOWN = 0x0104
+WM_SYSKEYUP = 0x0105
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+
+FOREGROUND_HWND = 0x00010010
+
+# 快捷键名称 -> 虚拟键码
+VK_CODES = {
+    "f6": 0x75, "f7": 0x76, "f8": 0x77, "f9": 0x78, "f10": 0x79, "f11": 0x7A, "f12": 0x7B,
+    "control": 0x11, "ctrl": 0x11, "alt": 0x12, "shift": 0x10, "windows": 0x5B,
+}
+
+
+def shortcut_to_vk(keys: Iterable[str]) -> Tuple[int, ...]:
+    """将快捷键名称列表转换为虚拟键码"""
+    return tuple(VK_CODES[key.lower()] for key in keys)
+
+
+class FakeUser32:
+    """user32 的模拟实现 - 释放切换键且修饰键匹配时触发 on_toggle
+
+    设置 keyboard_hook (FakeKeyboardHook) 后，SendInput 注入的事件像真实系统一样经过低级键盘钩子；
+    SendMessageW 发送的消息不经过钩子。
+    """
+
+    def __init__(self, toggle_shortcut: Iterable[str] = ("F11",), on_toggle: Optional[Callable[[], None]] = None,
+                 latency: Optional[LatencyModel] = None):
+        self.toggle_vk = shortcut_to_vk(toggle_shortcut)
+        self.on_toggle = on_toggle
+        self.latency = latency if latency is not None else LatencyModel()
+        self.pressed: Set[int] = set()
+        self.injected: List[Tuple[int, int]] = []  # (消息, 虚拟键码)
+        self.keyboard_hook = None
+
+    def GetForegroundWindow(self) -> int:
+        return FOREGROUND_HWND
+
+    def SendMessageW(self, hwnd: int, message: int, wparam: int, lparam: int) -> int:
+        if not self.latency.apply("inject.key"):
+            return 0
+
+        self.injected.append((message, wparam))
+        if message in (WM_KEYDOWN, WM_SYSKEYDOWN):
+            self.pressed.add(wparam)
+        elif message in (WM_KEYUP, WM_SYSKEYUP):
+            self._on_key_up(wparam)
+        return 1
+
+    def SendInput(self, count: int, inputs, size: int) -> int:
+        """批量注入: 整批事件一次完成，返回被接受的事件数"""
+        if not self.latency.apply("inject.batch"):
+            return 0
+
+        for item in inputs[:count]:
+            if item.type != INPUT_KEYBOARD:
+                continue
+            vk_code = item.ki.wVk
+            keyup = bool(item.ki.dwFlags & KEYEVENTF_KEYUP)
+            if keyup:
+                self.injected.append((WM_KEYUP, vk_code))
+                self._on_key_up(vk_code)
+            else:
+                self.injected.append((WM_KEYDOWN, vk_code))
+                self.pressed.add(vk_code)
+            if self.keyboard_hook is not None:
+                self.keyboard_hook.inject(vk_code, keyup, item.ki.dwExtraInfo)
+        return count
+
+    def _on_key_up(self, vk_code: int):
+        *modifiers, trigger = self.toggle_vk
+        if vk_code == trigger and self.pressed == set(modifiers) | {trigger}:
+            if self.on_toggle:
+                self.on_toggle()
+        self.pressed.discard(vk_code)
@@ -0,0 +1,169 @@
+"""
+键盘钩子模拟 - 模拟 pynput 监听器和系统输入活动，包括钩子被系统静默移除的情况
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from clock import Clock, SYSTEM_CLOCK
+
+WM_KEYDOWN = 0x0100
+WM_KEYUP = 0x0101
+LLKHF_INJECTED = 0x10
+
+
+@dataclass
+class FakeHookEvent:
+    """低级键盘钩子收到的事件(KBDLLHOOKSTRUCT 中 win32_event_filter 常用的字段)"""
+    vkCode: int = 0
+    flags: int = 0
+    dwExtraInfo: int = 0
+
+
+class FakeInputActivitySource:
+    """可直接作为 HookWatchdog 的 source 使用"""
+
+    def __init__(self, clock: Optional[Clock] = None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.last_input_ns = self.clock.monotonic_ns()
+        self.cursor = (0, 0)
+        self.key_pressed = False
+
+    def key(self):
+        """一次按键"""
+        self.last_input_ns = self.clock.monotonic_ns()
+        self.key_pressed = True
+
+    def move(self, dx: int = 1, dy: int = 0):
+        """移动鼠标"""
+        self.last_input_ns = self.clock.monotonic_ns()
+        self.cursor = (self.cursor[0] + dx, self.cursor[1] + dy)
+
+    def scroll(self):
+        """滚动滚轮(光标不动，也不是按键)"""
+        self.last_input_ns = self.clock.monotonic_ns()
+
+    def idle_ns(self) -> Optional[int]:
+        return self.clock.monotonic_ns() - self.last_input_ns
+
+    def keyboard_input(self) -> Optional[bool]:
+        pressed, self.key_pressed = self.key_pressed, False
+        return pressed
+
+
+class FakeKeyboardListener:
+    """pynput keyboard.Listener 的替代品，按键由 FakeKeyboardHook.press 同步分发"""
+
+    def __init__(self, hook: "FakeKeyboardHook", on_press: Callable,
+                 win32_event_filter: Optional[Callable] = None):
+        self.hook = hook
+        self.on_press = on_press
+        self.win32_event_filter = win32_event_filter
+        self.running = False
+        self.removed = False  # 系统已移除钩子，线程仍"存活"但不再收到事件
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self._stopped.set()
+
+    def wait(self):
+        pass
+
+    def join(self, timeout: Optional[float] = None):
+        self._stopped.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return self.running
+
+
+class FakeKeyboardHook:
+    """可作为 TouchpadManager.listener_factory 使用，模拟系统的低级键盘钩子
+
+    回调耗时超过 timeout 时像 Windows 7+ 一样静默移除当前监听器的钩子。
+    win32_event_filter 返回 False 的事件不调用 on_press (与 pynput 相同)。
+    回调中注入的事件(inject)排队，等当前回调返回后再分发，与钩子线程串行处理事件一致。
+    """
+
+    def __init__(self, input_source: Optional[FakeInputActivitySource] = None, timeout: float = 0.3):
+        self.input_source = input_source
+        self.timeout = timeout
+        self.listeners: List[FakeKeyboardListener] = []
+        self.delivered = 0
+        self.filtered = 0
+        self.lost = 0
+        self._queue = deque()
+        self._dispatching = False
+
+    def __call__(self, on_press: Callable, win32_event_filter: Optional[Callable] = None) -> FakeKeyboardListener:
+        listener = FakeKeyboardListener(self, on_press, win32_event_filter)
+        self.listeners.append(listener)
+        return listener
+
+    @property
+    def current(self) -> Optional[FakeKeyboardListener]:
+        return self.listeners[-1] if self.listeners else None
+
+    def press(self, key=None) -> bool:
+        """系统收到一次物理按键，钩子有效时调用监听器的回调；返回是否送达"""
+        if self.input_source is not None:
+            self.input_source.key()
+        return self._dispatch(WM_KEYDOWN, FakeHookEvent(), key)
+
+    def inject(self, vk_code: int, keyup: bool = False, extra_info: int = 0) -> bool:
+        """SendInput 注入的一个按键事件(FakeUser32.keyboard_hook 调用)"""
+        if self.input_source is not None:
+            self.input_source.key()
+        return self._dispatch(WM_KEYUP if keyup else WM_KEYDOWN,
+                              FakeHookEvent(vk_code, LLKHF_INJECTED, extra_info), None)
+
+    def _dispatch(self, message: int, data: FakeHookEvent, key) -> bool:
+        self._queue.append((message, data, key))
+        if self._dispatching:
+            return True
+        self._dispatching = True
+        try:
+            delivered = None
+            while self._queue:
+                result = self._deliver(*self._queue.popleft())
+                if delivered is None:
+                    delivered = result
+            return delivered
+        finally:
+            self._dispatching = False
+
+    def _deliver(self, message: int, data: FakeHookEvent, key) -> bool:
+        listener = self.current
+        if listener is None or not listener.running or listener.removed:
+            if message == WM_KEYDOWN:
+                self.lost += 1
+            return False
+
+        if listener.win32_event_filter is not None and listener.win32_event_filter(message, data) is False:
+            self.filtered += 1
+            return True
+        if message != WM_KEYDOWN:
+            return True
+
+        start = time.perf_counter()
+        listener.on_press(key)
+        self.delivered += 1
+        if time.perf_counter() - start >= self.timeout:
+            listener.removed = True
+        return True
+
+    def remove(self):
+        """系统静默移除当前钩子"""
+        if self.current is not None:
+            self.current.removed = True
+
+    def kill(self):
+        """监听线程退出"""
+        if self.current is not None:
+            self.current.running = False
@@ -0,0 +1,70 @@
+"""
+操作延迟与故障注入模型
+"""
+
+import random
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from clock import Clock, SYSTEM_CLOCK
+
+# 可配置的模拟操作
+OPERATIONS = (
+    "registry.open",       # 打开注册表键
+    "registry.query",      # 读取注册表值
+    "registry.set",        # 写入注册表值
+    "registry.broadcast",  # WM_SETTINGCHANGE 广播
+    "powershell.query",    # Get-PnpDevice 状态查询
+    "powershell.set",      # Enable/Disable-PnpDevice
+    "inject.key",          # 单个按键事件注入
+    "inject.batch",        # SendInput 批量注入
+    "pyautogui.key",       # pyautogui 单个按键事件
+    "pyautogui.position",  # pyautogui FAILSAFE 检查读取鼠标位置
+)
+
+
+@dataclass
+class OperationProfile:
+    """单个操作的延迟和故障率"""
+    latency: float = 0.0       # 基础延迟(秒)
+    jitter: float = 0.0        # 均匀抖动幅度(秒)
+    failure_rate: float = 0.0  # 失败概率 0-1
+
+
+class LatencyModel:
+    """按操作名称注入延迟和随机失败，随机数可复现"""
+
+    def __init__(self, profiles: Optional[Dict[str, OperationProfile]] = None,
+                 seed: int = 0, clock: Optional[Clock] = None):
+        self.profiles: Dict[str, OperationProfile] = dict(profiles or {})
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.calls: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def configure(self, operation: str, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0):
+        """设置某个操作的延迟和故障率"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"未知的模拟操作: {operation}")
+        self.profiles[operation] = OperationProfile(latency, jitter, failure_rate)
+
+    def apply(self, operation: str) -> bool:
+        """执行一次操作: 按配置等待，返回操作是否成功"""
+        profile = self.profiles.get(operation)
+
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            if profile is None:
+                return True
+            delay = profile.latency
+            if profile.jitter:
+                delay += self._random.uniform(-profile.jitter, profile.jitter)
+            failed = profile.failure_rate > 0 and self._random.random() < profile.failure_rate
+            if failed:
+                self.failures[operation] = self.failures.get(operation, 0) + 1
+
+        if delay > 0:
+            self.clock.sleep(delay)
+        return not failed
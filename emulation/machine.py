@@ -0,0 +1,143 @@
+"""
+模拟笔记本 - 把内存注册表、PnP 设备和快捷键注入组合成一个可控制的触控板
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from clock import Clock, SYSTEM_CLOCK
+
+from .injector import FakeUser32
+from .latency import LatencyModel
+from .powershell import FakePowerShellHost, PnpDevice
+from .registry import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, REG_DWORD, REG_SZ, FakeRegistryNotifier, FakeWin32Api, FakeWinreg
+
+# 注册表预设名称 -> RegistryManager.TOUCHPAD_KEY_PATHS 中的序号
+REGISTRY_PRESETS: Dict[str, int] = {
+    "precision": 0,      # 微软精确式触控板
+    "synaptics": 1,      # Synaptics TouchPadPS2
+    "synaptics_enh": 2,  # Synaptics SynTPEnh
+    "elan": 3,
+    "alps": 4,
+    "explorer": 5,       # 通用 Explorer 设置
+}
+
+
+def touchpad_key_path(preset: str) -> Tuple[str, str]:
+    """返回预设对应的 (注册表路径, 值名称)"""
+    from touchpad_manager import RegistryManager
+
+    if preset not in REGISTRY_PRESETS:
+        raise ValueError(f"未知的注册表预设: {preset}")
+    return RegistryManager.TOUCHPAD_KEY_PATHS[REGISTRY_PRESETS[preset]]
+
+
+class EmulatedMachine:
+    """模拟的笔记本触控板
+
+    触控板实际状态 = 驱动开关 且 PnP 设备已启用:
+    - 写入注册表后广播 WM_SETTINGCHANGE 时，驱动开关跟随注册表值
+    - 注入切换快捷键(默认F11)会翻转驱动开关，并同步回注册表值
+    - PowerShell Enable/Disable-PnpDevice 控制设备本身
+
+    preset 为 None 时不创建触控板注册表键，RegistryManager 将回退到快捷键或兼容模式。
+    """
+
+    def __init__(self, preset: Optional[str] = "precision", touchpad_enabled: bool = True,
+                 toggle_shortcut: Sequence[str] = ("F11",), latency: Optional[LatencyModel] = None,
+                 clock: Optional[Clock] = None, devices: Optional[List[PnpDevice]] = None,
+                 model: Tuple[str, str] = ("LENOVO", "20XW0026CD")):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.latency = latency if latency is not None else LatencyModel(clock=self.clock)
+        self.driver_enabled = touchpad_enabled
+        self.transitions: List[Tuple[float, bool, str]] = []  # (单调时间, 是否启用, 来源)
+        self._lock = threading.RLock()
+
+        self.devices = devices if devices is not None else [
+            PnpDevice("HID\\VEN_ELAN&DEV_0001\\5&1A2B3C4D&0&0000", "HID-compliant touch pad")
+        ]
+
+        self.winreg = FakeWinreg(self.latency)
+        self.win32api = FakeWin32Api(self.apply_registry, self.latency)
+        self.powershell = FakePowerShellHost(self.devices, self.latency, self._record_state)
+        self.user32 = FakeUser32(toggle_shortcut, self.toggle_touchpad, self.latency)
+
+        # BIOS 中的厂商和型号
+        self.manufacturer, self.model = model
+        bios = r"HARDWARE\DESCRIPTION\System\BIOS"
+        self.winreg.seed_value(HKEY_LOCAL_MACHINE, bios, "SystemManufacturer", self.manufacturer, REG_SZ)
+        self.winreg.seed_value(HKEY_LOCAL_MACHINE, bios, "SystemProductName", self.model, REG_SZ)
+
+        self.key_path: Optional[str] = None
+        self.value_name: Optional[str] = None
+        self._last_state = self.touchpad_enabled
+        if preset is not None:
+            self.key_path, self.value_name = touchpad_key_path(preset)
+            self.winreg.seed_value(HKEY_CURRENT_USER, self.key_path, self.value_name,
+                                   self._registry_value(touchpad_enabled), REG_DWORD)
+
+    @property
+    def touchpad_enabled(self) -> bool:
+        """触控板当前是否真正可用"""
+        return self.driver_enabled and any(device.enabled for device in self.devices if device.is_touchpad())
+
+    @property
+    def invert_logic(self) -> bool:
+        return self.value_name is not None and "Disable" in self.value_name
+
+    def _registry_value(self, enabled: bool) -> int:
+        return int(enabled != self.invert_logic)
+
+    def _record_state(self, source: str = "pnp"):
+        with self._lock:
+            state = self.touchpad_enabled
+            if state != self._last_state:
+                self._last_state = state
+                self.transitions.append((self.clock.monotonic(), state, source))
+
+    def apply_registry(self):
+        """设置更改广播: 驱动读取注册表值"""
+        if self.key_path is None:
+            return
+        value = self.winreg.read_value(HKEY_CURRENT_USER, self.key_path, self.value_name)
+        if value is not None:
+            with self._lock:
+                self.driver_enabled = bool(value) != self.invert_logic
+            self._record_state("registry")
+
+    def toggle_touchpad(self):
+        """切换快捷键: 翻转驱动开关并同步注册表"""
+        with self._lock:
+            self.driver_enabled = not self.driver_enabled
+            if self.key_path is not None:
+                self.winreg.seed_value(HKEY_CURRENT_USER, self.key_path, self.value_name,
+                                       self._registry_value(self.driver_enabled), REG_DWORD, notify=True)
+        self._record_state("shortcut")
+
+    def create_keyboard_simulator(self):
+        """创建连接到本机的 KeyboardSimulator"""
+        from keyboard_simulator import KeyboardSimulator
+        return KeyboardSimulator(user32_api=self.user32)
+
+    def create_registry_manager(self, use_keyboard_shortcut: Optional[bool] = None):
+        """创建连接到本机的 RegistryManager
+
+        use_keyboard_shortcut 为 None 时沿用 RegistryManager 的自动检测:
+        有注册表键时走注册表，否则回退到快捷键。
+        """
+        from touchpad_manager import RegistryManager
+
+        simulator = self.create_keyboard_simulator()
+        manager = RegistryManager(
+            winreg_api=self.winreg,
+            win32_api=self.win32api,
+            run_command=self.powershell,
+            keyboard_simulator=simulator,
+            clock=self.clock,
+            notifier_factory=lambda key_path: FakeRegistryNotifier(self.winreg, key_path),
+        )
+        if use_keyboard_shortcut is not None:
+            manager.keyboard_simulator = simulator
+            manager.use_keyboard_shortcut = use_keyboard_shortcut
+            manager.compatibility_mode = use_keyboard_shortcut or manager.detected_key_path is None
+        return manager
@@ -0,0 +1,75 @@
+"""
+PowerShell 主机模拟 - 响应 RegistryManager 兼容模式发出的 PnP 设备命令
+"""
+
+import subprocess
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .latency import LatencyModel
+
+
+@dataclass
+class PnpDevice:
+    """PnP 设备模型"""
+    instance_id: str
+    friendly_name: str
+    device_class: str = "HIDClass"
+    enabled: bool = True
+
+    @property
+    def status(self) -> str:
+        # 被禁用的设备在 Get-PnpDevice 中显示为 Error
+        return "OK" if self.enabled else "Error"
+
+    def is_touchpad(self) -> bool:
+        # 对应 -like "*TouchPad*" -or -like "*Touch Pad*" (PowerShell 不区分大小写)
+        name = self.friendly_name.lower()
+        return self.device_class == "HIDClass" and ("touchpad" in name or "touch pad" in name)
+
+
+class FakePowerShellHost:
+    """可替代 subprocess.run 的 PowerShell 模拟 - 作为 RegistryManager 的 run_command 使用"""
+
+    def __init__(self, devices: List[PnpDevice], latency: Optional[LatencyModel] = None,
+                 on_device_change: Optional[Callable[[], None]] = None):
+        self.devices = devices
+        self.latency = latency if latency is not None else LatencyModel()
+        self.on_device_change = on_device_change
+        self.commands: List[str] = []
+
+    def __call__(self, cmd, capture_output: bool = False, text: bool = False, shell: bool = False, **kwargs):
+        command = cmd if isinstance(cmd, str) else " ".join(cmd)
+        self.commands.append(command)
+
+        if "Enable-PnpDevice" in command or "Disable-PnpDevice" in command:
+            operation = "powershell.set"
+        elif "Get-PnpDevice" in command:
+            operation = "powershell.query"
+        else:
+            return self._result(command, 1, "", "无法将该项识别为 cmdlet、函数、脚本文件或可运行程序的名称。", text)
+
+        if not self.latency.apply(operation):
+            return self._result(command, 1, "", "Generic failure", text)
+
+        touchpads = [device for device in self.devices if device.is_touchpad()]
+
+        if operation == "powershell.query":
+            stdout = "\n".join(device.status for device in touchpads)
+            return self._result(command, 0, stdout + "\n" if stdout else "", "", text)
+
+        if not touchpads:
+            return self._result(command, 1, "", "无法将参数绑定到参数“InstanceId”，因为该参数为空值。", text)
+
+        enable = "Enable-PnpDevice" in command
+        for device in touchpads:
+            device.enabled = enable
+        if self.on_device_change:
+            self.on_device_change()
+        return self._result(command, 0, "", "", text)
+
+    @staticmethod
+    def _result(command: str, returncode: int, stdout: str, stderr: str, text: bool):
+        if not text:
+            stdout, stderr = stdout.encode(), stderr.encode()
+        return subprocess.CompletedProcess(command, returncode, stdout, stderr)
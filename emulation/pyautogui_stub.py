@@ -0,0 +1,107 @@
+"""
+pyautogui 模拟 - 替代 pyautogui 模块，保留 PAUSE / FAILSAFE 的时间开销
+"""
+
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from .latency import LatencyModel
+
+FAILSAFE_POINTS = ((0, 0),)
+
+KEYBOARD_KEYS = frozenset(
+    [chr(c) for c in range(ord("a"), ord("z") + 1)]
+    + [str(d) for d in range(10)]
+    + [f"f{i}" for i in range(1, 25)]
+    + ["ctrl", "ctrlleft", "ctrlright", "alt", "altleft", "altright",
+       "shift", "shiftleft", "shiftright", "win", "winleft", "winright", "fn",
+       "enter", "return", "space", " ", "tab", "esc", "escape", "backspace", "delete",
+       "up", "down", "left", "right", "home", "end", "pageup", "pagedown"]
+)
+
+
+class FailSafeException(Exception):
+    pass
+
+
+class FakePyAutoGUI:
+    """pyautogui 的模拟实现 - 每个公开动作先做 FAILSAFE 检查，结束后等待 PAUSE 秒
+
+    释放切换键且修饰键匹配时触发 on_toggle。
+    """
+
+    def __init__(self, toggle_shortcut: Iterable[str] = ("f11",), on_toggle: Optional[Callable[[], None]] = None,
+                 latency: Optional[LatencyModel] = None, mouse_position: Tuple[int, int] = (640, 400)):
+        self.PAUSE = 0.1
+        self.FAILSAFE = True
+        self.toggle_keys = tuple(key.lower() for key in toggle_shortcut)
+        self.on_toggle = on_toggle
+        self.latency = latency if latency is not None else LatencyModel()
+        self.mouse_position = mouse_position
+        self.pressed: Set[str] = set()
+        self.injected: List[Tuple[str, str]] = []  # ("down"/"up", 按键名)
+
+    def isValidKey(self, key: str) -> bool:
+        return key in KEYBOARD_KEYS
+
+    def position(self) -> Tuple[int, int]:
+        self.latency.apply("pyautogui.position")
+        return self.mouse_position
+
+    def _fail_safe_check(self):
+        if self.FAILSAFE and tuple(self.position()) in FAILSAFE_POINTS:
+            raise FailSafeException("鼠标移动到屏幕角落触发了 FAILSAFE")
+
+    def _handle_pause(self, _pause: bool):
+        if _pause and self.PAUSE:
+            self.latency.clock.sleep(self.PAUSE)
+
+    def _key_down(self, key: str):
+        key = key.lower() if len(key) > 1 else key
+        if key not in KEYBOARD_KEYS or not self.latency.apply("pyautogui.key"):
+            return
+        self.injected.append(("down", key))
+        self.pressed.add(key)
+
+    def _key_up(self, key: str):
+        key = key.lower() if len(key) > 1 else key
+        if key not in KEYBOARD_KEYS or not self.latency.apply("pyautogui.key"):
+            return
+        self.injected.append(("up", key))
+        *modifiers, trigger = self.toggle_keys
+        if key == trigger and self.pressed == set(modifiers) | {trigger}:
+            if self.on_toggle:
+                self.on_toggle()
+        self.pressed.discard(key)
+
+    def keyDown(self, key: str, logScreenshot=None, _pause: bool = True):
+        self._fail_safe_check()
+        self._key_down(key)
+        self._handle_pause(_pause)
+
+    def keyUp(self, key: str, logScreenshot=None, _pause: bool = True):
+        self._fail_safe_check()
+        self._key_up(key)
+        self._handle_pause(_pause)
+
+    def press(self, keys, presses: int = 1, interval: float = 0.0, logScreenshot=None, _pause: bool = True):
+        self._fail_safe_check()
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        for _ in range(presses):
+            for key in keys:
+                self._key_down(key)
+                self._key_up(key)
+            if interval:
+                self.latency.clock.sleep(interval)
+        self._handle_pause(_pause)
+
+    def hotkey(self, *keys, interval: float = 0.0, logScreenshot=None, _pause: bool = True):
+        self._fail_safe_check()
+        for key in keys:
+            self._key_down(key)
+            if interval:
+                self.latency.clock.sleep(interval)
+        for key in reversed(keys):
+            self._key_up(key)
+            if interval:
+                self.latency.clock.sleep(interval)
+        self._handle_pause(_pause)
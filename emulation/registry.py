@@ -0,0 +1,226 @@
+"""
+内存注册表 - 与 winreg / win32api 模块接口一致的模拟实现
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .latency import LatencyModel
+
+HKEY_CURRENT_USER = 0x80000001
+HKEY_LOCAL_MACHINE = 0x80000002
+
+KEY_SET_VALUE = 0x0002
+KEY_NOTIFY = 0x0010
+KEY_READ = 0x20019
+KEY_WRITE = 0x20006
+KEY_ALL_ACCESS = 0xF003F
+
+REG_SZ = 1
+REG_DWORD = 4
+
+HWND_BROADCAST = 0xFFFF
+WM_SETTINGCHANGE = 0x001A
+
+
+class FakeKey:
+    """已打开的注册表键句柄"""
+
+    def __init__(self, root: int, path: str, access: int):
+        self.root = root
+        self.path = path
+        self.access = access
+        self.closed = False
+
+    def Close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.Close()
+
+
+def _not_found() -> FileNotFoundError:
+    return FileNotFoundError(2, "系统找不到指定的文件。")
+
+
+class FakeWinreg:
+    """内存注册表 - 可直接作为 RegistryManager 的 winreg_api 使用
+
+    键路径不区分大小写；写入值后会通知 add_change_listener 注册的回调。
+    """
+
+    HKEY_CURRENT_USER = HKEY_CURRENT_USER
+    HKEY_LOCAL_MACHINE = HKEY_LOCAL_MACHINE
+    KEY_SET_VALUE = KEY_SET_VALUE
+    KEY_NOTIFY = KEY_NOTIFY
+    KEY_READ = KEY_READ
+    KEY_WRITE = KEY_WRITE
+    KEY_ALL_ACCESS = KEY_ALL_ACCESS
+    REG_SZ = REG_SZ
+    REG_DWORD = REG_DWORD
+
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        self.latency = latency if latency is not None else LatencyModel()
+        self._keys: Dict[Tuple[int, str], Dict[str, Tuple[Any, int]]] = {}
+        self._listeners: List[Callable[[int, str, str], None]] = []
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return path.strip("\\").lower()
+
+    def _resolve(self, key, sub_key: str) -> Tuple[int, str]:
+        if isinstance(key, FakeKey):
+            path = f"{key.path}\\{sub_key}" if sub_key else key.path
+            return key.root, self._normalize(path)
+        return key, self._normalize(sub_key)
+
+    # ---- 测试辅助方法 ----
+
+    def seed_value(self, root: int, path: str, name: str, value: Any, value_type: int = REG_DWORD,
+                   notify: bool = False):
+        """直接写入值(不注入延迟)，用于准备初始状态；notify=True 时像外部程序写入一样通知回调"""
+        with self._lock:
+            self._keys.setdefault((root, self._normalize(path)), {})[name] = (value, value_type)
+        if notify:
+            self._notify(root, path, name)
+
+    def read_value(self, root: int, path: str, name: str) -> Optional[Any]:
+        """直接读取值，不存在时返回None"""
+        with self._lock:
+            entry = self._keys.get((root, self._normalize(path)), {}).get(name)
+        return entry[0] if entry else None
+
+    def add_change_listener(self, callback: Callable[[int, str, str], None]):
+        """注册值变更回调 callback(root, path, name)"""
+        self._listeners.append(callback)
+
+    def remove_change_listener(self, callback: Callable[[int, str, str], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, root: int, path: str, name: str):
+        for callback in list(self._listeners):
+            callback(root, path, name)
+
+    # ---- winreg 接口 ----
+
+    def OpenKey(self, key, sub_key: str, reserved: int = 0, access: int = KEY_READ) -> FakeKey:
+        if not self.latency.apply("registry.open"):
+            raise PermissionError(5, "拒绝访问。")
+
+        root, path = self._resolve(key, sub_key)
+        with self._lock:
+            if (root, path) not in self._keys:
+                raise _not_found()
+        return FakeKey(root, path, access)
+
+    OpenKeyEx = OpenKey
+
+    def CreateKey(self, key, sub_key: str) -> FakeKey:
+        root, path = self._resolve(key, sub_key)
+        with self._lock:
+            self._keys.setdefault((root, path), {})
+        return FakeKey(root, path, KEY_ALL_ACCESS)
+
+    def QueryValueEx(self, key: FakeKey, value_name: str) -> Tuple[Any, int]:
+        if not self.latency.apply("registry.query"):
+            raise PermissionError(5, "拒绝访问。")
+
+        with self._lock:
+            values = self._keys.get((key.root, key.path))
+            if values is None or value_name not in values:
+                raise _not_found()
+            return values[value_name]
+
+    def SetValueEx(self, key: FakeKey, value_name: str, reserved: int, value_type: int, value: Any):
+        if not key.access & KEY_SET_VALUE or not self.latency.apply("registry.set"):
+            raise PermissionError(5, "拒绝访问。")
+
+        with self._lock:
+            self._keys.setdefault((key.root, key.path), {})[value_name] = (value, value_type)
+        self._notify(key.root, key.path, value_name)
+
+    def DeleteValue(self, key: FakeKey, value_name: str):
+        with self._lock:
+            values = self._keys.get((key.root, key.path))
+            if values is None or value_name not in values:
+                raise _not_found()
+            del values[value_name]
+        self._notify(key.root, key.path, value_name)
+
+    def CloseKey(self, key: FakeKey):
+        key.Close()
+
+
+class FakeWin32Api:
+    """win32api 的模拟实现 - 只支持设置更改广播"""
+
+    def __init__(self, on_setting_change: Optional[Callable[[], None]] = None,
+                 latency: Optional[LatencyModel] = None):
+        self.on_setting_change = on_setting_change
+        self.latency = latency if latency is not None else LatencyModel()
+        self.broadcasts = 0
+
+    def SendMessage(self, hwnd: int, message: int, wparam: int = 0, lparam: int = 0) -> int:
+        if not self.latency.apply("registry.broadcast"):
+            raise OSError(1460, "This operation returned because the timeout period expired.")
+
+        if hwnd == HWND_BROADCAST and message == WM_SETTINGCHANGE:
+            self.broadcasts += 1
+            if self.on_setting_change:
+                self.on_setting_change()
+        return 0
+
+
+class FakeRegistryNotifier:
+    """RegNotifyChangeKeyValue 的模拟 - 实现 registry_watcher 的 notifier 接口
+
+    与真实 API 一样是一次性通知: arm() 之后键下的第一次写入触发通知，之后需要重新 arm()。
+    """
+
+    def __init__(self, winreg: FakeWinreg, key_path: str, root: int = HKEY_CURRENT_USER):
+        self.winreg = winreg
+        self.root = root
+        self.path = FakeWinreg._normalize(key_path)
+        self.arm_count = 0
+        self._armed = False
+        self._changed = threading.Event()
+        self._woken = False
+        self._lock = threading.Lock()
+        winreg.add_change_listener(self._on_change)
+
+    def _on_change(self, root: int, path: str, name: str):
+        if root != self.root or FakeWinreg._normalize(path) != self.path:
+            return
+        with self._lock:
+            if not self._armed:
+                return
+            self._armed = False
+        self._changed.set()
+
+    def arm(self) -> bool:
+        with self._lock:
+            self._armed = True
+            self.arm_count += 1
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._changed.wait(timeout)
+        with self._lock:
+            if self._woken:
+                return False
+            changed = self._changed.is_set()
+            self._changed.clear()
+        return changed
+
+    def wake(self):
+        with self._lock:
+            self._woken = True
+        self._changed.set()
+
+    def close(self):
+        self.winreg.remove_change_listener(self._on_change)
@@ -0,0 +1,38 @@
+"""
+会话事件来源模拟 - 手动触发锁屏/解锁、睡眠/唤醒和显示器开关事件
+"""
+
+from typing import Callable, List, Optional
+
+from session_monitor import SessionEvent
+
+
+class FakeSessionEventSource:
+    """可直接作为 SessionMonitor 的 source 使用，事件在调用线程中同步分发"""
+
+    def __init__(self):
+        self.callback: Optional[Callable[[SessionEvent], None]] = None
+        self.emitted: List[SessionEvent] = []
+
+    def start(self, callback: Callable[[SessionEvent], None]):
+        self.callback = callback
+
+    def stop(self):
+        self.callback = None
+
+    def emit(self, event: SessionEvent):
+        self.emitted.append(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    def lock(self):
+        self.emit(SessionEvent.LOCK)
+
+    def unlock(self):
+        self.emit(SessionEvent.UNLOCK)
+
+    def suspend(self):
+        self.emit(SessionEvent.SUSPEND)
+
+    def resume(self):
+        self.emit(SessionEvent.RESUME)
@@ -0,0 +1,428 @@
+"""
+多台电脑的统计汇总 - 扫描收集到共享目录中的 touchpad_stats_*.json 和 issue_report_*.json
+
+文件用进程池并行解析，结果按内容哈希缓存: 再次运行时大小和修改时间未变的文件直接使用
+缓存，内容相同的文件(例如重复上传)只计一次。解析结果组成 NumPy 列数组，按型号和
+控制方式分组计算分布(分组百分位一次排序完成，不逐组循环):
+
+    按型号      切换延迟、每小时切换次数、禁用时间占比、控制方式失败率、检测到的注册表路径
+    按控制方式  各电脑的 p50/p99 延迟分布、总失败率、被选为首选的电脑数
+
+用法:
+    python touchpad_manager.py aggregate 目录 [目录 ...] [--jobs 8] [--output fleet.json]
+
+需要 numpy (pip install numpy)。
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+FILE_PATTERNS = {
+    "touchpad_stats_*.json": "stats",
+    "issue_report_*.json": "report",
+}
+
+DEFAULT_CACHE_PATH = os.path.join("log", "fleet_aggregate_cache.json")
+CACHE_VERSION = 1
+
+# 少于此数量的待解析文件不启动进程池
+PARALLEL_MIN_FILES = 32
+CHUNK_SIZE = 64
+
+PERCENTILES = (50, 90, 99)
+UNKNOWN = "unknown"
+
+
+# ---- 解析(在子进程中运行) ----
+
+def file_kind(name: str) -> Optional[str]:
+    for pattern, kind in FILE_PATTERNS.items():
+        if fnmatch.fnmatch(name, pattern):
+            return kind
+    return None
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def machine_model(machine: Dict) -> str:
+    """厂商 + 型号，没有 BIOS 信息的旧版本文件为 unknown"""
+    parts = [machine.get("manufacturer"), machine.get("model")]
+    name = " ".join(part for part in parts if part)
+    return name or UNKNOWN
+
+
+def extract_record(data: Dict, kind: str) -> Dict:
+    """从统计文件或问题报告中取出汇总需要的字段"""
+    machine = data.get("machine") or {}
+    backends = data.get("control_backends") or {}
+    record = {
+        "kind": kind,
+        "model": machine_model(machine),
+        "registry_path": machine.get("registry_path"),
+        "preferred": backends.get("preferred"),
+        "toggles_per_hour": None,
+        "duty_cycle": None,
+        "latency_ms": None,
+        "backends": [],
+    }
+    if kind == "stats":
+        record["toggles_per_hour"] = _number(data.get("toggles_per_hour"))
+        record["duty_cycle"] = _number(data.get("duty_cycle"))
+        latency = data.get("toggle_latency_ms") or {}
+        if latency.get("count"):
+            record["latency_ms"] = _number(latency.get("p50"))
+
+    for name, backend in (backends.get("backends") or {}).items():
+        attempts = backend.get("attempts") or 0
+        if not attempts:
+            continue
+        record["backends"].append([
+            name,
+            attempts,
+            backend.get("failures") or 0,
+            _number(backend.get("p50_ms")),
+            _number(backend.get("p99_ms")),
+        ])
+    return record
+
+
+def parse_file(path: str) -> Tuple[str, int, int, Optional[str], Optional[Dict], Optional[str]]:
+    """返回 (路径, 大小, 修改时间ns, 内容哈希, 记录, 错误)"""
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError as e:
+        return path, 0, 0, None, None, str(e)
+
+    digest = hashlib.sha1(content).hexdigest()
+    try:
+        data = json.loads(content.decode("utf-8-sig"))
+        if not isinstance(data, dict):
+            raise ValueError("不是JSON对象")
+        record = extract_record(data, file_kind(os.path.basename(path)))
+    except (ValueError, UnicodeDecodeError, AttributeError, TypeError) as e:
+        return path, stat.st_size, stat.st_mtime_ns, digest, None, str(e)
+    return path, stat.st_size, stat.st_mtime_ns, digest, record, None
+
+
+def parse_files(paths: List[str]) -> list:
+    return [parse_file(path) for path in paths]
+
+
+# ---- 扫描和缓存 ----
+
+def scan(directories: Iterable[str]) -> List[Tuple[str, int, int]]:
+    """递归查找统计文件，返回 (路径, 大小, 修改时间ns)"""
+    found = []
+    for directory in directories:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if file_kind(name) is None:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, stat.st_size, stat.st_mtime_ns))
+    return found
+
+
+class ParseCache:
+    """路径 -> (大小, 修改时间, 哈希) 以及 哈希 -> 解析结果"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.files: Dict[str, list] = {}
+        self.records: Dict[str, Optional[Dict]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_VERSION:
+                    self.files = data.get("files", {})
+                    self.records = data.get("records", {})
+            except (OSError, ValueError):
+                pass
+
+    def lookup(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """文件未变化时返回缓存的哈希"""
+        entry = self.files.get(path)
+        if entry and entry[0] == size and entry[1] == mtime_ns and entry[2] in self.records:
+            return entry[2]
+        return None
+
+    def store(self, path: str, size: int, mtime_ns: int, digest: str, record: Optional[Dict]):
+        self.files[path] = [size, mtime_ns, digest]
+        self.records[digest] = record
+
+    def save(self, live_paths: Iterable[str]):
+        if not self.path:
+            return
+        # 只保留本次仍然存在的文件
+        live_paths = set(live_paths)
+        self.files = {path: entry for path, entry in self.files.items() if path in live_paths}
+        live_hashes = {entry[2] for entry in self.files.values()}
+        self.records = {digest: record for digest, record in self.records.items() if digest in live_hashes}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files, "records": self.records}, f)
+        os.replace(temp_path, self.path)
+
+
+def load_records(directories: Iterable[str], cache: ParseCache, jobs: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """扫描并解析(增量)，返回去重后的记录和扫描统计"""
+    found = scan(directories)
+    digests: Dict[str, str] = {}
+    todo = []
+    for path, size, mtime_ns in found:
+        digest = cache.lookup(path, size, mtime_ns)
+        if digest is None:
+            todo.append(path)
+        else:
+            digests[path] = digest
+
+    errors = []
+    if todo:
+        if jobs == 1 or len(todo) < PARALLEL_MIN_FILES:
+            results = parse_files(todo)
+        else:
+            chunks = [todo[i:i + CHUNK_SIZE] for i in range(0, len(todo), CHUNK_SIZE)]
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = [result for chunk in pool.map(parse_files, chunks) for result in chunk]
+        for path, size, mtime_ns, digest, record, error in results:
+            if error is not None:
+                # 解析失败的文件不缓存，每次运行都重新报告
+                errors.append({"path": path, "error": error})
+                continue
+            cache.store(path, size, mtime_ns, digest, record)
+            digests[path] = digest
+
+    unique = dict.fromkeys(digests.values())
+    records = [cache.records[digest] for digest in unique if cache.records.get(digest) is not None]
+    cache.save(path for path, _, _ in found)
+
+    summary = {
+        "files": len(found),
+        "parsed": len(todo),
+        "cached": len(found) - len(todo),
+        "duplicates": len(digests) - len(unique),
+        "errors": errors,
+    }
+    return records, summary
+
+
+# ---- 列数组和分组统计 ----
+
+def encode(values: List[Optional[str]]) -> Tuple[List[str], "np.ndarray"]:
+    """字符串列 -> (类别列表, 整数编码)"""
+    labels, codes = np.unique(np.array([value or UNKNOWN for value in values], dtype=object).astype(str),
+                              return_inverse=True)
+    return labels.tolist(), codes.astype(np.intp)
+
+
+def build_columns(records: List[Dict]) -> Dict:
+    """记录 -> 列数组(每份文件一行，以及每份文件的每种控制方式一行)"""
+    def floats(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    models, model_codes = encode([record["model"] for record in records])
+    paths, path_codes = encode([record["registry_path"] for record in records])
+
+    rows = [(i, *backend) for i, record in enumerate(records) for backend in record["backends"]]
+    file_index = np.array([row[0] for row in rows], dtype=np.intp)
+    backends, backend_codes = encode([row[1] for row in rows]) if rows else ([], np.zeros(0, dtype=np.intp))
+    preferred = [record["preferred"] for record in records]
+
+    return {
+        "models": models,
+        "model": model_codes,
+        "paths": paths,
+        "path": path_codes,
+        "is_stats": np.array([record["kind"] == "stats" for record in records], dtype=bool),
+        "toggles_per_hour": floats(record["toggles_per_hour"] for record in records),
+        "duty_cycle": floats(record["duty_cycle"] for record in records),
+        "latency_ms": floats(record["latency_ms"] for record in records),
+        "backends": backends,
+        "backend": backend_codes,
+        "backend_model": model_codes[file_index] if rows else np.zeros(0, dtype=np.intp),
+        "backend_preferred": np.array([preferred[row[0]] == row[1] for row in rows], dtype=bool),
+        "attempts": floats(row[2] for row in rows),
+        "failures": floats(row[3] for row in rows),
+        "p50_ms": floats(row[4] for row in rows),
+        "p99_ms": floats(row[5] for row in rows),
+    }
+
+
+def group_distribution(groups: "np.ndarray", values: "np.ndarray", n_groups: int) -> Dict[str, "np.ndarray"]:
+    """按组计算数量、均值和最近秩百分位(忽略 NaN)
+
+    按 (组, 值) 一次排序后，每组的百分位位置由组起点和组大小直接算出。
+    """
+    mask = ~np.isnan(values)
+    groups, values = groups[mask], values[mask]
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    result = {
+        "count": counts,
+        "mean": np.divide(sums, counts, out=np.full(n_groups, np.nan), where=counts > 0),
+    }
+
+    ordered = values[np.lexsort((values, groups))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for q in PERCENTILES:
+        rank = np.maximum(1, np.ceil(q / 100.0 * counts)).astype(np.intp)
+        index = starts + np.minimum(rank, np.maximum(counts, 1)) - 1
+        picked = ordered[np.clip(index, 0, max(len(ordered) - 1, 0))] if len(ordered) else np.zeros(n_groups)
+        result[f"p{q}"] = np.where(counts > 0, picked, np.nan)
+    return result
+
+
+def _distribution_at(distribution: Dict[str, "np.ndarray"], i: int) -> Optional[Dict]:
+    if not distribution["count"][i]:
+        return None
+    return {key: (int(values[i]) if key == "count" else round(float(values[i]), 3))
+            for key, values in distribution.items()}
+
+
+def _rate(failures: float, attempts: float) -> Optional[float]:
+    return round(failures / attempts, 4) if attempts else None
+
+
+def aggregate(columns: Dict) -> Dict:
+    """按型号和控制方式汇总"""
+    models, backends, paths = columns["models"], columns["backends"], columns["paths"]
+    n_models, n_backends = len(models), len(backends)
+
+    toggles = group_distribution(columns["model"], columns["toggles_per_hour"], n_models)
+    duty = group_distribution(columns["model"], columns["duty_cycle"], n_models)
+    latency = group_distribution(columns["model"], columns["latency_ms"], n_models)
+    files = np.bincount(columns["model"], minlength=n_models)
+    stats_files = np.bincount(columns["model"], weights=columns["is_stats"], minlength=n_models)
+
+    attempts = np.nan_to_num(columns["attempts"])
+    failures = np.nan_to_num(columns["failures"])
+    model_attempts = np.bincount(columns["backend_model"], weights=attempts, minlength=n_models)
+    model_failures = np.bincount(columns["backend_model"], weights=failures, minlength=n_models)
+
+    # 型号 x 注册表路径 的文件数
+    path_counts = np.zeros((n_models, len(paths)), dtype=np.int64)
+    np.add.at(path_counts, (columns["model"], columns["path"]), 1)
+
+    by_model = {}
+    for i, model in enumerate(models):
+        by_model[model] = {
+            "files": int(files[i]),
+            "stats_files": int(stats_files[i]),
+            "latency_ms": _distribution_at(latency, i),
+            "toggles_per_hour": _distribution_at(toggles, i),
+            "duty_cycle": _distribution_at(duty, i),
+            "failure_rate": _rate(model_failures[i], model_attempts[i]),
+            "registry_paths": {paths[j]: int(path_counts[i, j]) for j in np.flatnonzero(path_counts[i])},
+        }
+
+    p50 = group_distribution(columns["backend"], columns["p50_ms"], n_backends)
+    p99 = group_distribution(columns["backend"], columns["p99_ms"], n_backends)
+    backend_attempts = np.bincount(columns["backend"], weights=attempts, minlength=n_backends)
+    backend_failures = np.bincount(columns["backend"], weights=failures, minlength=n_backends)
+    backend_files = np.bincount(columns["backend"], minlength=n_backends)
+    preferred = np.bincount(columns["backend"], weights=columns["backend_preferred"], minlength=n_backends)
+
+    by_backend = {}
+    for i, backend in enumerate(backends):
+        by_backend[backend] = {
+            "files": int(backend_files[i]),
+            "preferred": int(preferred[i]),
+            "attempts": int(backend_attempts[i]),
+            "failure_rate": _rate(backend_failures[i], backend_attempts[i]),
+            "p50_ms": _distribution_at(p50, i),
+            "p99_ms": _distribution_at(p99, i),
+        }
+
+    return {"models": by_model, "backends": by_backend}
+
+
+def format_summary(result: Dict) -> str:
+    """汇总结果格式化为文本表格"""
+    def fmt(distribution: Optional[Dict], key: str = "p50") -> str:
+        return f"{distribution[key]:.1f}" if distribution else "-"
+
+    def rate(value: Optional[float]) -> str:
+        return f"{value:.1%}" if value is not None else "-"
+
+    lines = ["按型号:", f"  {'型号':<28} {'文件':>5} {'延迟p50':>8} {'延迟p90':>8} {'切换/时':>8} {'禁用%':>6} {'失败率':>7}  注册表路径"]
+    for model, data in sorted(result["models"].items(), key=lambda item: -item[1]["files"]):
+        top_path = max(data["registry_paths"].items(), key=lambda item: item[1])[0] if data["registry_paths"] else "-"
+        lines.append(f"  {model:<28} {data['files']:>5} {fmt(data['latency_ms']):>8} {fmt(data['latency_ms'], 'p90'):>8} "
+                     f"{fmt(data['toggles_per_hour']):>8} {fmt(data['duty_cycle']):>6} {rate(data['failure_rate']):>7}  {top_path}")
+
+    lines.append("按控制方式:")
+    lines.append(f"  {'控制方式':<14} {'文件':>5} {'首选':>5} {'p50中位':>8} {'p50 p90':>8} {'p99中位':>8} {'失败率':>7}")
+    for backend, data in sorted(result["backends"].items()):
+        lines.append(f"  {backend:<14} {data['files']:>5} {data['preferred']:>5} {fmt(data['p50_ms']):>8} "
+                     f"{fmt(data['p50_ms'], 'p90'):>8} {fmt(data['p99_ms']):>8} {rate(data['failure_rate']):>7}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """aggregate 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="touchpad_manager aggregate",
+        description="汇总多台电脑导出的统计文件和问题报告(按型号和控制方式)"
+    )
+    parser.add_argument("directories", nargs="+", help="包含 touchpad_stats_*.json / issue_report_*.json 的目录")
+    parser.add_argument("--jobs", type=int, help="解析进程数 (默认CPU核数)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="解析缓存文件 (默认 %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="不读取也不保存缓存")
+    parser.add_argument("--output", help="汇总结果JSON文件")
+    args = parser.parse_args(argv)
+
+    if not HAS_NUMPY:
+        print("aggregate 需要 numpy: pip install numpy")
+        return 1
+
+    missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+    if missing:
+        print(f"目录不存在: {', '.join(missing)}")
+        return 1
+
+    started = time.perf_counter()
+    cache = ParseCache(None if args.no_cache else args.cache)
+    records, summary = load_records(args.directories, cache, args.jobs)
+    result = aggregate(build_columns(records)) if records else {"models": {}, "backends": {}}
+
+    print(f"扫描 {summary['files']} 个文件: 解析 {summary['parsed']}，使用缓存 {summary['cached']}，"
+          f"重复 {summary['duplicates']}，错误 {len(summary['errors'])} ({time.perf_counter() - started:.1f}秒)")
+    for error in summary["errors"][:10]:
+        print(f"  {error['path']}: {error['error']}")
+    print(format_summary(result))
+
+    if args.output:
+        result["scan"] = summary
+        try:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            print(f"汇总结果已保存到: {args.output}")
+        except OSError as e:
+            print(f"保存汇总结果失败: {e}")
+            return 1
+    return 0
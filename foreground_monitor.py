@@ -0,0 +1,280 @@
+"""
+前台应用监视 - 根据前台窗口切换事件(而不是轮询)跟踪当前应用
+
+事件来源(source)可以替换为模拟实现(例如 emulation.FakeForegroundEventSource)，接口:
+    start(callback)          开始接收事件，callback(hwnd, pid, fullscreen) 可能在任意线程调用
+    stop()
+    process_name(pid) -> str 进程的可执行文件名，失败返回空字符串
+
+Windows 上使用 Win32ForegroundEventSource: 在独立线程中用 SetWinEventHook 监听
+EVENT_SYSTEM_FOREGROUND，并按窗口和所在显示器的大小判断是否全屏(最大化或带标题栏的
+窗口不算)。前台窗口进入或退出全屏(EVENT_OBJECT_LOCATIONCHANGE)时再次通知同一窗口。
+"""
+
+import ctypes
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+logger = logging.getLogger("touchpad_manager.foreground")
+
+DEFAULT_NAME_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class ForegroundWindow:
+    """前台窗口"""
+    hwnd: int
+    pid: int
+    process_name: str  # 小写的可执行文件名，例如 "code.exe"
+    fullscreen: bool
+
+
+class ForegroundMonitor:
+    """跟踪前台窗口，变化时依次调用 add_listener 注册的 callback(window)
+
+    进程名按 (窗口句柄, PID) 缓存在有界的 LRU 中，同一窗口再次获得焦点时不再查询。
+    进程退出后 PID 可能被新进程复用，新进程的窗口句柄不同，不会读到旧的进程名。
+    """
+
+    def __init__(self, source, cache_size: int = DEFAULT_NAME_CACHE_SIZE):
+        self.source = source
+        self.cache_size = cache_size
+        self.current: Optional[ForegroundWindow] = None
+        self.changes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._names: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self._listeners: List[Callable[[ForegroundWindow], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[ForegroundWindow], None]):
+        self._listeners.append(callback)
+
+    def start(self) -> bool:
+        if self.source is None:
+            return False
+        self.source.start(self.handle_foreground)
+        logger.info("前台应用监视已启动")
+        return True
+
+    def stop(self):
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
+            logger.info("前台应用监视已停止")
+
+    def process_name(self, pid: int, hwnd: int = 0) -> str:
+        """窗口所属进程的进程名(LRU 缓存)"""
+        key = (hwnd, pid)
+        with self._lock:
+            name = self._names.get(key)
+            if name is not None:
+                self._names.move_to_end(key)
+                self.cache_hits += 1
+                return name
+
+        name = (self.source.process_name(pid) if self.source is not None else "").lower()
+        with self._lock:
+            self.cache_misses += 1
+            if name:
+                self._names[key] = name
+                if len(self._names) > self.cache_size:
+                    self._names.popitem(last=False)
+        return name
+
+    def handle_foreground(self, hwnd: int, pid: int, fullscreen: bool):
+        """处理一次前台窗口切换，或前台窗口全屏状态的变化"""
+        window = ForegroundWindow(hwnd, pid, self.process_name(pid, hwnd), fullscreen)
+        with self._lock:
+            previous = self.current
+            if previous is not None and ((previous.pid, previous.process_name, previous.fullscreen) ==
+                                         (window.pid, window.process_name, window.fullscreen)):
+                self.current = window
+                return
+            self.current = window
+            self.changes += 1
+
+        logger.debug(f"前台应用: {window.process_name or window.pid}{' (全屏)' if fullscreen else ''}")
+        for callback in list(self._listeners):
+            try:
+                callback(window)
+            except Exception as e:
+                logger.error(f"处理前台应用变化时出错: {e}")
+
+    def stats(self) -> dict:
+        current = self.current
+        return {
+            "current": current.process_name if current is not None else None,
+            "fullscreen": current.fullscreen if current is not None else False,
+            "changes": self.changes,
+            "name_cache_hits": self.cache_hits,
+            "name_cache_misses": self.cache_misses,
+        }
+
+
+# Windows API 常量
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+OBJID_WINDOW = 0
+GWL_STYLE = -16
+WS_CAPTION = 0x00C00000
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+WM_QUIT = 0x0012
+MONITOR_DEFAULTTONEAREST = 2
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+
+class Win32ForegroundEventSource:
+    """SetWinEventHook(EVENT_SYSTEM_FOREGROUND) 前台窗口切换事件
+
+    EVENT_OBJECT_LOCATIONCHANGE 只处理前台窗口本身，且全屏状态变化时才通知。
+    """
+
+    def __init__(self):
+        self.callback: Optional[Callable[[int, int, bool], None]] = None
+        self._foreground: Tuple[int, bool] = (0, False)  # (前台窗口, 是否全屏)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+
+    def start(self, callback: Callable[[int, int, bool], None]):
+        self.callback = callback
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ForegroundMonitor")
+        self._thread.start()
+        self._ready.wait(timeout=2.0)
+
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def process_name(self, pid: int) -> str:
+        if HAS_PSUTIL:
+            try:
+                return psutil.Process(pid).name()
+            except Exception:
+                return ""
+
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ""
+        try:
+            buffer = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buffer))
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return ""
+            return os.path.basename(buffer.value)
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def _run(self):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        class MONITORINFO(ctypes.Structure):
+            _fields_ = [
+                ("cbSize", wintypes.DWORD),
+                ("rcMonitor", wintypes.RECT),
+                ("rcWork", wintypes.RECT),
+                ("dwFlags", wintypes.DWORD),
+            ]
+
+        WINEVENTPROC = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.MonitorFromWindow.restype = wintypes.HMONITOR
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        shell_windows = {user32.GetDesktopWindow(), user32.GetShellWindow()}
+
+        def is_fullscreen(hwnd) -> bool:
+            if not hwnd or hwnd in shell_windows:
+                return False
+            # 任务栏自动隐藏时最大化窗口也铺满显示器
+            if user32.IsZoomed(hwnd) or (user32.GetWindowLongW(hwnd, GWL_STYLE) & WS_CAPTION) == WS_CAPTION:
+                return False
+            rect = wintypes.RECT()
+            info = MONITORINFO(cbSize=ctypes.sizeof(MONITORINFO))
+            monitor = user32.MonitorFromWindow(hwnd, MONITOR_DEFAULTTONEAREST)
+            if not user32.GetWindowRect(hwnd, ctypes.byref(rect)) or not user32.GetMonitorInfoW(monitor, ctypes.byref(info)):
+                return False
+            screen = info.rcMonitor
+            return (rect.left <= screen.left and rect.top <= screen.top and
+                    rect.right >= screen.right and rect.bottom >= screen.bottom)
+
+        def emit(hwnd):
+            if not hwnd or self.callback is None:
+                return
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            fullscreen = is_fullscreen(hwnd)
+            self._foreground = (hwnd, fullscreen)
+            self.callback(hwnd, pid.value, fullscreen)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, event_time):
+            try:
+                if event == EVENT_OBJECT_LOCATIONCHANGE:
+                    # 光标等子对象的位置变化非常频繁，只看前台窗口本身
+                    if id_object != OBJID_WINDOW or hwnd != self._foreground[0]:
+                        return
+                    if is_fullscreen(hwnd) == self._foreground[1]:
+                        return
+                emit(hwnd)
+            except Exception as e:
+                logger.error(f"处理前台窗口事件时出错: {e}")
+
+        # 回调对象必须在钩子存在期间保持引用
+        proc = WINEVENTPROC(on_event)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, None, proc, 0, 0, flags)
+        location_hook = user32.SetWinEventHook(EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_LOCATIONCHANGE,
+                                               None, proc, 0, 0, flags)
+        self._ready.set()
+        if not hook:
+            logger.error("安装前台窗口事件钩子失败")
+            if location_hook:
+                user32.UnhookWinEvent(location_hook)
+            self._thread_id = 0
+            return
+        if not location_hook:
+            logger.warning("安装窗口位置事件钩子失败，前台窗口切换全屏时不会重新判断")
+
+        try:
+            emit(user32.GetForegroundWindow())
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+            if location_hook:
+                user32.UnhookWinEvent(location_hook)
+            self._thread_id = 0
+
+
+def create_win32_foreground_source():
+    """创建 Windows 前台窗口事件来源，不可用时返回 None"""
+    if not hasattr(ctypes, "windll"):
+        return None
+    return Win32ForegroundEventSource()
@@ -0,0 +1,156 @@
+"""
+切换历史导出 - 将 SQLite 中的切换明细按时间范围流式写入 CSV 或 JSONL
+
+明细通过生成器逐行从数据库读取(每次 fetchmany 一批)并立即写入输出文件，
+内存占用与导出行数无关，可以导出一年以上的历史。输出文件名以 .gz 结尾或指定
+--gzip 时使用 gzip 压缩。
+
+用法:
+    python touchpad_manager.py export [--from 2026-01-01] [--to 2026-01-31] [--format csv|jsonl]
+                                      [--gzip] [--output 文件] [--db touchpad_history.db]
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+FORMATS = ("csv", "jsonl")
+
+COLUMNS = ("time", "timestamp", "enabled", "cause", "backend", "latency_ms", "dwell_seconds")
+
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_time(value: str, end: bool = False) -> float:
+    """解析本地时间；只给日期时 end=True 表示该日结束(次日0点)"""
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end and fmt == "%Y-%m-%d":
+            parsed += timedelta(days=1)
+        return parsed.timestamp()
+    raise ValueError(f"无法解析时间: {value} (格式 YYYY-MM-DD[ HH:MM[:SS]])")
+
+
+def iter_records(rows: Iterable[tuple]) -> Iterator[Tuple]:
+    """transitions 行 -> 导出列(增加本地时间)"""
+    for ts, enabled, cause, backend, latency_ms, dwell_seconds in rows:
+        yield (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)),
+            round(ts, 3),
+            enabled,
+            cause,
+            backend,
+            round(latency_ms, 3) if latency_ms is not None else None,
+            round(dwell_seconds, 3) if dwell_seconds is not None else None,
+        )
+
+
+def open_output(path: str, compress: bool):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_records(records: Iterable[Tuple], f, fmt: str) -> int:
+    """逐行写入，返回行数"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    else:
+        for record in records:
+            f.write(json.dumps(dict(zip(COLUMNS, record)), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def export_history(store, output: str, start: Optional[float] = None, end: Optional[float] = None,
+                   fmt: Optional[str] = None, compress: Optional[bool] = None) -> int:
+    """将 store(HistoryStore) 中 [start, end) 的切换明细导出到 output，返回行数
+
+    fmt 和 compress 为 None 时按文件扩展名判断(.jsonl / .gz)。
+    """
+    name = output[:-3] if output.endswith(".gz") else output
+    if compress is None:
+        compress = output.endswith(".gz")
+    if fmt is None:
+        fmt = "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的格式: {fmt}")
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # 先写入临时文件，完成后再替换，中途失败不会留下不完整的输出
+    temp_path = output + ".part"
+    try:
+        with open_output(temp_path, compress) as f:
+            count = write_records(iter_records(store.iter_transitions(start, end)), f, fmt)
+        os.replace(temp_path, output)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return count
+
+
+def default_output(fmt: str, compress: bool) -> str:
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join("log", f"touchpad_history_{timestamp}.{fmt}{'.gz' if compress else ''}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """export 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="touchpad_manager export",
+        description="按时间范围导出切换历史明细(流式写入，内存占用固定)"
+    )
+    parser.add_argument("--from", dest="start", help="开始时间(本地时间，含)，例如 2026-01-01")
+    parser.add_argument("--to", dest="end", help="结束时间(本地时间，只给日期时包含当天)")
+    parser.add_argument("--format", choices=FORMATS, help="输出格式 (默认按输出文件扩展名，否则 csv)")
+    parser.add_argument("--gzip", action="store_true", help="gzip 压缩输出")
+    parser.add_argument("--output", help="输出文件 (默认 log/touchpad_history_<时间>.csv)")
+    parser.add_argument("--db", help="历史数据库 (默认使用配置文件中的 history.path)")
+    args = parser.parse_args(argv)
+
+    from history_store import HistoryStore, DEFAULT_HISTORY_PATH
+
+    try:
+        start = parse_time(args.start) if args.start else None
+        end = parse_time(args.end, end=True) if args.end else None
+    except ValueError as e:
+        print(e)
+        return 2
+
+    path = args.db
+    if not path:
+        import touchpad_manager as tm
+        path = tm.ConfigManager().get("history.path") or DEFAULT_HISTORY_PATH
+    if not os.path.exists(path):
+        print(f"历史数据库不存在: {path}")
+        return 1
+
+    output = args.output or default_output(args.format or "csv", args.gzip)
+    compress = True if args.gzip else None
+
+    started = time.perf_counter()
+    try:
+        count = export_history(HistoryStore(path), output, start, end, args.format, compress)
+    except Exception as e:
+        print(f"导出切换历史失败: {e}")
+        return 1
+
+    print(f"已导出 {count} 条切换记录到: {output} ({time.perf_counter() - started:.1f}秒)")
+    return 0
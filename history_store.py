@@ -0,0 +1,343 @@
+"""
+切换历史 - 将触控板状态切换持久化到 SQLite (WAL 模式)
+
+记录只在调用线程中追加到内存队列，由后台写入线程按批写入，热路径不访问磁盘。
+每批写入时同一事务内增量更新按小时和按天的汇总表；统计页查询"最近7天"只读取
+汇总表，与历史长度无关。超过保留期的明细和汇总定期删除。
+
+    transitions     每次切换: 时间、是否启用、原因、控制方式、延迟(ms)、禁用时长(秒)
+    rollup_hourly   按小时汇总(键为该小时开始的时间戳)
+    rollup_daily    按本地日期汇总(键为 YYYY-MM-DD)
+"""
+
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger("touchpad_manager.history")
+
+DEFAULT_HISTORY_PATH = os.path.join("log", "touchpad_history.db")
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_ROLLUP_RETENTION_DAYS = 730
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_PENDING = 10000
+PRUNE_INTERVAL = 3600.0
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transitions (
+    ts REAL NOT NULL,
+    enabled INTEGER NOT NULL,
+    cause TEXT NOT NULL,
+    backend TEXT,
+    latency_ms REAL,
+    dwell_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS transitions_ts ON transitions (ts);
+CREATE TABLE IF NOT EXISTS rollup_hourly (
+    hour INTEGER PRIMARY KEY,
+    disables INTEGER NOT NULL DEFAULT 0,
+    enables INTEGER NOT NULL DEFAULT 0,
+    external INTEGER NOT NULL DEFAULT 0,
+    latency_sum_ms REAL NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    disabled_seconds REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    day TEXT PRIMARY KEY,
+    disables INTEGER NOT NULL DEFAULT 0,
+    enables INTEGER NOT NULL DEFAULT 0,
+    external INTEGER NOT NULL DEFAULT 0,
+    latency_sum_ms REAL NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    disabled_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+ROLLUP_COLUMNS = ("disables", "enables", "external", "latency_sum_ms", "latency_count", "disabled_seconds")
+
+
+def _upsert_sql(table: str, key: str) -> str:
+    columns = ", ".join(ROLLUP_COLUMNS)
+    placeholders = ", ".join("?" * (len(ROLLUP_COLUMNS) + 1))
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in ROLLUP_COLUMNS)
+    return (f"INSERT INTO {table} ({key}, {columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {updates}")
+
+
+UPSERT_HOURLY = _upsert_sql("rollup_hourly", "hour")
+UPSERT_DAILY = _upsert_sql("rollup_daily", "day")
+
+
+def day_key(timestamp: float) -> str:
+    """本地日期"""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def hour_key(timestamp: float) -> int:
+    return int(timestamp // 3600) * 3600
+
+
+def _summarize_row(key, disables, enables, external, latency_sum_ms, latency_count, disabled_seconds) -> Dict:
+    return {
+        "key": key,
+        "disables": disables,
+        "enables": enables,
+        "external": external,
+        "avg_latency_ms": round(latency_sum_ms / latency_count, 3) if latency_count else None,
+        "disabled_seconds": round(disabled_seconds, 1),
+    }
+
+
+class HistoryStore:
+    """触控板切换历史(后台批量写入)"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH,
+                 retention_days: float = DEFAULT_RETENTION_DAYS,
+                 rollup_retention_days: float = DEFAULT_ROLLUP_RETENTION_DAYS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.path = path
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._pending = deque(maxlen=max_pending)
+        self._flush_requests: List[threading.Event] = []
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def open(self):
+        """创建数据库并启动写入线程"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._prune(conn, time.time())
+        finally:
+            conn.close()
+
+        self._reader = self._connect(check_same_thread=False)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="HistoryWriter")
+        self._thread.start()
+        logger.info(f"切换历史: {self.path}")
+
+    def close(self):
+        """写入剩余记录并关闭"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    # ---- 写入 ----
+
+    def record(self, timestamp: float, enabled: bool, cause: str, backend: Optional[str] = None,
+               latency: Optional[float] = None, dwell: Optional[float] = None):
+        """追加一次切换(只写内存队列)
+
+        latency 为控制方式耗时(秒)，dwell 为启用时此前处于禁用状态的时长(秒)。
+        """
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((
+            timestamp, 1 if enabled else 0, cause, backend,
+            latency * 1000 if latency is not None else None, dwell
+        ))
+        # 第一条记录唤醒空闲的写入线程开始计时，攒满一批时提前写入
+        pending = len(self._pending)
+        if pending == 1 or pending >= self.batch_size:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        """等待写入的记录数"""
+        return len(self._pending)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前追加的记录全部写入"""
+        if not self._running:
+            return False
+        done = threading.Event()
+        self._flush_requests.append(done)
+        self._wake.set()
+        return done.wait(timeout)
+
+    def _run(self):
+        conn = self._connect()
+        last_prune = time.monotonic()
+        try:
+            while True:
+                # 没有待写记录时一直等待(不定时唤醒)，有记录后最多等待 flush_interval 积攒一批
+                if not self._pending and self._running and not self._flush_requests:
+                    self._wake.wait()
+                    self._wake.clear()
+                if self._running and not self._flush_requests:
+                    self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                running = self._running
+
+                # 先取出等待中的 flush 请求，保证请求之前追加的记录在本批写入
+                requests, self._flush_requests = self._flush_requests, []
+                try:
+                    self._write_batch(conn)
+                    if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                        self._prune(conn, time.time())
+                        last_prune = time.monotonic()
+                except sqlite3.Error as e:
+                    logger.error(f"写入切换历史失败: {e}")
+                for request in requests:
+                    request.set()
+
+                if not running:
+                    break
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection):
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        if not batch:
+            return
+
+        hourly: Dict[int, list] = {}
+        daily: Dict[str, list] = {}
+        for ts, enabled, cause, backend, latency_ms, dwell in batch:
+            for rollups, key in ((hourly, hour_key(ts)), (daily, day_key(ts))):
+                row = rollups.setdefault(key, [0, 0, 0, 0.0, 0, 0.0])
+                if cause == "external":
+                    row[2] += 1
+                elif enabled:
+                    row[1] += 1
+                else:
+                    row[0] += 1
+                if latency_ms is not None:
+                    row[3] += latency_ms
+                    row[4] += 1
+                if dwell:
+                    row[5] += dwell
+
+        with conn:
+            conn.executemany("INSERT INTO transitions VALUES (?, ?, ?, ?, ?, ?)", batch)
+            conn.executemany(UPSERT_HOURLY, [(key, *row) for key, row in hourly.items()])
+            conn.executemany(UPSERT_DAILY, [(key, *row) for key, row in daily.items()])
+        self.written += len(batch)
+        self.batches += 1
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """删除超过保留期的明细和汇总"""
+        cutoff = now - self.retention_days * 86400
+        rollup_cutoff = now - self.rollup_retention_days * 86400
+        with conn:
+            removed = conn.execute("DELETE FROM transitions WHERE ts < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM rollup_hourly WHERE hour < ?", (hour_key(cutoff),))
+            conn.execute("DELETE FROM rollup_daily WHERE day < ?", (day_key(rollup_cutoff),))
+        if removed:
+            logger.info(f"已删除 {removed} 条超过 {self.retention_days:g} 天的切换历史")
+
+    # ---- 查询 ----
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._read_lock:
+            if self._reader is None:
+                return []
+            return self._reader.execute(sql, params).fetchall()
+
+    def query_days(self, days: int = 7, now: Optional[float] = None) -> List[Dict]:
+        """最近 days 天(含今天)的按天汇总，按日期升序"""
+        now = time.time() if now is None else now
+        first_day = day_key(now - (days - 1) * 86400)
+        rows = self._query(
+            f"SELECT day, {', '.join(ROLLUP_COLUMNS)} FROM rollup_daily WHERE day >= ? ORDER BY day",
+            (first_day,)
+        )
+        return [_summarize_row(*row) for row in rows]
+
+    def query_hours(self, hours: int = 24, now: Optional[float] = None) -> List[Dict]:
+        """最近 hours 小时的按小时汇总，按时间升序"""
+        now = time.time() if now is None else now
+        rows = self._query(
+            f"SELECT hour, {', '.join(ROLLUP_COLUMNS)} FROM rollup_hourly WHERE hour >= ? ORDER BY hour",
+            (hour_key(now) - (hours - 1) * 3600,)
+        )
+        return [_summarize_row(*row) for row in rows]
+
+    def iter_transitions(self, start: Optional[float] = None, end: Optional[float] = None,
+                         chunk_size: int = 1000) -> Iterator[tuple]:
+        """按时间顺序逐行产生 [start, end) 内的切换明细，每次只从数据库读取 chunk_size 行
+
+        使用独立的只读连接，不需要 open()，也不阻塞统计页的查询。
+        行格式与 transitions 表相同: (ts, enabled, cause, backend, latency_ms, dwell_seconds)
+        """
+        uri = pathlib.Path(self.path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=5.0)
+        try:
+            cursor = conn.execute(
+                "SELECT ts, enabled, cause, backend, latency_ms, dwell_seconds FROM transitions "
+                "WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start if start is not None else float("-inf"), end if end is not None else float("inf"))
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "written": self.written,
+            "pending": self.pending,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "size_bytes": sum(os.path.getsize(path) for path in (self.path, self.path + "-wal")
+                              if os.path.exists(path)),
+        }
+
+
+def format_days(rows: List[Dict]) -> str:
+    """按天汇总格式化为多行文本(统计页显示)"""
+    if not rows:
+        return "尚无历史记录"
+    lines = []
+    for row in rows:
+        latency = f"{row['avg_latency_ms']:.1f}ms" if row["avg_latency_ms"] is not None else "-"
+        lines.append(f"{row['key']}  禁用 {row['disables']:>4} 次  启用 {row['enables']:>4} 次  "
+                     f"外部 {row['external']:>3} 次  禁用时长 {row['disabled_seconds'] / 60:>6.1f} 分钟  延迟 {latency}")
+    return "\n".join(lines)
@@ -0,0 +1,209 @@
+"""
+键盘钩子看门狗 - 检测被系统静默移除的低级键盘钩子
+
+低级钩子的回调超过 LowLevelHooksTimeout 时，Windows 7 及以后的系统会直接移除钩子且不通知程序:
+pynput 的监听线程仍在运行，但不再收到任何按键，触控板再也不会被自动禁用。
+
+看门狗在每次回调后记录耗时(record_callback)，监控线程定期调用 check() 对比系统输入时间:
+    - 最后一次回调超时，之后系统又有输入但钩子没有收到事件        -> "callback_timeout"
+    - 连续多次检查中系统输入时间更新、期间确实按过键盘，
+      但钩子没有收到事件                                          -> "no_events"
+监听线程退出由 TouchpadManager 直接判断("listener_stopped")。
+系统输入时间也包括滚轮和点击，所以 "no_events" 只在有键盘证据时计数，某次检查没有
+新的输入或没有按键时计数清零。
+
+输入来源(source)可以替换为模拟实现(例如 emulation.FakeInputActivitySource)，接口:
+    idle_ns() -> Optional[int]            距系统最后一次输入(键盘或鼠标)的时间
+    keyboard_input() -> Optional[bool]    自上次调用以来是否按过键盘(不含鼠标按键)，无法判断返回 None
+
+Windows 上使用 Win32InputActivitySource (GetLastInputInfo / GetAsyncKeyState)。
+"""
+
+import ctypes
+import logging
+from collections import deque
+from typing import Any, Dict, Optional
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+logger = logging.getLogger("touchpad_manager.watchdog")
+
+# 未设置 LowLevelHooksTimeout 时使用的钩子超时(秒)
+DEFAULT_HOOK_TIMEOUT = 0.3
+DEFAULT_CHECK_INTERVAL = 2.0
+DEFAULT_SILENT_CHECKS = 3
+
+# GetLastInputInfo 的精度是系统时钟周期，输入时间在最后一次回调之后这么久以内视为同一事件
+INPUT_GRACE_NS = 250_000_000
+
+# GetAsyncKeyState 检查的虚拟键码范围(从退格键开始，跳过鼠标按键)
+VK_FIRST_KEY = 0x08
+VK_LAST_KEY = 0xFE
+
+MAX_INCIDENTS = 20
+
+
+class HookWatchdog:
+    """根据回调耗时和系统输入时间判断键盘钩子是否已被移除"""
+
+    def __init__(self, source=None, hook_timeout: float = DEFAULT_HOOK_TIMEOUT,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL, silent_checks: int = DEFAULT_SILENT_CHECKS,
+                 clock: Optional[Clock] = None):
+        self.source = source
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.hook_timeout = hook_timeout
+        self.timeout_ns = int(hook_timeout * NS_PER_SECOND)
+        self.check_interval_ns = int(check_interval * NS_PER_SECOND)
+        self.silent_checks = silent_checks
+
+        # 回调耗时
+        self.callbacks = 0
+        self.slow_callbacks = 0  # 超过钩子超时的一半
+        self.timeouts = 0
+        self.max_callback_ns = 0
+
+        # 检测状态
+        self.last_event_ns: Optional[int] = None
+        self.last_timed_out = False
+        self.unexplained_inputs = 0
+        self.checks = 0
+        self._last_check_ns: Optional[int] = None
+        self._last_input_ns: Optional[int] = None
+
+        self.recoveries = 0
+        self.incidents = deque(maxlen=MAX_INCIDENTS)
+
+    def reset(self, now_ns: int):
+        """钩子(重新)安装后调用，清除之前的检测状态"""
+        self.last_event_ns = now_ns
+        self.last_timed_out = False
+        self.unexplained_inputs = 0
+        self._last_check_ns = now_ns
+        self._last_input_ns = None
+
+    def record_callback(self, event_ns: int, duration_ns: int):
+        """每次钩子回调结束后调用(钩子线程)"""
+        self.callbacks += 1
+        self.last_event_ns = event_ns
+        self.unexplained_inputs = 0
+        if duration_ns > self.max_callback_ns:
+            self.max_callback_ns = duration_ns
+
+        self.last_timed_out = duration_ns >= self.timeout_ns
+        if self.last_timed_out:
+            self.timeouts += 1
+            logger.warning(f"键盘回调耗时 {duration_ns / 1e6:.0f}ms，超过钩子超时 {self.hook_timeout * 1000:.0f}ms，"
+                           f"系统可能已移除钩子")
+        elif duration_ns * 2 >= self.timeout_ns:
+            self.slow_callbacks += 1
+
+    def check(self, now_ns: int) -> Optional[str]:
+        """监控线程调用(内部按 check_interval 限频)，判断钩子已被移除时返回原因"""
+        if self.source is None or self.last_event_ns is None:
+            return None
+        if self._last_check_ns is not None and now_ns - self._last_check_ns < self.check_interval_ns:
+            return None
+        self._last_check_ns = now_ns
+        self.checks += 1
+
+        try:
+            idle_ns = self.source.idle_ns()
+            # 每次检查都读取，"自上次调用以来"的按键标记才对应一个检查周期
+            keyboard_input = self.source.keyboard_input() if hasattr(self.source, "keyboard_input") else None
+        except Exception as e:
+            logger.debug(f"读取系统输入状态失败: {e}")
+            return None
+        if idle_ns is None:
+            return None
+
+        input_ns = now_ns - idle_ns
+        previous_input_ns = self._last_input_ns
+        self._last_input_ns = input_ns
+
+        # 最后一次回调之后没有新的系统输入
+        if input_ns <= self.last_event_ns + INPUT_GRACE_NS:
+            self.unexplained_inputs = 0
+            return None
+
+        if self.last_timed_out:
+            return "callback_timeout"
+
+        # 系统输入更新且期间按过键盘(滚轮、点击和移动鼠标都不算)，但钩子没有收到事件
+        if previous_input_ns is None or input_ns <= previous_input_ns or not keyboard_input:
+            self.unexplained_inputs = 0
+            return None
+        self.unexplained_inputs += 1
+        if self.unexplained_inputs >= self.silent_checks:
+            return "no_events"
+        return None
+
+    def silent_ns(self, now_ns: int) -> int:
+        """距钩子最后一次收到事件(或安装)的时间"""
+        return now_ns - self.last_event_ns if self.last_event_ns is not None else 0
+
+    def record_incident(self, reason: str, now_ns: int, silent_ns: int, reinstall_seconds: float, recovered: bool):
+        """记录一次钩子失效和重新安装(silent_ns 应在重新安装前读取)"""
+        self.recoveries += 1
+        self.incidents.append({
+            "time": self.clock.to_wall_time(now_ns),
+            "reason": reason,
+            "silent_seconds": round(silent_ns / NS_PER_SECOND, 1),
+            "max_callback_ms": round(self.max_callback_ns / 1e6, 3),
+            "reinstall_ms": round(reinstall_seconds * 1000, 1),
+            "recovered": recovered,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hook_timeout_ms": round(self.hook_timeout * 1000),
+            "input_source": self.source is not None,
+            "callbacks": self.callbacks,
+            "slow_callbacks": self.slow_callbacks,
+            "timeouts": self.timeouts,
+            "max_callback_ms": round(self.max_callback_ns / 1e6, 3),
+            "checks": self.checks,
+            "recoveries": self.recoveries,
+            "incidents": list(self.incidents),
+        }
+
+
+class Win32InputActivitySource:
+    """GetLastInputInfo(键盘和鼠标) + GetAsyncKeyState(只看键盘)
+
+    GetAsyncKeyState 读取系统的异步按键状态，钩子被移除后仍然更新。
+    """
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = wintypes.DWORD
+        self._user32.GetAsyncKeyState.restype = wintypes.SHORT
+        self._info = LASTINPUTINFO()
+        self._info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+
+    def idle_ns(self) -> Optional[int]:
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._info)):
+            return None
+        # 两者都是32位毫秒计数，约49.7天回绕一次
+        idle_ms = (self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF
+        return idle_ms * 1_000_000
+
+    def keyboard_input(self) -> Optional[bool]:
+        # 最高位: 当前按下；最低位: 上次查询后按过。每个键都要查询一遍以清除最低位
+        pressed = False
+        for vk_code in range(VK_FIRST_KEY, VK_LAST_KEY + 1):
+            if self._user32.GetAsyncKeyState(vk_code) & 0x8001:
+                pressed = True
+        return pressed
+
+
+def create_win32_input_source():
+    """创建 Windows 输入活动来源，不可用时返回 None"""
+    if not hasattr(ctypes, "windll"):
+        return None
+    return Win32InputActivitySource()
@@ -9,10 +9,14 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import time
 import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
 
 # 添加当前目录到路径，确保可以导入模块
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from clock import Clock, SYSTEM_CLOCK
+
 try:
     from keyboard_simulator import KeyboardSimulator, PyAutoGUISimulator, get_keyboard_simulator
     HAS_SIMULATOR = True
@@ -20,6 +24,106 @@ except ImportError:
     HAS_SIMULATOR = False
     print("警告: 无法导入键盘模拟器")
 
+# 自动校准: 发送快捷键后等待状态变化的最长时间和轮询间隔(秒)
+CALIBRATION_SETTLE_TIMEOUT = 0.5
+CALIBRATION_POLL_INTERVAL = 0.02
+
+
+@dataclass
+class CalibrationResult:
+    """自动校准结果"""
+    shortcut: Optional[List[str]] = None  # 第一个验证有效的快捷键
+    tested: List[Tuple[List[str], str]] = field(default_factory=list)  # (快捷键, "hit"/"miss"/"send_failed")
+    restored: bool = True  # 撤销后触控板是否恢复到校准前的状态
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+class ShortcutCalibrator:
+    """自动校准 - 发送候选快捷键，通过 RegistryManager 读回触控板状态(注册表或设备管理器)验证效果
+    
+    验证有效后立即再次发送同一快捷键撤销切换，并在第一个有效快捷键处停止。
+    """
+    
+    def __init__(self, simulator, registry_manager, clock: Optional[Clock] = None,
+                 settle_timeout: float = CALIBRATION_SETTLE_TIMEOUT,
+                 poll_interval: float = CALIBRATION_POLL_INTERVAL):
+        self.simulator = simulator
+        self.registry_manager = registry_manager
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+    
+    def read_state(self) -> Optional[bool]:
+        return self.registry_manager.get_touchpad_state()
+    
+    def wait_for_state(self, expected: bool) -> Optional[bool]:
+        """轮询触控板状态，直到等于 expected 或超时，返回最后读到的状态"""
+        deadline = self.clock.monotonic() + self.settle_timeout
+        state = self.read_state()
+        while state != expected and self.clock.monotonic() < deadline:
+            self.clock.sleep(self.poll_interval)
+            state = self.read_state()
+        return state
+    
+    def send(self, keys) -> bool:
+        try:
+            return bool(self.simulator.send_shortcut(list(keys)))
+        except Exception:
+            return False
+    
+    def calibrate(self, candidates,
+                  on_progress: Optional[Callable[[int, List[str], str], None]] = None) -> CalibrationResult:
+        """依次测试候选快捷键，on_progress(序号, 快捷键, 结果) 在每个候选测试后调用"""
+        result = CalibrationResult()
+        start = self.clock.monotonic()
+        
+        baseline = self.read_state()
+        if baseline is None:
+            result.error = "无法读取触控板状态，请使用手动测试"
+            return result
+        
+        for index, keys in enumerate(candidates):
+            keys = list(keys)
+            if not self.send(keys):
+                outcome = "send_failed"
+            elif self.wait_for_state(not baseline) == (not baseline):
+                outcome = "hit"
+                # 立即撤销切换
+                self.send(keys)
+                result.restored = self.wait_for_state(baseline) == baseline
+            else:
+                outcome = "miss"
+                # 状态源可能观察不到这个快捷键的效果(例如只读设备管理器状态时)，
+                # 再发送一次抵消可能发生的切换和其他副作用
+                self.send(keys)
+            
+            result.tested.append((keys, outcome))
+            if on_progress:
+                on_progress(index, keys, outcome)
+            
+            if outcome == "hit":
+                result.shortcut = keys
+                break
+        
+        result.elapsed = self.clock.monotonic() - start
+        return result
+
+
+def save_shortcut_config(shortcut, config_manager=None) -> Optional[str]:
+    """将快捷键合并到用户配置(config/user_config.json)，返回保存的文件路径"""
+    if config_manager is None:
+        from touchpad_manager import ConfigManager
+        config_manager = ConfigManager()
+    
+    config_manager.set("keyboard_shortcut.enabled", True, save=False)
+    config_manager.set("keyboard_shortcut.keys", list(shortcut), save=False)
+    config_manager.set("keyboard_shortcut.display", '+'.join(shortcut).upper(), save=False)
+    if config_manager.save_config():
+        return config_manager.user_config_path
+    return None
+
+
 class ShortcutTester:
     """快捷键测试器"""
     
@@ -71,12 +175,11 @@ class ShortcutTester:
         # 说明文字
         instructions = """使用方法:
 1. 确保您的触控板当前是启用的
-2. 点击"开始测试"按钮
-3. 程序会自动尝试各种快捷键组合
-4. 每次测试后，请观察触控板是否被禁用
-5. 如果触控板被禁用，请点击"是，这个快捷键有效"
-6. 如果触控板没有被禁用，请点击"否，继续测试下一个"
-7. 测试完成后，程序会保存有效的快捷键到配置文件
+2. 点击"自动校准"，程序会读取触控板状态自动验证每个快捷键，
+   找到有效快捷键后立即撤销切换并停止(只需几秒)
+3. 如果无法读取触控板状态，请点击"开始测试"进行手动测试:
+   每次测试后观察触控板是否被禁用，并点击"是"或"否"
+4. 测试完成后，程序会将有效的快捷键合并到用户配置文件
 """
         
         instructions_label = ttk.Label(
@@ -124,6 +227,14 @@ class ShortcutTester:
         )
         self.start_button.pack(side=tk.LEFT, padx=5)
         
+        self.auto_button = ttk.Button(
+            button_frame,
+            text="自动校准",
+            command=self.start_calibration,
+            width=12
+        )
+        self.auto_button.pack(side=tk.LEFT, padx=5)
+        
         self.yes_button = ttk.Button(
             button_frame,
             text="是，这个快捷键有效",
@@ -168,19 +279,89 @@ class ShortcutTester:
         self.log_text.insert(tk.END, log_message)
         self.log_text.see(tk.END)
         
-    def start_testing(self):
-        """开始测试"""
+    def init_simulator(self) -> bool:
+        """初始化键盘模拟器"""
         if not HAS_SIMULATOR:
             messagebox.showerror("错误", "键盘模拟器不可用，请确保已安装依赖")
-            return
+            return False
             
         try:
             self.simulator = get_keyboard_simulator()
             if not self.simulator:
                 messagebox.showerror("错误", "无法初始化键盘模拟器")
-                return
+                return False
         except Exception as e:
             messagebox.showerror("错误", f"初始化键盘模拟器失败:\n{str(e)}")
+            return False
+        return True
+    
+    def start_calibration(self):
+        """开始自动校准"""
+        if not self.init_simulator():
+            return
+        
+        try:
+            from touchpad_manager import RegistryManager
+            registry_manager = RegistryManager()
+        except Exception as e:
+            messagebox.showerror("错误", f"无法读取触控板状态:\n{str(e)}")
+            return
+        
+        self.testing = True
+        self.test_results = []
+        self.start_button.config(state=tk.DISABLED)
+        self.auto_button.config(state=tk.DISABLED)
+        self.current_label.config(text="正在自动校准...")
+        self.progress_var.set(0)
+        self.log("开始自动校准，请不要触碰键盘和触控板...")
+        
+        calibrator = ShortcutCalibrator(self.simulator, registry_manager)
+        
+        def on_progress(index, keys, outcome):
+            self.root.after(0, self.show_calibration_progress, index, keys, outcome)
+        
+        def worker():
+            result = calibrator.calibrate(self.shortcuts_to_test, on_progress)
+            self.root.after(0, self.finish_calibration, result)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def show_calibration_progress(self, index, keys, outcome):
+        """显示校准进度"""
+        shortcut_str = '+'.join(keys).upper()
+        self.progress_var.set(index + 1)
+        self.progress_label.config(text=f"进度: {index + 1}/{len(self.shortcuts_to_test)}")
+        
+        if outcome == "hit":
+            self.log(f"✅ 快捷键有效: {shortcut_str} (已撤销切换)")
+        elif outcome == "send_failed":
+            self.log(f"✗ 发送快捷键失败: {shortcut_str}")
+        else:
+            self.log(f"❌ 快捷键无效: {shortcut_str}")
+    
+    def finish_calibration(self, result):
+        """完成自动校准"""
+        if result.error:
+            self.testing = False
+            self.current_label.config(text="自动校准失败")
+            self.start_button.config(state=tk.NORMAL)
+            self.auto_button.config(state=tk.NORMAL)
+            self.log(f"❌ {result.error}")
+            messagebox.showwarning("自动校准", result.error)
+            return
+        
+        self.log(f"自动校准用时 {result.elapsed:.1f} 秒，测试了 {len(result.tested)} 个快捷键")
+        if not result.restored:
+            self.log("⚠️ 撤销切换后触控板状态未恢复，请检查触控板是否已启用")
+        
+        if result.shortcut:
+            self.test_results = [result.shortcut]
+        self.auto_button.config(state=tk.NORMAL)
+        self.finish_testing()
+    
+    def start_testing(self):
+        """开始测试"""
+        if not self.init_simulator():
             return
             
         self.testing = True
@@ -188,6 +369,7 @@ class ShortcutTester:
         self.test_results = []
         
         self.start_button.config(state=tk.DISABLED)
+        self.auto_button.config(state=tk.DISABLED)
         self.yes_button.config(state=tk.NORMAL)
         self.no_button.config(state=tk.NORMAL)
         
@@ -265,6 +447,7 @@ class ShortcutTester:
         
         self.current_label.config(text="测试完成!")
         self.start_button.config(state=tk.NORMAL)
+        self.auto_button.config(state=tk.NORMAL)
         self.yes_button.config(state=tk.DISABLED)
         self.no_button.config(state=tk.DISABLED)
         
@@ -291,25 +474,13 @@ class ShortcutTester:
             )
             
     def save_to_config(self, shortcut):
-        """保存快捷键到配置文件"""
-        config_path = os.path.join("config", "default_config.json")
-        if not os.path.exists("config"):
-            os.makedirs("config")
-            
-        import json
-        
-        config = {
-            "keyboard_shortcut": {
-                "enabled": True,
-                "keys": shortcut,
-                "display": '+'.join(shortcut).upper()
-            }
-        }
-        
+        """保存快捷键到配置文件(合并到用户配置，不覆盖默认配置)"""
         try:
-            with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            self.log(f"已保存快捷键到配置文件: {config_path}")
+            config_path = save_shortcut_config(shortcut)
+            if config_path:
+                self.log(f"已保存快捷键到配置文件: {config_path}")
+            else:
+                self.log("保存配置文件失败")
         except Exception as e:
             self.log(f"保存配置文件失败: {str(e)}")
             
@@ -2,11 +2,15 @@
 键盘模拟器 - 用于模拟Fn+F11等系统快捷键
 """
 
+import contextlib
 import ctypes
+import logging
 import time
 import threading
 from ctypes import wintypes
 
+logger = logging.getLogger("touchpad_manager.keyboard")
+
 # Windows API 常量
 WM_KEYDOWN = 0x0100
 WM_KEYUP = 0x0101
@@ -19,13 +23,169 @@ VK_SHIFT = 0x10
 VK_F11 = 0x7A
 VK_F6 = 0x75
 VK_FN = 0xFF  # FN键没有标准虚拟键码
+VK_LWIN = 0x5B
+
+# 按键名称(小写) -> 虚拟键码
+VK_CODES = {f"f{i}": 0x6F + i for i in range(1, 25)}
+VK_CODES.update({
+    'control': VK_CONTROL,
+    'ctrl': VK_CONTROL,
+    'alt': VK_MENU,
+    'shift': VK_SHIFT,
+    'windows': VK_LWIN,
+    'win': VK_LWIN,
+})
+
+MODIFIER_KEYS = frozenset(['control', 'ctrl', 'alt', 'shift', 'windows', 'win'])
+
+# SendInput 常量
+INPUT_KEYBOARD = 1
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+EXTENDED_KEYS = frozenset([VK_LWIN])
+
+# 默认按键保持时间(秒)，与旧的 SendMessageW 路径相近；部分厂商的快捷键处理程序会忽略按下后立即释放的按键。
+# 0 表示按下和释放在同一次 SendInput 调用中提交
+DEFAULT_HOLD_TIME = 0.1
+
+# SendInput 注入的按键在 KEYBDINPUT.dwExtraInfo 中带此标记("TPAD")，
+# 本程序的低级键盘钩子据此忽略自己注入的切换快捷键
+INJECTED_EXTRA_INFO = 0x54504144
+
+# 导入Windows API (非Windows平台为None，可通过 user32_api 参数注入模拟实现)
+user32 = ctypes.windll.user32 if hasattr(ctypes, "windll") else None
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),  # ULONG_PTR
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", wintypes.DWORD),
+        ("wParamL", wintypes.WORD),
+        ("wParamH", wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
 
-# 导入Windows API
-user32 = ctypes.windll.user32
+class INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+if user32 is not None:
+    user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+    user32.SendInput.restype = wintypes.UINT
+
+
+def vk_from_key_name(key_name: str) -> int:
+    """将按键名称转换为虚拟键码，未知按键返回0"""
+    return VK_CODES.get(key_name.lower(), 0)
+
+
+class ShortcutPlan:
+    """预编译的快捷键: 按下/释放事件各保存为一个 INPUT 数组"""
+    
+    __slots__ = ("keys", "press", "release", "events")
+    
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        if not self.keys:
+            raise ValueError("快捷键不能为空")
+        
+        vk_codes = []
+        for key in self.keys:
+            vk_code = vk_from_key_name(key)
+            if not vk_code:
+                raise ValueError(f"无法映射的按键: {key}")
+            vk_codes.append(vk_code)
+        
+        # 修饰键按顺序按下，最后一个键按下后先释放，修饰键逆序释放
+        down = [(vk_code, False) for vk_code in vk_codes]
+        up = [(vk_code, True) for vk_code in reversed(vk_codes)]
+        self.press = self._build(down)
+        self.release = self._build(up)
+        self.events = self._build(down + up)
+    
+    @staticmethod
+    def _build(events):
+        inputs = (INPUT * len(events))()
+        for item, (vk_code, keyup) in zip(inputs, events):
+            item.type = INPUT_KEYBOARD
+            item.ki.wVk = vk_code
+            flags = KEYEVENTF_KEYUP if keyup else 0
+            if vk_code in EXTENDED_KEYS:
+                flags |= KEYEVENTF_EXTENDEDKEY
+            item.ki.dwFlags = flags
+            item.ki.dwExtraInfo = INJECTED_EXTRA_INFO
+        return inputs
+
+
+class InputInjector:
+    """通过 SendInput 批量注入按键事件
+    
+    hold_time 为 0 时整组按下/释放事件在一次调用中原子提交；
+    否则分两次提交，中间保持 hold_time 秒。
+    send_input 可替换为模拟实现，签名与 user32.SendInput 一致。
+    """
+    
+    def __init__(self, send_input=None, hold_time: float = DEFAULT_HOLD_TIME):
+        if send_input is None:
+            raise OSError("SendInput 不可用")
+        self.send_input = send_input
+        self.hold_time = max(0.0, hold_time)
+        self._plans = {}
+    
+    def compile(self, keys) -> ShortcutPlan:
+        """编译并缓存快捷键"""
+        key = tuple(keys)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = ShortcutPlan(key)
+        return plan
+    
+    def _submit(self, inputs) -> bool:
+        return self.send_input(len(inputs), inputs, ctypes.sizeof(INPUT)) == len(inputs)
+    
+    def inject(self, plan: ShortcutPlan) -> bool:
+        """注入快捷键，返回所有事件是否都被系统接受"""
+        if self.hold_time <= 0:
+            return self._submit(plan.events)
+        
+        if not self._submit(plan.press):
+            # 尽量释放已按下的键，避免修饰键卡住
+            self._submit(plan.release)
+            return False
+        time.sleep(self.hold_time)
+        return self._submit(plan.release)
 
 class KeyboardSimulator:
     """键盘模拟器 - 用于模拟系统快捷键"""
     
+    # 注入按键的 dwExtraInfo 标记(TouchpadManager 的键盘钩子读取)
+    extra_info = INJECTED_EXTRA_INFO
+    
     # 常见的触控板切换快捷键组合
     TOGGLE_SHORTCUTS = [
         ['F11'],           # F11
@@ -38,52 +198,82 @@ class KeyboardSimulator:
         ['alt', 'F6'],       # Alt+F6
     ]
     
-    def __init__(self):
+    def __init__(self, user32_api=None, send_input=None, hold_time: float = DEFAULT_HOLD_TIME):
+        self.user32 = user32_api if user32_api is not None else user32
+        if self.user32 is None:
+            raise OSError("Windows API 不可用")
+        
+        # SendInput 批量注入; 不可用时回退到逐个 SendMessageW
+        if send_input is None:
+            send_input = getattr(self.user32, "SendInput", None)
+        self.injector = InputInjector(send_input, hold_time) if send_input is not None else None
+        
         self.current_shortcut = None
+        self.current_plan = None
         self.detect_best_shortcut()
     
     def detect_best_shortcut(self):
         """检测最佳的触控板切换快捷键"""
         # 默认使用F11，这在很多联想笔记本上有效
-        self.current_shortcut = ['F11']
-        print(f"使用默认快捷键: {self.current_shortcut}")
+        self.set_shortcut(['F11'])
+        logger.info(f"使用默认快捷键: {self.current_shortcut}")
+    
+    def set_shortcut(self, keys) -> bool:
+        """设置并预编译触控板切换快捷键"""
+        try:
+            plan = self.injector.compile(keys) if self.injector else None
+        except ValueError as e:
+            logger.warning(f"无效的快捷键 {keys}: {e}")
+            return False
+        
+        self.current_shortcut = list(keys)
+        self.current_plan = plan
+        return True
+    
+    def configure(self, keys=None, hold_time=None):
+        """应用配置中的快捷键和按键保持时间"""
+        if hold_time is not None and self.injector:
+            self.injector.hold_time = max(0.0, float(hold_time))
+        if keys:
+            self.set_shortcut(keys)
     
     def vk_from_key_name(self, key_name):
         """将按键名称转换为虚拟键码"""
-        key_map = {
-            'F6': 0x75,
-            'F7': 0x76,
-            'F8': 0x77,
-            'F9': 0x78,
-            'F10': 0x79,
-            'F11': 0x7A,
-            'F12': 0x7B,
-            'control': 0x11,
-            'ctrl': 0x11,
-            'alt': 0x12,
-            'shift': 0x10,
-            'windows': 0x5B,
-        }
-        return key_map.get(key_name.upper(), 0)
+        return vk_from_key_name(key_name)
     
     def send_key(self, vk_code, keydown=True):
         """发送单个按键事件"""
         # 找到活动窗口
-        hwnd = user32.GetForegroundWindow()
+        hwnd = self.user32.GetForegroundWindow()
         
         if keydown:
-            user32.SendMessageW(hwnd, WM_KEYDOWN, vk_code, 0)
+            self.user32.SendMessageW(hwnd, WM_KEYDOWN, vk_code, 0)
         else:
-            user32.SendMessageW(hwnd, WM_KEYUP, vk_code, 0)
+            self.user32.SendMessageW(hwnd, WM_KEYUP, vk_code, 0)
         
         time.sleep(0.05)  # 短暂延迟
     
     def send_shortcut(self, keys):
         """发送快捷键组合"""
+        if self.injector is None:
+            return self.send_shortcut_via_messages(keys)
+        
+        try:
+            plan = self.injector.compile(keys)
+            if not self.injector.inject(plan):
+                logger.error(f"SendInput 未能注入全部按键: {keys}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"发送快捷键失败: {e}")
+            return False
+    
+    def send_shortcut_via_messages(self, keys):
+        """逐个按键发送 WM_KEYDOWN/WM_KEYUP 消息 (SendInput 不可用时的旧方法)"""
         try:
             # 先按下所有修饰键
             for key in keys[:-1]:  # 除了最后一个键都是修饰键
-                if key.lower() in ['control', 'ctrl', 'alt', 'shift', 'windows']:
+                if key.lower() in MODIFIER_KEYS:
                     self.send_key(self.vk_from_key_name(key), True)
             
             # 按下功能键
@@ -95,17 +285,23 @@ class KeyboardSimulator:
             
             # 释放所有修饰键（逆序）
             for key in reversed(keys[:-1]):
-                if key.lower() in ['control', 'ctrl', 'alt', 'shift', 'windows']:
+                if key.lower() in MODIFIER_KEYS:
                     self.send_key(self.vk_from_key_name(key), False)
             
-            print(f"发送快捷键: {keys}")
+            logger.debug(f"发送快捷键: {keys}")
             return True
         except Exception as e:
-            print(f"发送快捷键失败: {e}")
+            logger.error(f"发送快捷键失败: {e}")
             return False
     
     def toggle_touchpad_hotkey(self):
         """发送触控板切换快捷键"""
+        if self.current_plan is not None:
+            try:
+                return self.injector.inject(self.current_plan)
+            except Exception as e:
+                logger.error(f"发送快捷键失败: {e}")
+                return False
         return self.send_shortcut(self.current_shortcut)
 
 # 备用方案：使用pyautogui
@@ -115,10 +311,33 @@ try:
 except ImportError:
     HAS_PYAUTOGUI = False
 
+# 按键名称 -> pyautogui 按键名
+PYAUTOGUI_KEY_ALIASES = {
+    'control': 'ctrl',
+    'windows': 'win',
+}
+
+# PAUSE/FAILSAFE 是 pyautogui 的模块级设置，临时修改时需要互斥
+_pyautogui_settings_lock = threading.Lock()
+
+
 class PyAutoGUISimulator:
-    """使用pyautogui模拟按键"""
+    """使用pyautogui模拟按键
+    
+    low_latency 模式下快捷键预编译为 keyDown/keyUp 序列，发送期间临时关闭
+    pyautogui 的 PAUSE(默认每个动作后等待0.1秒)和 FAILSAFE 检查。
+    pyautogui_module 可替换为模拟实现。
+    """
     
-    def __init__(self):
+    def __init__(self, pyautogui_module=None, low_latency: bool = True, hold_time: float = DEFAULT_HOLD_TIME):
+        if pyautogui_module is None and HAS_PYAUTOGUI:
+            pyautogui_module = pyautogui
+        if pyautogui_module is None:
+            raise OSError("pyautogui 不可用")
+        
+        self.pyautogui = pyautogui_module
+        self.low_latency = low_latency
+        self.hold_time = max(0.0, hold_time)
         self.shortcuts = [
             ['f11'],
             ['f6'],
@@ -128,26 +347,113 @@ class PyAutoGUISimulator:
             ['alt', 'f11'],
             ['alt', 'f6'],
         ]
+        self._sequences = {}
+        self.current_shortcut = None
+        self.current_sequence = None
+        self.set_shortcut(['f11'])
+    
+    def resolve_key(self, key: str) -> str:
+        """将按键名称转换为 pyautogui 按键名"""
+        name = key.lower() if len(key) > 1 else key
+        name = PYAUTOGUI_KEY_ALIASES.get(name, name)
+        if not self.pyautogui.isValidKey(name):
+            raise ValueError(f"无法映射的按键: {key}")
+        return name
+    
+    def compile(self, keys):
+        """编译并缓存快捷键: 返回 (按下序列, 释放序列)"""
+        cache_key = tuple(keys)
+        sequence = self._sequences.get(cache_key)
+        if sequence is None:
+            if not cache_key:
+                raise ValueError("快捷键不能为空")
+            names = [self.resolve_key(key) for key in cache_key]
+            press = tuple((self.pyautogui.keyDown, name) for name in names)
+            release = tuple((self.pyautogui.keyUp, name) for name in reversed(names))
+            sequence = self._sequences[cache_key] = (press, release)
+        return sequence
+    
+    def set_shortcut(self, keys) -> bool:
+        """设置并预编译触控板切换快捷键"""
+        try:
+            sequence = self.compile(keys)
+        except ValueError as e:
+            logger.warning(f"无效的快捷键 {keys}: {e}")
+            return False
+        
+        self.current_shortcut = list(keys)
+        self.current_sequence = sequence
+        return True
+    
+    def configure(self, keys=None, hold_time=None):
+        """应用配置中的快捷键和按键保持时间"""
+        if hold_time is not None:
+            self.hold_time = max(0.0, float(hold_time))
+        if keys:
+            self.set_shortcut(keys)
+    
+    @contextlib.contextmanager
+    def _fast_settings(self):
+        """临时关闭 PAUSE 和 FAILSAFE，退出时恢复原设置"""
+        gui = self.pyautogui
+        with _pyautogui_settings_lock:
+            pause, failsafe = gui.PAUSE, gui.FAILSAFE
+            gui.PAUSE, gui.FAILSAFE = 0, False
+            try:
+                yield
+            finally:
+                gui.PAUSE, gui.FAILSAFE = pause, failsafe
+    
+    def _send_sequence(self, sequence) -> bool:
+        press, release = sequence
+        with self._fast_settings():
+            try:
+                for action, name in press:
+                    action(name, _pause=False)
+                if self.hold_time > 0:
+                    time.sleep(self.hold_time)
+            finally:
+                # 即使按下失败也释放所有键，避免修饰键卡住
+                for action, name in release:
+                    action(name, _pause=False)
+        return True
     
     def send_shortcut(self, keys):
         """发送快捷键"""
+        if self.low_latency:
+            try:
+                return self._send_sequence(self.compile(keys))
+            except Exception as e:
+                logger.error(f"PyAutoGUI发送快捷键失败: {e}")
+                return False
+        
         try:
             # 将按键组合转换为pyautogui格式
             if len(keys) == 1:
-                pyautogui.press(keys[0])
+                self.pyautogui.press(keys[0])
             else:
                 # 构建hotkey字符串
                 modifiers = keys[:-1]
                 key = keys[-1]
                 
                 # pyautogui的hotkey函数
-                pyautogui.hotkey(*modifiers, key)
+                self.pyautogui.hotkey(*modifiers, key)
             
-            print(f"PyAutoGUI发送快捷键: {keys}")
+            logger.debug(f"PyAutoGUI发送快捷键: {keys}")
             return True
         except Exception as e:
-            print(f"PyAutoGUI发送快捷键失败: {e}")
+            logger.error(f"PyAutoGUI发送快捷键失败: {e}")
             return False
+    
+    def toggle_touchpad_hotkey(self):
+        """发送触控板切换快捷键"""
+        if self.low_latency and self.current_sequence is not None:
+            try:
+                return self._send_sequence(self.current_sequence)
+            except Exception as e:
+                logger.error(f"PyAutoGUI发送快捷键失败: {e}")
+                return False
+        return self.send_shortcut(self.current_shortcut)
 
 def get_keyboard_simulator():
     """获取键盘模拟器实例"""
@@ -155,12 +461,12 @@ def get_keyboard_simulator():
         # 先尝试Windows API方法
         return KeyboardSimulator()
     except Exception as e:
-        print(f"Windows API键盘模拟器初始化失败: {e}")
+        logger.warning(f"Windows API键盘模拟器初始化失败: {e}")
         
         # 回退到pyautogui
         if HAS_PYAUTOGUI:
-            print("使用PyAutoGUI作为备选")
+            logger.info("使用PyAutoGUI作为备选")
             return PyAutoGUISimulator()
         else:
-            print("警告: 没有可用的键盘模拟器")
+            logger.warning("没有可用的键盘模拟器")
             return None
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+日志去重过滤器 - 合并热路径上反复出现的相同日志
+
+按"消息模板 + 调用位置"计算指纹(消息中的数字、十六进制值和引号内容视为变量)。
+同一指纹在 summary_interval 秒内只输出第一条，之后被抑制的条目在下一次出现时
+合并为一条"重复 N 次"的摘要；flush() 输出所有尚未输出的摘要。
+"""
+
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+DEFAULT_SUMMARY_INTERVAL = 60.0
+DEFAULT_MAX_FINGERPRINTS = 1024
+
+_VARIABLE_PATTERNS = (
+    re.compile(r"0x[0-9a-fA-F]+"),
+    re.compile(r"'[^']*'|\"[^\"]*\""),
+    re.compile(r"\d+(?:\.\d+)?"),
+)
+
+
+def message_template(message: str) -> str:
+    """将消息中的变量部分替换为占位符"""
+    for pattern in _VARIABLE_PATTERNS:
+        message = pattern.sub("#", message)
+    return message
+
+
+class _Entry:
+    __slots__ = ("window_start_ns", "suppressed", "total_suppressed", "last_message")
+
+    def __init__(self, now_ns: int):
+        self.window_start_ns = now_ns
+        self.suppressed = 0
+        self.total_suppressed = 0
+        self.last_message = ""
+
+
+class DedupFilter(logging.Filter):
+    """重复日志去重/限速过滤器
+
+    同一个实例可以挂在多个处理器上，每条记录只判断一次。
+    只处理 min_level 及以上级别的日志(默认只合并警告和错误，正常的状态日志照常输出)。
+    """
+
+    def __init__(self, summary_interval: float = DEFAULT_SUMMARY_INTERVAL,
+                 min_level: int = logging.WARNING,
+                 max_fingerprints: int = DEFAULT_MAX_FINGERPRINTS,
+                 clock: Optional[Clock] = None):
+        super().__init__()
+        self.summary_interval = summary_interval
+        self.min_level = min_level
+        self.max_fingerprints = max_fingerprints
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.entries: Dict[Tuple, _Entry] = {}
+        self.suppressed_total = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(record: logging.LogRecord) -> Tuple:
+        return (record.name, record.levelno, record.pathname, record.lineno,
+                message_template(record.getMessage()))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, "_dedup_allowed", None)
+        if decision is not None:
+            return decision
+
+        allowed = self._check(record)
+        record._dedup_allowed = allowed
+        return allowed
+
+    def _check(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.summary_interval <= 0:
+            return True
+
+        key = self.fingerprint(record)
+        now_ns = self.clock.monotonic_ns()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_fingerprints:
+                    self._evict()
+                self.entries[key] = _Entry(now_ns)
+                return True
+
+            if now_ns - entry.window_start_ns < self.summary_interval * NS_PER_SECOND:
+                entry.suppressed += 1
+                entry.total_suppressed += 1
+                entry.last_message = record.getMessage()
+                self.suppressed_total += 1
+                return False
+
+            # 窗口结束: 输出本条，并附带上一个窗口的重复次数
+            suppressed = entry.suppressed
+            entry.window_start_ns = now_ns
+            entry.suppressed = 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (重复 {suppressed} 次)"
+            record.args = None
+        return True
+
+    def _evict(self):
+        # 丢弃最早开始窗口且没有待输出摘要的指纹
+        idle = [key for key, entry in self.entries.items() if not entry.suppressed]
+        victims = idle or list(self.entries)
+        oldest = min(victims, key=lambda key: self.entries[key].window_start_ns)
+        del self.entries[oldest]
+
+    def flush(self, logger: logging.Logger):
+        """输出所有尚未输出的重复摘要(例如程序退出前)"""
+        with self._lock:
+            pending = [(key, entry.suppressed, entry.last_message)
+                       for key, entry in self.entries.items() if entry.suppressed]
+            for key, _, _ in pending:
+                self.entries[key].suppressed = 0
+
+        for (name, levelno, _, _, _), count, message in pending:
+            record = logger.makeRecord(name, levelno, "(dedup)", 0,
+                                       f"{message} (重复 {count} 次)", None, None)
+            record._dedup_allowed = True
+            logger.handle(record)
+
+    def stats(self, top: int = 10) -> Dict:
+        """抑制计数"""
+        with self._lock:
+            ranked: List[Tuple[int, Tuple]] = sorted(
+                ((entry.total_suppressed, key) for key, entry in self.entries.items() if entry.total_suppressed),
+                reverse=True
+            )
+            return {
+                "suppressed_total": self.suppressed_total,
+                "fingerprints": len(self.entries),
+                "top": [
+                    {"logger": key[0], "level": logging.getLevelName(key[1]),
+                     "location": f"{key[2]}:{key[3]}", "template": key[4], "suppressed": count}
+                    for count, key in ranked[:top]
+                ],
+            }
@@ -0,0 +1,311 @@
+"""
+本地指标端点 - 以 Prometheus 文本格式提供 TouchpadManager 的计数器和直方图
+
+只监听回环地址，默认关闭(config 中 metrics.enabled)。服务器是单个后台线程:
+非阻塞套接字加 selectors，没有请求时一直阻塞在 select 上，不定时唤醒；
+指标只在收到 GET /metrics 时从管理器现有的统计中读取生成。
+
+    curl http://127.0.0.1:9464/metrics
+"""
+
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+logger = logging.getLogger("touchpad_manager.metrics")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+MAX_REQUEST_BYTES = 8192
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 直方图每 4 个对数桶(即每 2 倍)输出一个 le 边界
+HISTOGRAM_STEP = 4
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    """按 Prometheus 文本格式(0.0.4)拼接指标"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def _header(self, name: str, help_text: str, metric_type: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Optional[Dict], float]]):
+        self._header(name, help_text, "counter")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Optional[Dict], float]]):
+        self._header(name, help_text, "gauge")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def histogram(self, name: str, help_text: str, histograms: Iterable[Tuple[Optional[Dict], object]]):
+        """histograms 为 (标签, LatencyHistogram)；累计计数按 HISTOGRAM_STEP 个桶合并"""
+        self._header(name, help_text, "histogram")
+        for labels, histogram in histograms:
+            labels = labels or {}
+            counts = list(histogram.counts)
+            cumulative = 0
+            for index, count in enumerate(counts):
+                cumulative += count
+                if index % HISTOGRAM_STEP == HISTOGRAM_STEP - 1 and index < len(counts) - 1:
+                    le = f"{histogram.bucket_upper(index):.6g}"
+                    self.lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+            self.lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {cumulative}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_value(histogram.total)}")
+            self.lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def collect_metrics(manager) -> str:
+    """从 TouchpadManager 的现有统计生成指标文本"""
+    writer = MetricsWriter()
+    stats = manager.stats
+
+    writer.counter("touchpad_keystrokes_total", "Keystrokes seen by the keyboard hook", [(None, stats.keystrokes)])
+    writer.counter("touchpad_toggles_total", "Touchpad state changes made by this program", [
+        ({"state": "disabled"}, stats.disabled_count),
+        ({"state": "enabled"}, stats.enabled_count),
+    ])
+    writer.histogram("touchpad_toggle_latency_seconds", "set_touchpad backend call duration",
+                     [(None, stats.toggle_latency)])
+    writer.histogram("touchpad_hook_callback_seconds", "Keyboard hook callback duration (measured while the hook watchdog or metrics are on)",
+                     [(None, manager.hook_callback_latency)])
+
+    selector = getattr(manager.registry_manager, "backend_selector", None)
+    if selector is not None:
+        backends = list(selector.stats.items())
+        writer.counter("touchpad_backend_calls_total", "Backend actuations by result", [
+            sample for name, backend in backends for sample in (
+                ({"backend": name, "result": "success"}, backend.successes),
+                ({"backend": name, "result": "failure"}, backend.failures),
+            )
+        ])
+        writer.histogram("touchpad_backend_latency_seconds", "Successful backend actuation duration",
+                         [({"backend": name}, backend.latency) for name, backend in backends])
+
+    writer.counter("touchpad_monitor_wakeups_total", "Activity monitor loop wakeups", [(None, manager.monitor_wakeups)])
+    if manager.session_monitor is not None:
+        session = manager.session_monitor.stats()
+        writer.gauge("touchpad_wakeups_saved_per_hour", "Timer wakeups avoided while locked or asleep",
+                     [(None, session["wakeups_saved_per_hour"])])
+
+    history = manager.history
+    writer.gauge("touchpad_history_pending", "Transitions waiting for the history writer",
+                 [(None, history.pending if history is not None else 0)])
+    if history is not None:
+        writer.counter("touchpad_history_written_total", "Transitions written to the history database",
+                       [(None, history.written)])
+        writer.counter("touchpad_history_dropped_total", "Transitions dropped because the history queue was full",
+                       [(None, history.dropped)])
+
+    writer.gauge("touchpad_enabled", "1 if the touchpad is enabled", [(None, 1 if manager.touchpad_state.value == "enabled" else 0)])
+    writer.gauge("touchpad_monitoring", "1 while monitoring is running", [(None, 1 if manager.is_monitoring else 0)])
+    writer.gauge("touchpad_hook_paused", "1 while the keyboard hook is unloaded for a game or fullscreen app",
+                 [(None, 1 if manager.hook_paused_for else 0)])
+    writer.counter("touchpad_hook_pauses_total", "Keyboard hook unloads for games or fullscreen apps",
+                   [(None, manager.hook_pause_count)])
+    watchdog = manager.hook_watchdog
+    writer.counter("touchpad_hook_recoveries_total", "Keyboard hooks reinstalled after the system silently removed them",
+                   [(None, watchdog.recoveries if watchdog is not None else 0)])
+
+    if HAS_PSUTIL:
+        try:
+            process = psutil.Process(os.getpid())
+            with process.oneshot():
+                rss = process.memory_info().rss
+                threads = process.num_threads()
+                cpu = process.cpu_times()
+            writer.gauge("process_resident_memory_bytes", "Resident set size", [(None, rss)])
+            writer.counter("process_cpu_seconds_total", "User and system CPU time", [(None, cpu.user + cpu.system)])
+        except Exception:
+            threads = threading.active_count()
+    else:
+        threads = threading.active_count()
+    writer.gauge("process_threads", "Number of threads", [(None, threads)])
+
+    return writer.text()
+
+
+class _Connection:
+    __slots__ = ("sock", "inbound", "outbound")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbound = b""
+        self.outbound = b""
+
+
+class MetricsServer:
+    """回环地址上的极简 HTTP 服务器(单线程、非阻塞)"""
+
+    def __init__(self, collect: Callable[[], str], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        if host not in LOOPBACK_HOSTS:
+            logger.warning(f"指标端点只允许回环地址，忽略 {host}")
+            host = DEFAULT_HOST
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self.requests = 0
+
+        self._listener: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @property
+    def address(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            listener.bind((self.host, self.port))
+            listener.listen(8)
+        except OSError:
+            listener.close()
+            raise
+        listener.setblocking(False)
+        self.port = listener.getsockname()[1]
+
+        self._listener = listener
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(listener, selectors.EVENT_READ, None)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="MetricsServer")
+        self._thread.start()
+        logger.info(f"指标端点: {self.address}")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self._wake_w.send(b"x")
+        except OSError:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self):
+        selector = self._selector
+        try:
+            while self._running:
+                for key, events in selector.select():
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    elif key.fileobj is self._wake_r:
+                        try:
+                            self._wake_r.recv(64)
+                        except OSError:
+                            pass
+                    else:
+                        self._service(key.data, events)
+        except Exception as e:
+            logger.error(f"指标端点出错: {e}")
+        finally:
+            for key in list(selector.get_map().values()):
+                try:
+                    key.fileobj.close()
+                except OSError:
+                    pass
+            selector.close()
+            self._wake_w.close()
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        self._selector.register(sock, selectors.EVENT_READ, _Connection(sock))
+
+    def _close(self, connection: _Connection):
+        try:
+            self._selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        connection.sock.close()
+
+    def _service(self, connection: _Connection, events: int):
+        try:
+            if events & selectors.EVENT_READ and not connection.outbound:
+                data = connection.sock.recv(4096)
+                if not data:
+                    self._close(connection)
+                    return
+                connection.inbound += data
+                if b"\r\n\r\n" not in connection.inbound:
+                    if len(connection.inbound) > MAX_REQUEST_BYTES:
+                        self._close(connection)
+                    return
+                connection.outbound = self._respond(connection.inbound)
+                self._selector.modify(connection.sock, selectors.EVENT_WRITE, connection)
+
+            if events & selectors.EVENT_WRITE or connection.outbound:
+                sent = connection.sock.send(connection.outbound)
+                connection.outbound = connection.outbound[sent:]
+                if not connection.outbound:
+                    self._close(connection)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._close(connection)
+
+    def _respond(self, request: bytes) -> bytes:
+        line = request.split(b"\r\n", 1)[0].decode("latin-1", "replace").split()
+        method, path = (line[0], line[1]) if len(line) >= 2 else ("", "")
+        if method not in ("GET", "HEAD") or path.split("?", 1)[0] not in ("/metrics", "/"):
+            status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+        else:
+            self.requests += 1
+            try:
+                status, body, content_type = "200 OK", self.collect().encode("utf-8"), CONTENT_TYPE
+            except Exception as e:
+                logger.error(f"生成指标失败: {e}")
+                status, body, content_type = "500 Internal Server Error", b"error\n", "text/plain"
+
+        header = (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                  f"Connection: close\r\nDate: {time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime())}\r\n\r\n")
+        return header.encode("latin-1") + (body if method != "HEAD" else b"")
@@ -0,0 +1,158 @@
+"""
+应用配置(profiles) - 按前台应用的可执行文件名使用不同的空闲阈值和行为
+
+配置示例(config 中的 profiles 节):
+    "profiles": {
+        "code.exe": {"idle_threshold": 1.5},
+        "excel.exe": {"idle_threshold": 8.0},
+        "mspaint.exe": {"auto_disable": false}
+    }
+
+前台应用只在焦点切换时解析一次，(PID, 进程名) -> Profile 保存在有界的 LRU 中
+(进程退出后 PID 可能被新进程复用，所以键中包含进程名)；按键和空闲检查只读取当前 Profile 的属性。
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+logger = logging.getLogger("touchpad_manager.profiles")
+
+DEFAULT_PROFILE = "default"
+DEFAULT_CACHE_SIZE = 128
+
+
+class Profile:
+    """单个应用的设置和统计
+
+    idle_threshold 为 None 时使用全局空闲阈值；auto_disable 为 False 时打字不禁用触控板。
+    """
+
+    __slots__ = ("name", "idle_threshold", "auto_disable",
+                 "keypresses", "disabled_count", "enabled_count", "focus_ns")
+
+    def __init__(self, name: str, idle_threshold: Optional[float] = None, auto_disable: bool = True):
+        self.name = name
+        self.idle_threshold = idle_threshold
+        self.auto_disable = auto_disable
+        self.keypresses = 0
+        self.disabled_count = 0
+        self.enabled_count = 0
+        self.focus_ns = 0
+
+    @classmethod
+    def from_config(cls, name: str, data: Dict) -> "Profile":
+        threshold = data.get("idle_threshold")
+        return cls(
+            name,
+            float(threshold) if threshold is not None else None,
+            bool(data.get("auto_disable", True))
+        )
+
+    def snapshot(self) -> Dict:
+        return {
+            "idle_threshold": self.idle_threshold,
+            "auto_disable": self.auto_disable,
+            "keypresses": self.keypresses,
+            "disabled_count": self.disabled_count,
+            "enabled_count": self.enabled_count,
+            "focus_seconds": round(self.focus_ns / NS_PER_SECOND, 1),
+        }
+
+
+class ProfileManager:
+    """按可执行文件名匹配应用配置"""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict]] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, clock: Optional[Clock] = None):
+        self.cache_size = cache_size
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.default = Profile(DEFAULT_PROFILE)
+        self.profiles: Dict[str, Profile] = {}
+        self.active = self.default
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._cache: "OrderedDict[Tuple[int, str], Profile]" = OrderedDict()
+        self._active_since_ns = self.clock.monotonic_ns()
+        self._lock = threading.Lock()
+        self.configure(profiles or {})
+
+    def configure(self, profiles: Dict[str, Dict]):
+        """应用 profiles 配置；同名应用保留已有统计"""
+        updated = {}
+        for name, data in profiles.items():
+            key = name.lower()
+            if key == DEFAULT_PROFILE or not isinstance(data, dict):
+                continue
+            profile = Profile.from_config(key, data)
+            previous = self.profiles.get(key)
+            if previous is not None:
+                for field in ("keypresses", "disabled_count", "enabled_count", "focus_ns"):
+                    setattr(profile, field, getattr(previous, field))
+            updated[key] = profile
+
+        with self._lock:
+            self.profiles = updated
+            self._cache.clear()
+            if self.active is not self.default:
+                self.active = updated.get(self.active.name, self.default)
+        if updated:
+            logger.info(f"加载应用配置: {', '.join(sorted(updated))}")
+
+    def resolve(self, pid: int, process_name: str) -> Profile:
+        """进程对应的应用配置(LRU 缓存)"""
+        key = (pid, process_name.lower())
+        with self._lock:
+            profile = self._cache.get(key)
+            if profile is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return profile
+
+            self.cache_misses += 1
+            profile = self.profiles.get(key[1], self.default)
+            self._cache[key] = profile
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return profile
+
+    def activate(self, pid: int, process_name: str) -> Profile:
+        """前台应用切换: 解析配置并累计上一个配置的前台时间"""
+        profile = self.resolve(pid, process_name)
+        now_ns = self.clock.monotonic_ns()
+        with self._lock:
+            self.active.focus_ns += now_ns - self._active_since_ns
+            self._active_since_ns = now_ns
+            previous, self.active = self.active, profile
+
+        if profile is not previous:
+            logger.debug(f"应用配置: {profile.name}")
+        return profile
+
+    def reset_stats(self):
+        """清零各配置的统计"""
+        with self._lock:
+            for profile in [self.default] + list(self.profiles.values()):
+                profile.keypresses = profile.disabled_count = profile.enabled_count = profile.focus_ns = 0
+            self._active_since_ns = self.clock.monotonic_ns()
+
+    def stats(self) -> Dict:
+        """各配置的统计(包括 default)"""
+        with self._lock:
+            now_ns = self.clock.monotonic_ns()
+            result = {}
+            for profile in [self.default] + list(self.profiles.values()):
+                data = profile.snapshot()
+                if profile is self.active:
+                    data["focus_seconds"] = round((profile.focus_ns + now_ns - self._active_since_ns) / NS_PER_SECOND, 1)
+                result[profile.name] = data
+            return {
+                "active": self.active.name,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "profiles": result,
+            }
@@ -0,0 +1,197 @@
+"""
+注册表变更监视 - 检测笔记本 Fn 键或其他工具在外部切换触控板
+
+优先使用 RegNotifyChangeKeyValue 等待注册表键变化(无轮询)；通知不可用时
+退回自适应间隔轮询: 状态变化后立即恢复最短间隔，状态不变时间隔逐步加倍。
+等待原语(notifier)可以替换为模拟实现，例如 emulation.FakeRegistryNotifier。
+
+notifier 接口:
+    arm() -> bool            登记一次变更通知(每次通知后需要重新登记)
+    wait(timeout) -> bool    等待通知，timeout 为 None 表示一直等待；收到通知返回 True
+    wake()                   唤醒 wait (用于停止)
+    close()
+"""
+
+import ctypes
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger("touchpad_manager.watcher")
+
+DEFAULT_MIN_POLL_INTERVAL = 0.5
+DEFAULT_MAX_POLL_INTERVAL = 30.0
+
+# Windows API 常量
+HKEY_CURRENT_USER = 0x80000001
+KEY_NOTIFY = 0x0010
+REG_NOTIFY_CHANGE_LAST_SET = 0x00000004
+WAIT_OBJECT_0 = 0x00000000
+INFINITE = 0xFFFFFFFF
+
+
+class Win32RegistryNotifier:
+    """基于 RegNotifyChangeKeyValue + WaitForMultipleObjects 的注册表变更通知"""
+
+    def __init__(self, key_path: str, root: int = HKEY_CURRENT_USER):
+        from ctypes import wintypes
+
+        self.advapi32 = ctypes.windll.advapi32
+        self.kernel32 = ctypes.windll.kernel32
+        self.kernel32.CreateEventW.restype = wintypes.HANDLE
+
+        self._hkey = wintypes.HKEY()
+        result = self.advapi32.RegOpenKeyExW(wintypes.HKEY(root), key_path, 0, KEY_NOTIFY, ctypes.byref(self._hkey))
+        if result != 0:
+            raise OSError(f"无法打开注册表键 {key_path}: 错误码 {result}")
+
+        # 自动复位的变更事件 + 手动复位的停止事件
+        self._change_event = self.kernel32.CreateEventW(None, False, False, None)
+        self._stop_event = self.kernel32.CreateEventW(None, True, False, None)
+        self._handles = (wintypes.HANDLE * 2)(self._change_event, self._stop_event)
+
+    def arm(self) -> bool:
+        result = self.advapi32.RegNotifyChangeKeyValue(
+            self._hkey, False, REG_NOTIFY_CHANGE_LAST_SET, self._change_event, True
+        )
+        return result == 0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        milliseconds = INFINITE if timeout is None else int(timeout * 1000)
+        return self.kernel32.WaitForMultipleObjects(2, self._handles, False, milliseconds) == WAIT_OBJECT_0
+
+    def wake(self):
+        self.kernel32.SetEvent(self._stop_event)
+
+    def close(self):
+        self.advapi32.RegCloseKey(self._hkey)
+        self.kernel32.CloseHandle(self._change_event)
+        self.kernel32.CloseHandle(self._stop_event)
+
+
+def create_win32_notifier(key_path: str):
+    """创建 Windows 注册表通知，不可用时返回 None"""
+    if not hasattr(ctypes, "windll"):
+        return None
+    try:
+        return Win32RegistryNotifier(key_path)
+    except Exception as e:
+        logger.warning(f"注册表变更通知不可用: {e}")
+        return None
+
+
+class RegistryWatcher:
+    """监视触控板注册表值，状态变化时调用 on_change(enabled)
+
+    read_state 返回注册表中的触控板状态(True/False)，读取失败返回 None。
+    """
+
+    def __init__(self, read_state: Callable[[], Optional[bool]],
+                 on_change: Callable[[bool], None],
+                 notifier=None,
+                 min_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_POLL_INTERVAL):
+        self.read_state = read_state
+        self.on_change = on_change
+        self.notifier = notifier
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+
+        self.last_state: Optional[bool] = None
+        self.poll_interval = min_interval
+        self.notifications = 0
+        self.polls = 0
+        self.changes = 0
+
+        self._running = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return "notify" if self.notifier is not None else "poll"
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self.last_state = self.read_state()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="RegistryWatcher")
+        self._thread.start()
+        logger.info(f"注册表监视已启动 ({'变更通知' if self.notifier is not None else '自适应轮询'})")
+
+    def stop(self, timeout: float = 2.0):
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        if self.notifier is not None:
+            self.notifier.wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+        logger.info("注册表监视已停止")
+
+    def check(self) -> bool:
+        """读取一次状态，变化时通知，返回是否变化"""
+        state = self.read_state()
+        if state is None or state == self.last_state:
+            return False
+        self.last_state = state
+        self.changes += 1
+        try:
+            self.on_change(state)
+        except Exception as e:
+            logger.error(f"处理注册表变化时出错: {e}")
+        return True
+
+    def _run(self):
+        try:
+            if self.notifier is not None:
+                if self._run_notify():
+                    return
+                self.notifier.close()
+                self.notifier = None
+            self._run_poll()
+        except Exception as e:
+            logger.error(f"注册表监视线程错误: {e}")
+
+    def _run_notify(self) -> bool:
+        """等待变更通知；登记失败时返回 False 以退回轮询"""
+        while self._running:
+            # 先登记通知再读取，登记之后的变化都会触发通知
+            if not self.notifier.arm():
+                logger.warning("注册表变更通知登记失败，改为轮询")
+                return False
+            self.check()
+            if self.notifier.wait(None) and self._running:
+                self.notifications += 1
+        return True
+
+    def _run_poll(self):
+        while self._running:
+            if self._stop_event.wait(self.poll_interval):
+                break
+            self.poll()
+
+    def poll(self) -> bool:
+        """轮询一次: 状态变化后恢复最短间隔，不变时间隔加倍(不超过 max_interval)"""
+        self.polls += 1
+        changed = self.check()
+        if changed:
+            self.poll_interval = self.min_interval
+        else:
+            self.poll_interval = min(self.poll_interval * 2, self.max_interval)
+        return changed
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "changes": self.changes,
+            "notifications": self.notifications,
+            "polls": self.polls,
+            "poll_interval": self.poll_interval,
+        }
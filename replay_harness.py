@@ -0,0 +1,257 @@
+"""
+按键轨迹回放工具 - 在虚拟时钟上确定性地驱动 TouchpadManager
+
+回放时 TouchpadManager.on_key_press 和空闲检查(check_idle)在虚拟时间上运行，
+触控板控制替换为只记录调用的假后端，因此可以在 Linux 上无界面运行。
+
+用法:
+    python touchpad_manager.py replay trace.tpt [--speed 1000] [--idle 5] [--output timeline.csv]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+from clock import Clock, VirtualClock
+
+DEFAULT_SPEED = 1000.0
+
+
+class RecordingBackend:
+    """假控制后端 - 接受所有状态设置并记录时间线"""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.enabled = True
+        self.calls: List[Tuple[float, bool]] = []
+
+    def set_touchpad_state(self, enable: bool) -> bool:
+        self.calls.append((self.clock.monotonic(), enable))
+        self.enabled = enable
+        return True
+
+    def get_touchpad_state(self) -> Optional[bool]:
+        return self.enabled
+
+
+class ReplayDriver:
+    """在虚拟时钟上驱动 TouchpadManager: 按监控周期执行 check_idle，并在指定时间注入按键"""
+
+    def __init__(self, manager, clock: VirtualClock, speed: float = 0.0):
+        self.manager = manager
+        self.clock = clock
+        self.speed = speed
+        self.interval = manager.MONITOR_INTERVAL
+        self.ticks = 0
+        self.next_tick = clock.monotonic() + self.interval
+
+    def start(self):
+        """让管理器进入监控状态(不启动真实的监听器和线程)"""
+        import touchpad_manager as tm
+
+        manager = self.manager
+        start_ns = self.clock.monotonic_ns()
+        manager.touchpad_state = tm.TouchpadState.ENABLED
+        manager.last_activity_ns = start_ns
+        manager.last_idle_enable_ns = start_ns
+        manager.session_start_ns = start_ns
+        manager.stats.start_session(start_ns)
+        manager.is_monitoring = True
+        self.next_tick = self.clock.monotonic() + self.interval
+
+    def stop(self):
+        self.manager.is_monitoring = False
+        self.manager.stats.end_session()
+        self.manager.session_start_ns = None
+
+    def _pace(self, target: float):
+        # 按倍速等待真实时间，然后推进虚拟时钟
+        now = self.clock.monotonic()
+        if self.speed > 0 and target > now:
+            time.sleep((target - now) / self.speed)
+        self.clock.advance_to(target)
+
+    def run_until(self, deadline: float):
+        """运行监控周期直到虚拟时间 deadline(秒)"""
+        while self.next_tick <= deadline:
+            self._pace(self.next_tick)
+            self.manager.check_idle()
+            self.ticks += 1
+            self.next_tick = self.clock.monotonic() + self.interval
+        self._pace(deadline)
+
+    def key_press(self, timestamp: float, key=None):
+        """在虚拟时间 timestamp(秒) 注入一次按键"""
+        self.run_until(timestamp)
+        self.manager.on_key_press(key)
+
+    def settle(self):
+        """最后一次按键后继续运行，直到触控板应当已重新启用"""
+        config = self.manager.config_manager
+        delay = config.get("compatibility.delay_before_enable", 0.2)
+        settle = max(self.manager.idle_threshold, config.get("compatibility.min_disable_time", 0.5))
+        self.run_until(self.clock.monotonic() + settle + delay + 2 * self.interval)
+
+
+def create_manager(registry_manager, clock: VirtualClock,
+                   idle_threshold: Optional[float] = None,
+                   min_disable_time: Optional[float] = None,
+                   delay_before_enable: Optional[float] = None):
+    """创建用于回放的 TouchpadManager (关闭声音，参数只在内存中覆盖)"""
+    import touchpad_manager as tm
+
+    manager = tm.TouchpadManager(registry_manager=registry_manager, clock=clock)
+    config = manager.config_manager
+    config.set("enable_sounds", False, save=False)
+    if idle_threshold is not None:
+        manager.idle_threshold = idle_threshold
+    if min_disable_time is not None:
+        config.set("compatibility.min_disable_time", min_disable_time, save=False)
+    if delay_before_enable is not None:
+        config.set("compatibility.delay_before_enable", delay_before_enable, save=False)
+    return manager
+
+
+@dataclass
+class ReplayResult:
+    """回放结果"""
+    timeline: List[Tuple[float, bool]] = field(default_factory=list)  # (相对时间秒, 是否启用)
+    events: int = 0
+    duration: float = 0.0
+    disabled_time: float = 0.0
+    wall_time: float = 0.0
+
+    @property
+    def actuations(self) -> int:
+        return len(self.timeline)
+
+    def summary(self) -> dict:
+        return {
+            "events": self.events,
+            "duration": round(self.duration, 3),
+            "actuations": self.actuations,
+            "disabled_time": round(self.disabled_time, 3),
+            "wall_time": round(self.wall_time, 3),
+        }
+
+
+def replay(timestamps_ns: Iterable[int],
+           idle_threshold: Optional[float] = None,
+           min_disable_time: Optional[float] = None,
+           delay_before_enable: Optional[float] = None,
+           speed: float = DEFAULT_SPEED) -> ReplayResult:
+    """回放按键时间戳，返回触控板动作时间线
+
+    speed 为相对真实时间的倍速(默认1000倍)，0 表示不限速。
+    """
+    import touchpad_manager as tm
+
+    timestamps = [t / 1e9 for t in timestamps_ns]
+    result = ReplayResult(events=len(timestamps))
+    if not timestamps:
+        return result
+
+    origin = timestamps[0]
+    clock = VirtualClock(start_ns=int((origin - 1.0) * 1e9))
+    backend = RecordingBackend(clock)
+    real_start = time.perf_counter()
+    quiet_level = tm.logger.level
+    tm.logger.setLevel(logging.WARNING)
+
+    try:
+        manager = create_manager(backend, clock, idle_threshold, min_disable_time, delay_before_enable)
+        driver = ReplayDriver(manager, clock, speed)
+        driver.start()
+
+        for timestamp in timestamps:
+            driver.key_press(timestamp)
+
+        # 最后一次按键后继续运行，直到触控板重新启用
+        driver.settle()
+        driver.stop()
+    finally:
+        tm.logger.setLevel(quiet_level)
+
+    result.wall_time = time.perf_counter() - real_start
+    result.timeline = [(t - origin, enable) for t, enable in backend.calls]
+    result.duration = timestamps[-1] - origin
+
+    disabled_since = None
+    for t, enable in result.timeline:
+        if not enable and disabled_since is None:
+            disabled_since = t
+        elif enable and disabled_since is not None:
+            result.disabled_time += t - disabled_since
+            disabled_since = None
+
+    return result
+
+
+def write_timeline(result: ReplayResult, path: str):
+    """写出动作时间线: .json 或 .csv"""
+    if path.lower().endswith(".json"):
+        data = {
+            "summary": result.summary(),
+            "timeline": [{"t": round(t, 6), "state": "enabled" if enable else "disabled"}
+                         for t, enable in result.timeline],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["t", "state"])
+            for t, enable in result.timeline:
+                writer.writerow([f"{t:.6f}", "enabled" if enable else "disabled"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """replay 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="touchpad_manager replay",
+        description="在虚拟时钟上回放按键轨迹，输出触控板动作时间线"
+    )
+    parser.add_argument("trace", help="trace_recorder 记录的轨迹文件(.tpt)")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED, help="回放倍速，0为不限速 (默认 %(default)s)")
+    parser.add_argument("--idle", type=float, help="idle_threshold (默认使用配置文件)")
+    parser.add_argument("--min-disable", type=float, help="min_disable_time (默认使用配置文件)")
+    parser.add_argument("--delay", type=float, help="delay_before_enable (默认使用配置文件)")
+    parser.add_argument("--output", help="时间线输出文件(.csv/.json)")
+    args = parser.parse_args(argv)
+
+    from trace_recorder import iter_trace
+
+    try:
+        timestamps = [timestamp for timestamp, _ in iter_trace(args.trace)]
+    except Exception as e:
+        print(f"加载轨迹失败 {args.trace}: {e}")
+        return 1
+
+    result = replay(timestamps, args.idle, args.min_disable, args.delay, args.speed)
+
+    print(f"回放 {result.events} 个按键事件, 轨迹时长 {result.duration:.1f}秒, 耗时 {result.wall_time:.2f}秒")
+    print(f"触控板动作 {result.actuations} 次, 禁用时间 {result.disabled_time:.1f}秒")
+
+    if args.output:
+        try:
+            write_timeline(result, args.output)
+            print(f"时间线已保存到: {args.output}")
+        except Exception as e:
+            print(f"保存时间线失败: {e}")
+            return 1
+    else:
+        for t, enable in result.timeline[:20]:
+            print(f"  {t:10.3f}s  {'启用' if enable else '禁用'}")
+        if result.actuations > 20:
+            print(f"  ... 共 {result.actuations} 条")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
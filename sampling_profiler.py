@@ -0,0 +1,206 @@
+"""
+采样分析器 - 在用户电脑上诊断 CPU 占用，不需要安装额外工具
+
+后台线程按固定间隔读取 sys._current_frames()，统计所有线程(ActivityMonitor、pynput 监听器、
+Tk 主线程等)的调用栈，停止时写入折叠栈格式(collapsed stacks)，每行:
+
+    线程名;外层函数;...;内层函数 次数
+
+可直接用 flamegraph.pl、speedscope 或 https://www.speedscope.app 生成火焰图。
+采样的是墙上时间: 阻塞在等待(sleep、Event.wait、消息循环)中的线程也会出现，看 CPU 时查看忙碌线程的栈。
+
+开销有上限: 采样间隔不小于 MIN_INTERVAL；单次采样耗时超过间隔的 MAX_OVERHEAD 时间隔加倍
+(最大 MAX_INTERVAL)；不同调用栈数量和栈深度有上限；超过 max_seconds 自动停止并写入文件。
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("touchpad_manager.profiler")
+
+DEFAULT_INTERVAL = 0.01
+MIN_INTERVAL = 0.002
+MAX_INTERVAL = 0.5
+MAX_OVERHEAD = 0.05  # 采样耗时占采样间隔的上限
+DEFAULT_MAX_SECONDS = 300.0
+DEFAULT_MAX_STACKS = 5000
+MAX_DEPTH = 64
+
+OTHER_STACK = ("[其他调用栈]",)
+
+
+def frame_label(code) -> str:
+    """折叠栈中的函数名: 文件名:函数名"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """对所有线程的调用栈定时采样"""
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, max_seconds: float = DEFAULT_MAX_SECONDS,
+                 max_stacks: int = DEFAULT_MAX_STACKS):
+        self.path = path
+        self.interval = min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+        self.max_seconds = max_seconds
+        self.max_stacks = max_stacks
+
+        self.samples = 0
+        self.dropped = 0  # 超过 max_stacks 后合并到 OTHER_STACK 的样本
+        self.sample_seconds = 0.0  # 采样本身消耗的时间
+        self.started: Optional[float] = None
+        self.stopped: Optional[float] = None
+        self.written = 0
+
+        # (线程名, 代码对象元组) -> 次数；写入时才转换为文本
+        self._counts: Counter = Counter()
+        self._labels: Dict[Any, str] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 采样线程停止时和诊断报告可能同时写入同一文件
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SamplingProfiler")
+        self._thread.start()
+        logger.info(f"采样分析已开始，间隔 {self.interval * 1000:.0f}ms，最长 {self.max_seconds:.0f}秒")
+
+    def stop(self) -> Optional[str]:
+        """停止采样并写入文件，返回文件路径"""
+        thread = self._thread
+        if thread is None:
+            return None
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        return self.path
+
+    def _refresh_thread_names(self):
+        names = {}
+        for thread in threading.enumerate():
+            name = thread.name
+            if name.startswith("Thread-") and type(thread) is not threading.Thread:
+                # pynput 等库的线程只有默认名称，用类名区分
+                name = f"{type(thread).__module__.split('.')[0]}.{type(thread).__name__}"
+            names[thread.ident] = name
+        self._thread_names = names
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + self.max_seconds
+        overhead_warned = False
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                if start >= deadline:
+                    logger.info(f"采样已达到最长时间 {self.max_seconds:.0f}秒，自动停止")
+                    break
+                self.sample(own_ident)
+                cost = time.perf_counter() - start
+                self.sample_seconds += cost
+
+                if cost > self.interval * MAX_OVERHEAD and self.interval < MAX_INTERVAL:
+                    self.interval = min(self.interval * 2, MAX_INTERVAL)
+                    if not overhead_warned:
+                        overhead_warned = True
+                        logger.info(f"单次采样耗时 {cost * 1000:.2f}ms，采样间隔调整为 {self.interval * 1000:.0f}ms")
+                self._stop.wait(self.interval)
+        except Exception as e:
+            logger.error(f"采样分析出错: {e}")
+        finally:
+            self.stopped = time.time()
+            try:
+                self.write(self.path)
+            except Exception as e:
+                logger.error(f"写入采样结果失败: {e}")
+
+    def sample(self, exclude_ident: Optional[int] = None):
+        """对除 exclude_ident 以外的所有线程采样一次"""
+        frames = sys._current_frames()
+        if self.samples % 100 == 0 or any(ident not in self._thread_names for ident in frames):
+            self._refresh_thread_names()
+
+        stacks = []
+        for ident, frame in frames.items():
+            if ident == exclude_ident:
+                continue
+            codes = []
+            while frame is not None and len(codes) < MAX_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            stacks.append((self._thread_names.get(ident, f"thread-{ident}"), tuple(codes)))
+        del frames
+
+        with self._lock:
+            self.samples += 1
+            counts = self._counts
+            for key in stacks:
+                if key in counts or len(counts) < self.max_stacks:
+                    counts[key] += 1
+                else:
+                    self.dropped += 1
+                    counts[(key[0], OTHER_STACK)] += 1
+
+    def _label(self, code) -> str:
+        if isinstance(code, str):
+            return code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = frame_label(code)
+        return label
+
+    def collapsed(self) -> Counter:
+        """转换为折叠栈文本 -> 次数(不同代码对象可能得到相同文本，合并计数)"""
+        with self._lock:
+            items = list(self._counts.items())
+        result = Counter()
+        for (thread_name, codes), count in items:
+            line = ";".join([thread_name.replace(";", ":")] + [self._label(code) for code in codes])
+            result[line.replace(" ", "_")] += count
+        return result
+
+    def write(self, path: str) -> int:
+        """写入折叠栈文件(按次数降序)，返回行数(可在任意线程调用)"""
+        with self._write_lock:
+            stacks = self.collapsed()
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = path + ".part"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for line, count in stacks.most_common():
+                    f.write(f"{line} {count}\n")
+            os.replace(temp_path, path)
+            self.written = len(stacks)
+        logger.info(f"已写入 {self.samples} 次采样({len(stacks)} 个调用栈): {path}")
+        return len(stacks)
+
+    def top_stacks(self, limit: int = 20) -> Dict[str, int]:
+        """出现次数最多的调用栈"""
+        return dict(self.collapsed().most_common(limit))
+
+    def stats(self) -> Dict[str, Any]:
+        end = self.stopped if self.stopped is not None else time.time()
+        elapsed = end - self.started if self.started is not None else 0.0
+        return {
+            "path": self.path,
+            "running": self.running,
+            "seconds": round(elapsed, 1),
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 1),
+            "overhead_percent": round(self.sample_seconds / elapsed * 100, 2) if elapsed > 0 else 0.0,
+            "stacks": len(self._counts),
+            "dropped_samples": self.dropped,
+        }
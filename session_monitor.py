@@ -0,0 +1,305 @@
+"""
+会话状态监视 - 锁屏、关闭显示器或睡眠时暂停键盘钩子和定时器
+
+事件来源(source)可以替换为模拟实现(例如 emulation.FakeSessionEventSource)，接口:
+    start(callback)   开始接收事件，callback(SessionEvent) 可能在任意线程调用
+    stop()
+
+Windows 上使用 Win32SessionEventSource: 在独立线程中创建隐藏窗口，接收
+WM_WTSSESSION_CHANGE(锁屏/解锁)和 WM_POWERBROADCAST(睡眠/唤醒/显示器开关)。
+"""
+
+import ctypes
+import logging
+import threading
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+logger = logging.getLogger("touchpad_manager.session")
+
+
+class SessionEvent(Enum):
+    """会话/电源事件"""
+    LOCK = "lock"
+    UNLOCK = "unlock"
+    SUSPEND = "suspend"
+    RESUME = "resume"
+    DISPLAY_OFF = "display_off"
+    DISPLAY_ON = "display_on"
+
+
+class SessionMonitor:
+    """跟踪会话是否处于活动状态(未锁屏、未睡眠、显示器开启)
+
+    状态变化时依次调用 add_listener 注册的 callback(active, event)。
+    register_timer 登记的周期性定时器在暂停期间不运行，用于统计节省的唤醒次数。
+    """
+
+    def __init__(self, source=None, pause_on_display_off: bool = True, clock: Optional[Clock] = None):
+        self.source = source
+        self.pause_on_display_off = pause_on_display_off
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+
+        self.locked = False
+        self.suspended = False
+        self.display_off = False
+        self.pause_count = 0
+        self.events = 0
+
+        self._listeners: List[Callable[[bool, SessionEvent], None]] = []
+        self._timers: Dict[str, float] = {}
+        self._started_ns = self.clock.monotonic_ns()
+        self._paused_since_ns: Optional[int] = None
+        self._paused_ns = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return not (self.locked or self.suspended or (self.display_off and self.pause_on_display_off))
+
+    def add_listener(self, callback: Callable[[bool, SessionEvent], None]):
+        self._listeners.append(callback)
+
+    def register_timer(self, name: str, interval: float):
+        """登记一个暂停期间停止的周期性定时器(秒)"""
+        self._timers[name] = interval
+
+    def start(self) -> bool:
+        if self.source is None:
+            return False
+        self._started_ns = self.clock.monotonic_ns()
+        self.source.start(self.handle_event)
+        logger.info("会话状态监视已启动")
+        return True
+
+    def stop(self):
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
+            logger.info("会话状态监视已停止")
+
+    def handle_event(self, event: SessionEvent):
+        """处理一个会话事件，活动状态变化时通知监听者"""
+        with self._lock:
+            self.events += 1
+            was_active = self.active
+            if event in (SessionEvent.LOCK, SessionEvent.UNLOCK):
+                self.locked = event == SessionEvent.LOCK
+            elif event in (SessionEvent.SUSPEND, SessionEvent.RESUME):
+                self.suspended = event == SessionEvent.SUSPEND
+            else:
+                self.display_off = event == SessionEvent.DISPLAY_OFF
+
+            active = self.active
+            if active == was_active:
+                return
+
+            now_ns = self.clock.monotonic_ns()
+            if active:
+                paused_ns = now_ns - self._paused_since_ns
+                self._paused_ns += paused_ns
+                self._paused_since_ns = None
+            else:
+                self.pause_count += 1
+                self._paused_since_ns = now_ns
+
+        if active:
+            logger.info(f"会话恢复({event.value})，暂停了 {paused_ns / NS_PER_SECOND:.0f} 秒，"
+                        f"节省约 {self._wakeups(paused_ns):.0f} 次定时器唤醒")
+        else:
+            logger.info(f"会话暂停({event.value})，暂停键盘钩子和定时器")
+
+        for callback in list(self._listeners):
+            try:
+                callback(active, event)
+            except Exception as e:
+                logger.error(f"处理会话状态变化时出错: {e}")
+
+    def _wakeups(self, paused_ns: int) -> float:
+        seconds = paused_ns / NS_PER_SECOND
+        return sum(seconds / interval for interval in self._timers.values() if interval > 0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now_ns = self.clock.monotonic_ns()
+            paused_ns = self._paused_ns
+            if self._paused_since_ns is not None:
+                paused_ns += now_ns - self._paused_since_ns
+            elapsed_hours = max(now_ns - self._started_ns, 1) / NS_PER_SECOND / 3600
+
+        wakeups = self._wakeups(paused_ns)
+        return {
+            "active": self.active,
+            "pause_count": self.pause_count,
+            "paused_seconds": round(paused_ns / NS_PER_SECOND, 1),
+            "wakeups_saved": int(wakeups),
+            "wakeups_saved_per_hour": round(wakeups / elapsed_hours, 1),
+            "timers": dict(self._timers),
+        }
+
+
+# Windows 消息常量
+WM_DESTROY = 0x0002
+WM_CLOSE = 0x0010
+WM_POWERBROADCAST = 0x0218
+WM_WTSSESSION_CHANGE = 0x02B1
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+NOTIFY_FOR_THIS_SESSION = 0
+PBT_APMSUSPEND = 0x0004
+PBT_APMRESUMESUSPEND = 0x0007
+PBT_APMRESUMEAUTOMATIC = 0x0012
+PBT_POWERSETTINGCHANGE = 0x8013
+DEVICE_NOTIFY_WINDOW_HANDLE = 0
+
+POWER_EVENTS = {
+    PBT_APMSUSPEND: SessionEvent.SUSPEND,
+    PBT_APMRESUMESUSPEND: SessionEvent.RESUME,
+    PBT_APMRESUMEAUTOMATIC: SessionEvent.RESUME,
+}
+
+
+class Win32SessionEventSource:
+    """通过隐藏窗口接收锁屏/电源通知
+
+    WM_POWERBROADCAST 只发送给顶层窗口，所以使用不显示的顶层窗口而不是消息窗口。
+    """
+
+    CLASS_NAME = "TouchpadManagerSessionMonitor"
+
+    def __init__(self):
+        self.callback: Optional[Callable[[SessionEvent], None]] = None
+        self.hwnd = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self, callback: Callable[[SessionEvent], None]):
+        self.callback = callback
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SessionMonitor")
+        self._thread.start()
+        self._ready.wait(timeout=2.0)
+
+    def stop(self):
+        if self.hwnd:
+            ctypes.windll.user32.PostMessageW(self.hwnd, WM_CLOSE, 0, 0)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _emit(self, event: SessionEvent):
+        if self.callback is not None:
+            self.callback(event)
+
+    def _run(self):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        wtsapi32 = ctypes.windll.wtsapi32
+
+        LRESULT = wintypes.LPARAM
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [
+                ("style", wintypes.UINT),
+                ("lpfnWndProc", WNDPROC),
+                ("cbClsExtra", ctypes.c_int),
+                ("cbWndExtra", ctypes.c_int),
+                ("hInstance", wintypes.HINSTANCE),
+                ("hIcon", wintypes.HICON),
+                ("hCursor", wintypes.HANDLE),
+                ("hbrBackground", wintypes.HBRUSH),
+                ("lpszMenuName", wintypes.LPCWSTR),
+                ("lpszClassName", wintypes.LPCWSTR),
+            ]
+
+        class GUID(ctypes.Structure):
+            _fields_ = [
+                ("Data1", wintypes.DWORD),
+                ("Data2", wintypes.WORD),
+                ("Data3", wintypes.WORD),
+                ("Data4", ctypes.c_ubyte * 8),
+            ]
+
+        class POWERBROADCAST_SETTING(ctypes.Structure):
+            _fields_ = [
+                ("PowerSetting", GUID),
+                ("DataLength", wintypes.DWORD),
+                ("Data", ctypes.c_ubyte * 1),
+            ]
+
+        # GUID_CONSOLE_DISPLAY_STATE {6FE69556-704A-47A0-8F24-C28D936FDA47}: 0=关闭 1=开启 2=变暗
+        display_state_guid = GUID(0x6FE69556, 0x704A, 0x47A0,
+                                  (ctypes.c_ubyte * 8)(0x8F, 0x24, 0xC2, 0x8D, 0x93, 0x6F, 0xDA, 0x47))
+
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = LRESULT
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.RegisterPowerSettingNotification.restype = wintypes.HANDLE
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        power_notify = None
+
+        def window_proc(hwnd, msg, wparam, lparam):
+            try:
+                if msg == WM_WTSSESSION_CHANGE:
+                    if wparam == WTS_SESSION_LOCK:
+                        self._emit(SessionEvent.LOCK)
+                    elif wparam == WTS_SESSION_UNLOCK:
+                        self._emit(SessionEvent.UNLOCK)
+                elif msg == WM_POWERBROADCAST:
+                    if wparam in POWER_EVENTS:
+                        self._emit(POWER_EVENTS[wparam])
+                    elif wparam == PBT_POWERSETTINGCHANGE and lparam:
+                        setting = ctypes.cast(lparam, ctypes.POINTER(POWERBROADCAST_SETTING)).contents
+                        self._emit(SessionEvent.DISPLAY_OFF if setting.Data[0] == 0 else SessionEvent.DISPLAY_ON)
+                    return 1
+                elif msg == WM_DESTROY:
+                    wtsapi32.WTSUnRegisterSessionNotification(hwnd)
+                    if power_notify:
+                        user32.UnregisterPowerSettingNotification(power_notify)
+                    user32.PostQuitMessage(0)
+                    return 0
+            except Exception as e:
+                logger.error(f"处理会话消息时出错: {e}")
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        # 回调对象必须在窗口存在期间保持引用
+        proc = WNDPROC(window_proc)
+        hinstance = kernel32.GetModuleHandleW(None)
+        window_class = WNDCLASSW(lpfnWndProc=proc, hInstance=hinstance, lpszClassName=self.CLASS_NAME)
+
+        try:
+            user32.RegisterClassW(ctypes.byref(window_class))
+            self.hwnd = user32.CreateWindowExW(0, self.CLASS_NAME, self.CLASS_NAME, 0, 0, 0, 0, 0,
+                                               None, None, hinstance, None)
+            if not self.hwnd:
+                logger.error("创建会话通知窗口失败")
+                return
+
+            if not wtsapi32.WTSRegisterSessionNotification(self.hwnd, NOTIFY_FOR_THIS_SESSION):
+                logger.warning("注册锁屏通知失败")
+            power_notify = user32.RegisterPowerSettingNotification(
+                self.hwnd, ctypes.byref(display_state_guid), DEVICE_NOTIFY_WINDOW_HANDLE
+            )
+        finally:
+            self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        self.hwnd = None
+        user32.UnregisterClassW(self.CLASS_NAME, hinstance)
+
+
+def create_win32_session_source():
+    """创建 Windows 会话事件来源，不可用时返回 None"""
+    if not hasattr(ctypes, "windll"):
+        return None
+    return Win32SessionEventSource()
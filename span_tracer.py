@@ -0,0 +1,142 @@
+"""
+切换流程跟踪 - 记录键盘回调、策略判断、排队、控制方式调用、声音和界面刷新的耗时区间，
+输出为 Chrome trace event 格式(可用 chrome://tracing 或 Perfetto 打开)
+
+    python touchpad_manager.py --trace log/trace.json
+
+区间保存在预分配的环形缓冲区中(array 数组，纳秒时间戳)，记录时不分配对象，
+写满后覆盖最早的区间。记录点先读取 ENABLED，关闭时不调用任何函数:
+
+    start_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+    ...
+    if start_ns:
+        span_tracer.end("backend.registry.write", start_ns)
+
+区间名的第一段作为分类: hook / policy / queue / backend / sound / ui / actuation。
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("touchpad_manager.trace")
+
+DEFAULT_CAPACITY = 65536
+
+# 全局开关和当前跟踪器(记录点只读取 ENABLED)
+ENABLED = False
+_tracer: Optional["SpanTracer"] = None
+
+
+class SpanTracer:
+    """固定容量的区间环形缓冲区"""
+
+    __slots__ = ("capacity", "names", "_ids", "_lock", "name_ids", "starts", "durations", "threads",
+                 "_counter", "origin_ns")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.name_ids = array("H", bytes(2 * capacity))
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.threads = array("Q", bytes(8 * capacity))
+        self._counter = itertools.count()  # next() 在 CPython 中是原子的
+        self.origin_ns = time.perf_counter_ns()
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._ids.get(name)
+                if name_id is None:
+                    name_id = len(self.names)
+                    self.names.append(name)
+                    self._ids[name] = name_id
+        return name_id
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        index = next(self._counter) % self.capacity
+        self.name_ids[index] = self._name_id(name)
+        self.starts[index] = start_ns
+        self.durations[index] = end_ns - start_ns
+        self.threads[index] = threading.get_ident()
+
+    def write(self, path: str) -> int:
+        """写入 Chrome trace event JSON，返回区间数(应在停止记录后调用)"""
+        total = next(self._counter)
+        count = min(total, self.capacity)
+        first = total - count
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"displayTimeUnit": "ns", "otherData": ')
+            f.write(json.dumps({"spans": total, "dropped_spans": first, "capacity": self.capacity}))
+            f.write(', "traceEvents": [\n')
+            f.write(json.dumps({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "TouchpadManager"}}))
+
+            seen_threads = set()
+            for seq in range(first, total):
+                index = seq % self.capacity
+                tid = self.threads[index]
+                if tid not in seen_threads:
+                    seen_threads.add(tid)
+                    f.write(",\n")
+                    f.write(json.dumps({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                        "args": {"name": thread_names.get(tid, f"Thread-{tid}")}}))
+                name = self.names[self.name_ids[index]]
+                f.write(",\n")
+                f.write(json.dumps({
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (self.starts[index] - self.origin_ns) / 1000,
+                    "dur": self.durations[index] / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                }))
+            f.write("\n]}\n")
+        return count
+
+
+def begin() -> int:
+    """区间开始时间；未启用时返回0"""
+    return time.perf_counter_ns() if ENABLED else 0
+
+
+def end(name: str, start_ns: int, end_ns: Optional[int] = None):
+    """记录从 start_ns 到现在(或 end_ns)的区间；start_ns 为0时忽略"""
+    tracer = _tracer
+    if start_ns and tracer is not None:
+        tracer.record(name, start_ns, end_ns if end_ns is not None else time.perf_counter_ns())
+
+
+def start(capacity: int = DEFAULT_CAPACITY) -> SpanTracer:
+    """开始记录(替换已有的跟踪器)"""
+    global ENABLED, _tracer
+    _tracer = SpanTracer(capacity)
+    ENABLED = True
+    return _tracer
+
+
+def stop(path: Optional[str] = None) -> int:
+    """停止记录，给出 path 时写入文件，返回写入的区间数"""
+    global ENABLED, _tracer
+    ENABLED = False
+    tracer, _tracer = _tracer, None
+    if tracer is None or path is None:
+        return 0
+    count = tracer.write(path)
+    logger.info(f"已写入 {count} 个跟踪区间: {path}")
+    return count
@@ -0,0 +1,190 @@
+"""
+流式统计 - 每次状态切换和按键 O(1) 更新，快照只读取属性
+
+    禁用时长(dwell)   每次禁用到下一次启用之间的时间，对数分桶直方图
+    禁用占比(duty)    观察期间触控板处于禁用状态的时间比例
+    切换频率          每小时的启用+禁用次数
+    按键频率          每分钟按键数(整个运行期间，以及最近一个完整分钟)
+    切换延迟          set_touchpad 调用控制方式的耗时
+
+写入来自键盘监听线程和监控线程，都在锁内更新(reset 也在锁内清零)；读取(snapshot)
+不加锁，单个字段总是一致的，字段之间最多相差一次正在进行的更新。
+"""
+
+import threading
+from typing import Dict, Optional
+
+from backend_selector import LatencyHistogram
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+
+
+class DwellHistogram(LatencyHistogram):
+    """禁用时长直方图: 10ms 起，覆盖约 10ms - 3小时"""
+
+    __slots__ = ()
+
+    MIN = 0.01
+    BUCKETS = 80
+
+
+def histogram_summary(histogram: LatencyHistogram, scale: float = 1.0, digits: int = 3) -> Dict:
+    """直方图的计数、均值和百分位(乘以 scale，例如 1000 换算为毫秒)"""
+    return {
+        "count": histogram.count,
+        "mean": round(histogram.mean * scale, digits),
+        "p50": round(histogram.percentile(50) * scale, digits),
+        "p90": round(histogram.percentile(90) * scale, digits),
+        "p99": round(histogram.percentile(99) * scale, digits),
+        "max": round(histogram.max * scale, digits),
+    }
+
+
+class StatsEngine:
+    """触控板统计(替代原来的 stats 字典)"""
+
+    __slots__ = (
+        "clock", "_lock",
+        "disabled_count", "enabled_count", "keystrokes",
+        "start_time", "last_disable_time", "last_enable_time",
+        "session_start_ns", "runtime_ns",
+        "observed_since_ns", "disabled_since_ns", "disabled_ns",
+        "minute_start_ns", "minute_keystrokes", "last_minute_keystrokes",
+        "dwell", "toggle_latency",
+    )
+
+    def __init__(self, clock: Optional[Clock] = None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self._lock = threading.Lock()
+        self.session_start_ns: Optional[int] = None
+        self.start_time: Optional[float] = None
+        self.disabled_since_ns: Optional[int] = None
+        self._reset_counters(self.clock.monotonic_ns())
+
+    def _reset_counters(self, now_ns: int):
+        self.disabled_count = 0
+        self.enabled_count = 0
+        self.keystrokes = 0
+        self.last_disable_time: Optional[float] = None
+        self.last_enable_time: Optional[float] = None
+        self.runtime_ns = 0
+        self.observed_since_ns = now_ns
+        self.disabled_ns = 0
+        self.minute_start_ns = now_ns
+        self.minute_keystrokes = 0
+        self.last_minute_keystrokes = 0
+        self.dwell = DwellHistogram()
+        self.toggle_latency = LatencyHistogram()
+
+    def reset(self):
+        """清零统计(保留当前会话和触控板状态，可在任意线程调用)"""
+        with self._lock:
+            now_ns = self.clock.monotonic_ns()
+            self._reset_counters(now_ns)
+            if self.session_start_ns is not None:
+                self.session_start_ns = now_ns
+                self.start_time = self.clock.wall_time()
+            if self.disabled_since_ns is not None:
+                self.disabled_since_ns = now_ns
+
+    # ---- 写入 ----
+
+    def start_session(self, now_ns: Optional[int] = None):
+        now_ns = self.clock.monotonic_ns() if now_ns is None else now_ns
+        with self._lock:
+            self.session_start_ns = now_ns
+            self.start_time = self.clock.to_wall_time(now_ns)
+
+    def end_session(self, now_ns: Optional[int] = None):
+        now_ns = self.clock.monotonic_ns() if now_ns is None else now_ns
+        with self._lock:
+            if self.session_start_ns is not None:
+                self.runtime_ns += now_ns - self.session_start_ns
+            self.session_start_ns = None
+            self.start_time = None
+
+    def record_keystroke(self, now_ns: int):
+        """按键(键盘监听线程调用)"""
+        with self._lock:
+            self.keystrokes += 1
+            if now_ns - self.minute_start_ns >= NS_PER_MINUTE:
+                self.minute_start_ns, self.minute_keystrokes, self.last_minute_keystrokes = self._roll_minute(now_ns)
+            self.minute_keystrokes += 1
+
+    def _roll_minute(self, now_ns: int):
+        """把按键分钟窗口推进到 now_ns 所在的分钟，返回 (分钟起点, 本分钟按键数, 上一分钟按键数)"""
+        minute_start_ns = self.minute_start_ns
+        elapsed_minutes = (now_ns - minute_start_ns) // NS_PER_MINUTE
+        if elapsed_minutes <= 0:
+            return minute_start_ns, self.minute_keystrokes, self.last_minute_keystrokes
+        # 跨过多个分钟时，中间的空闲分钟按0次计
+        last_minute = self.minute_keystrokes if elapsed_minutes == 1 else 0
+        return minute_start_ns + elapsed_minutes * NS_PER_MINUTE, 0, last_minute
+
+    def record_state(self, enabled: bool, now_ns: int) -> Optional[float]:
+        """观察到的触控板状态(包括外部切换)，用于禁用时长和禁用占比
+
+        从禁用变为启用时返回此次禁用的时长(秒)，否则返回 None(record_toggle 相同)。
+        """
+        with self._lock:
+            return self._observe(enabled, now_ns)
+
+    def record_toggle(self, enabled: bool, now_ns: int, latency: Optional[float] = None) -> Optional[float]:
+        """本程序切换了触控板状态"""
+        with self._lock:
+            if enabled:
+                self.enabled_count += 1
+                self.last_enable_time = self.clock.to_wall_time(now_ns)
+            else:
+                self.disabled_count += 1
+                self.last_disable_time = self.clock.to_wall_time(now_ns)
+            if latency is not None:
+                self.toggle_latency.add(latency)
+            return self._observe(enabled, now_ns)
+
+    def _observe(self, enabled: bool, now_ns: int) -> Optional[float]:
+        if enabled:
+            if self.disabled_since_ns is not None:
+                dwell_ns = now_ns - self.disabled_since_ns
+                self.disabled_ns += dwell_ns
+                self.dwell.add(dwell_ns / NS_PER_SECOND)
+                self.disabled_since_ns = None
+                return dwell_ns / NS_PER_SECOND
+        elif self.disabled_since_ns is None:
+            self.disabled_since_ns = now_ns
+        return None
+
+    # ---- 读取 ----
+
+    def snapshot(self, now_ns: Optional[int] = None) -> Dict:
+        """当前统计(不加锁)"""
+        now_ns = self.clock.monotonic_ns() if now_ns is None else now_ns
+        session_start_ns = self.session_start_ns
+        disabled_since_ns = self.disabled_since_ns
+
+        current_session = (now_ns - session_start_ns) / NS_PER_SECOND if session_start_ns is not None else 0.0
+        runtime = self.runtime_ns / NS_PER_SECOND + current_session
+        observed_ns = max(now_ns - self.observed_since_ns, 1)
+        disabled_ns = self.disabled_ns + (now_ns - disabled_since_ns if disabled_since_ns is not None else 0)
+        toggles = self.enabled_count + self.disabled_count
+        minutes = runtime / 60
+        # 停止打字后最近一分钟的按键数也要随时间归零(只读，不修改窗口)
+        _, _, last_minute_keystrokes = self._roll_minute(now_ns)
+
+        return {
+            "disabled_count": self.disabled_count,
+            "enabled_count": self.enabled_count,
+            "keystrokes": self.keystrokes,
+            "total_runtime": runtime,
+            "current_session": current_session,
+            "start_time": self.start_time,
+            "last_disable_time": self.last_disable_time,
+            "last_enable_time": self.last_enable_time,
+            "duty_cycle": round(100.0 * min(disabled_ns / observed_ns, 1.0), 1),
+            "toggles_per_hour": round(toggles / (runtime / 3600), 1) if runtime > 0 else 0.0,
+            "keystrokes_per_minute": round(self.keystrokes / minutes, 1) if minutes > 0 else 0.0,
+            "last_minute_keystrokes": last_minute_keystrokes,
+            "disabled_dwell": histogram_summary(self.dwell),
+            "toggle_latency_ms": histogram_summary(self.toggle_latency, 1000),
+        }
@@ -0,0 +1,14 @@
+import atexit
+import os
+import sys
+
+import pytest
+
+# 程序模块都在仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def no_exit_cleanup(monkeypatch):
+    """测试中创建的 TouchpadManager 不注册退出清理(退出时 pytest 已关闭输出)"""
+    monkeypatch.setattr(atexit, "register", lambda func, *args, **kwargs: func)
@@ -0,0 +1,55 @@
+"""后台重新测试控制方式不能改变触控板状态(注册表和 PnP 设备是两层)"""
+
+from emulation import EmulatedMachine
+
+
+def create_manager(machine):
+    manager = machine.create_registry_manager()
+    manager.backend_selector.retest_interval = 0  # 不启动后台线程，测试中直接调用 _retest_backends
+    return manager
+
+
+def test_retest_device_layer_after_registry_disable():
+    machine = EmulatedMachine(preset="precision")
+    manager = create_manager(machine)
+
+    assert manager.set_touchpad_state(False)
+    assert manager.last_backend == "registry"
+    manager._retest_backends(["compatibility"])
+    assert not machine.touchpad_enabled
+    assert all(device.enabled for device in machine.devices)
+
+    assert manager.set_touchpad_state(True)
+    assert machine.touchpad_enabled
+
+
+def test_retest_registry_after_device_disable():
+    machine = EmulatedMachine(preset="precision")
+    manager = create_manager(machine)
+
+    # 注册表写入失败，禁用由 PnP 设备完成
+    machine.latency.configure("registry.set", failure_rate=1.0)
+    assert manager.set_touchpad_state(False)
+    assert manager.last_backend == "compatibility"
+    machine.latency.configure("registry.set")
+
+    manager._retest_backends(["registry"])
+    assert not machine.touchpad_enabled
+    assert machine.driver_enabled
+
+    assert manager.set_touchpad_state(True)
+    assert machine.touchpad_enabled
+
+
+def test_enable_restores_layer_disabled_by_failover():
+    machine = EmulatedMachine(preset="precision")
+    manager = create_manager(machine)
+
+    machine.latency.configure("registry.set", failure_rate=1.0)
+    assert manager.set_touchpad_state(False)
+    machine.latency.configure("registry.set")
+
+    # 注册表恢复后启用走注册表，PnP 设备也要重新启用
+    assert manager.set_touchpad_state(True)
+    assert manager.last_backend == "registry"
+    assert machine.touchpad_enabled
@@ -0,0 +1,28 @@
+"""子命令: 静态导入(PyInstaller 只能发现字节码中的 import)并能正常分发"""
+
+import dis
+
+import pytest
+
+import touchpad_manager
+
+
+def test_cli_commands_import_statically():
+    imported = set()
+    for command in touchpad_manager.CLI_COMMANDS.values():
+        imported.update(instruction.argval for instruction in dis.get_instructions(command)
+                        if instruction.opname == "IMPORT_NAME")
+    assert imported == {"threshold_tuner", "replay_harness", "history_export", "fleet_aggregate"}
+
+
+@pytest.mark.parametrize("command", sorted(touchpad_manager.CLI_COMMANDS))
+def test_cli_command_help(command, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        touchpad_manager.run_cli_command([command, "--help"])
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out
+
+
+def test_not_a_command():
+    assert touchpad_manager.run_cli_command(["--minimized"]) is None
+    assert touchpad_manager.run_cli_command([]) is None
@@ -0,0 +1,95 @@
+"""键盘钩子看门狗: 在虚拟时钟上通过 TouchpadManager.check_keyboard_hook 检测各种失效，滚轮不算按键"""
+
+import time
+
+from clock import VirtualClock
+from emulation import EmulatedMachine, FakeInputActivitySource, FakeKeyboardHook
+from emulation.registry import HKEY_CURRENT_USER
+from touchpad_manager import RegistryManager, TouchpadManager
+
+
+class SlowRecorder:
+    """按键轨迹记录很慢，让回调超过钩子超时"""
+
+    def record(self, key):
+        time.sleep(0.01)
+
+
+def create_manager(clock, hook_timeout_ms: int = 300):
+    machine = EmulatedMachine(clock=clock)
+    machine.winreg.seed_value(HKEY_CURRENT_USER, RegistryManager.HOOK_TIMEOUT_KEY_PATH,
+                              "LowLevelHooksTimeout", hook_timeout_ms)
+    source = FakeInputActivitySource(clock)
+    hook = FakeKeyboardHook(source, timeout=hook_timeout_ms / 1000)
+    manager = TouchpadManager(registry_manager=machine.create_registry_manager(), clock=clock)
+    manager.listener_factory = hook
+    assert manager.start_hook_watchdog(source)
+    assert manager.start_keyboard_listener()
+    return manager, hook, source
+
+
+def run_checks(manager, clock, count: int, action=None):
+    """每个检查周期先执行 action，再检查钩子"""
+    for _ in range(count):
+        clock.sleep(1.0)
+        if action is not None:
+            action()
+        clock.sleep(manager.hook_watchdog.check_interval_ns / 1e9 - 1.0)
+        manager.check_keyboard_hook()
+
+
+def last_reason(manager):
+    incidents = manager.hook_watchdog.incidents
+    return incidents[-1]["reason"] if incidents else None
+
+
+def test_callback_timeout():
+    clock = VirtualClock()
+    manager, hook, source = create_manager(clock, hook_timeout_ms=5)
+    manager.trace_recorder = SlowRecorder()
+    assert hook.press()
+    assert hook.current.removed and manager.hook_watchdog.last_timed_out
+    manager.trace_recorder = None
+
+    run_checks(manager, clock, 1, hook.press)
+    assert last_reason(manager) == "callback_timeout"
+    assert len(hook.listeners) == 2 and not hook.current.removed
+
+
+def test_no_events_needs_consecutive_keyboard_input():
+    clock = VirtualClock()
+    manager, hook, source = create_manager(clock)
+    hook.remove()
+
+    # 第一次检查只记录基准；中间一个周期没有输入，计数清零
+    run_checks(manager, clock, 3, hook.press)
+    run_checks(manager, clock, 1)
+    run_checks(manager, clock, 2, hook.press)
+    assert manager.hook_watchdog.recoveries == 0
+
+    run_checks(manager, clock, 1, hook.press)
+    assert last_reason(manager) == "no_events"
+    assert len(hook.listeners) == 2
+    assert hook.press() and hook.lost == 6
+
+
+def test_listener_stopped():
+    clock = VirtualClock()
+    manager, hook, source = create_manager(clock)
+    hook.kill()
+    manager.check_keyboard_hook()
+    assert last_reason(manager) == "listener_stopped"
+    assert hook.current.running
+
+
+def test_scrolling_is_not_a_lost_hook():
+    clock = VirtualClock()
+    manager, hook, source = create_manager(clock)
+    assert hook.press()
+
+    # 一直滚动阅读(光标不动，系统输入时间不断更新)
+    run_checks(manager, clock, 10, source.scroll)
+    run_checks(manager, clock, 10, lambda: (source.scroll(), source.move(), source.scroll()))
+    assert manager.hook_watchdog.checks == 20
+    assert manager.hook_watchdog.recoveries == 0
+    assert len(hook.listeners) == 1
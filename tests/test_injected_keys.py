@@ -0,0 +1,37 @@
+"""快捷键控制方式: 程序自己用 SendInput 注入的切换键经过键盘钩子，但不算作打字"""
+
+from clock import VirtualClock
+from emulation import EmulatedMachine, FakeKeyboardHook
+from touchpad_manager import TouchpadManager, TouchpadState
+
+
+def test_injected_shortcut_is_not_typing():
+    clock = VirtualClock()
+    machine = EmulatedMachine(clock=clock)
+    machine.latency.configure("registry.set", failure_rate=1.0)  # 驱动不接受写注册表，只能用快捷键切换
+    hook = FakeKeyboardHook()
+    machine.user32.keyboard_hook = hook
+    registry_manager = machine.create_registry_manager()
+    registry_manager.use_keyboard_shortcut = True
+    manager = TouchpadManager(registry_manager=registry_manager, clock=clock)
+    manager.config_manager.set("idle_threshold", 2.0, save=False)
+    manager.load_config()
+    manager.listener_factory = hook
+    assert manager.start_keyboard_listener()
+    manager.touchpad_state = TouchpadState.ENABLED
+    manager.is_monitoring = True
+
+    hook.press()
+    last_activity_ns = manager.last_activity_ns
+    assert not machine.touchpad_enabled
+    assert manager.touchpad_state == TouchpadState.DISABLED
+    assert hook.filtered == 2  # 注入的切换键(按下和释放)被过滤
+
+    clock.sleep(3.0)
+    manager.check_idle()
+    assert machine.touchpad_enabled
+    assert manager.touchpad_state == TouchpadState.ENABLED
+    assert manager.last_activity_ns == last_activity_ns
+    assert manager.stats.snapshot()["keystrokes"] == 1
+    assert hook.delivered == 1 and hook.filtered == 4
+    assert registry_manager.last_backend == "shortcut"
@@ -0,0 +1,64 @@
+"""前台应用: PID 被新进程复用时不能沿用旧进程的应用配置，前台窗口切换全屏时暂停键盘钩子"""
+
+from emulation import EmulatedMachine, FakeKeyboardHook
+from emulation.foreground import FakeForegroundEventSource
+from foreground_monitor import ForegroundMonitor
+from profiles import ProfileManager
+from touchpad_manager import TouchpadManager
+
+PROFILES = {"code.exe": {"idle_threshold": 1.5}, "game.exe": {"auto_disable": False}}
+
+
+def test_resolve_with_reused_pid():
+    profiles = ProfileManager(PROFILES)
+    assert profiles.resolve(1000, "code.exe").name == "code.exe"
+    assert profiles.resolve(1000, "code.exe").name == "code.exe"
+    assert profiles.cache_hits == 1
+
+    assert profiles.resolve(1000, "game.exe").name == "game.exe"
+    assert profiles.resolve(1000, "notepad.exe") is profiles.default
+
+
+def test_foreground_monitor_with_reused_pid():
+    source = FakeForegroundEventSource()
+    monitor = ForegroundMonitor(source)
+    profiles = ProfileManager(PROFILES)
+    monitor.add_listener(lambda window: profiles.activate(window.pid, window.process_name))
+    monitor.start()
+
+    source.focus("code.exe", pid=1000, hwnd=0x100)
+    assert profiles.active.name == "code.exe"
+    source.focus("explorer.exe")
+    source.focus("code.exe", pid=1000, hwnd=0x100)
+    assert source.name_queries == 2
+
+    # code.exe 退出，新进程 game.exe 拿到同一个 PID
+    source.focus("game.exe", pid=1000, hwnd=0x200)
+    assert monitor.current.process_name == "game.exe"
+    assert profiles.active.name == "game.exe"
+    assert not profiles.active.auto_disable
+
+
+def test_foreground_window_entering_fullscreen_pauses_hook():
+    machine = EmulatedMachine()
+    hook = FakeKeyboardHook()
+    manager = TouchpadManager(registry_manager=machine.create_registry_manager())
+    manager.listener_factory = hook
+    manager.is_monitoring = True
+    assert manager.start_keyboard_listener()
+    source = FakeForegroundEventSource()
+    assert manager.start_foreground_monitor(source)
+
+    source.focus("video.exe")
+    assert manager.hook_paused_for is None and hook.current.running
+
+    # 同一窗口切换到全屏播放
+    source.set_fullscreen(True)
+    assert manager.hook_paused_for == "全屏应用 video.exe"
+    assert manager.keyboard_listener is None and not hook.current.running
+
+    source.set_fullscreen(False)
+    assert manager.hook_paused_for is None
+    assert len(hook.listeners) == 2 and hook.current.running
+    assert manager.foreground_monitor.changes == 3
+    manager.stop_foreground_monitor()
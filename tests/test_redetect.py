@@ -0,0 +1,30 @@
+"""切换兼容模式时重新检测控制方式，沿用原有的注册表管理器"""
+
+from emulation import EmulatedMachine
+from touchpad_manager import TouchpadManager
+
+
+def test_redetect_keeps_registry_manager_wiring():
+    machine = EmulatedMachine(preset="precision")
+    manager = TouchpadManager(registry_manager=machine.create_registry_manager())
+    registry_manager = manager.registry_manager
+    callback = registry_manager.on_circuit_change = lambda *args: None
+    manager.config_manager.set("circuit_breaker.failure_threshold", 7, save=False)
+    manager.load_config()
+    assert manager.start_registry_watcher()
+    watcher = manager.registry_watcher
+
+    try:
+        assert manager.redetect_control_method()
+        assert manager.registry_manager is registry_manager
+        assert registry_manager.on_circuit_change is callback
+        assert registry_manager.circuit_breakers["registry"].failure_threshold == 7
+        assert registry_manager.detected_key_path == machine.key_path
+        assert manager.registry_watcher is not None and manager.registry_watcher is not watcher
+
+        assert registry_manager.set_touchpad_state(False)
+        assert not machine.touchpad_enabled
+        assert registry_manager.set_touchpad_state(True)
+        assert machine.touchpad_enabled
+    finally:
+        manager.stop_registry_watcher()
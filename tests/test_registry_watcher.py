@@ -0,0 +1,120 @@
+"""注册表监视: 变更通知、登记失败退回轮询、自适应间隔，以及忽略本程序自己的写入"""
+
+import threading
+import time
+
+from emulation import EmulatedMachine, FakeRegistryNotifier
+from registry_watcher import RegistryWatcher
+from touchpad_manager import TouchpadManager, TouchpadState
+
+
+def wait_until(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class RecordingChanges:
+    def __init__(self):
+        self.states = []
+        self.event = threading.Event()
+
+    def __call__(self, enabled: bool):
+        self.states.append(enabled)
+        self.event.set()
+
+
+class FailingNotifier(FakeRegistryNotifier):
+    def arm(self) -> bool:
+        super().arm()
+        return False
+
+
+def test_notify_rearms_after_each_notification():
+    machine = EmulatedMachine()
+    registry_manager = machine.create_registry_manager()
+    notifier = registry_manager.create_change_notifier()
+    assert isinstance(notifier, FakeRegistryNotifier)
+    changes = RecordingChanges()
+    watcher = RegistryWatcher(registry_manager.read_registry_state, changes, notifier=notifier)
+    watcher.start()
+    try:
+        assert wait_until(lambda: notifier.arm_count == 1)
+        machine.toggle_touchpad()
+        assert wait_until(lambda: changes.states == [False] and notifier.arm_count == 2)
+        machine.toggle_touchpad()
+        assert wait_until(lambda: changes.states == [False, True] and notifier.arm_count == 3)
+        assert watcher.mode == "notify"
+        assert watcher.notifications == 2 and watcher.polls == 0
+    finally:
+        watcher.stop()
+    assert watcher.notifier is None
+
+
+def test_arm_failure_falls_back_to_polling():
+    machine = EmulatedMachine()
+    registry_manager = machine.create_registry_manager()
+    notifier = FailingNotifier(machine.winreg, machine.key_path)
+    changes = RecordingChanges()
+    watcher = RegistryWatcher(registry_manager.read_registry_state, changes, notifier=notifier,
+                              min_interval=0.01, max_interval=0.02)
+    watcher.start()
+    try:
+        assert wait_until(lambda: watcher.mode == "poll")
+        assert notifier.arm_count == 1
+        machine.toggle_touchpad()
+        assert changes.event.wait(2.0)
+        assert changes.states == [False]
+        assert watcher.polls > 0 and watcher.notifications == 0
+    finally:
+        watcher.stop()
+
+
+def test_adaptive_poll_interval():
+    state = {"enabled": True}
+    changes = RecordingChanges()
+    watcher = RegistryWatcher(lambda: state["enabled"], changes, min_interval=0.5, max_interval=3.0)
+    watcher.last_state = True
+
+    intervals = []
+    for _ in range(4):
+        assert not watcher.poll()
+        intervals.append(watcher.poll_interval)
+    assert intervals == [1.0, 2.0, 3.0, 3.0]
+
+    state["enabled"] = False
+    assert watcher.poll()
+    assert watcher.poll_interval == 0.5
+    assert changes.states == [False]
+
+    state["enabled"] = None  # 读取失败不算变化
+    assert not watcher.poll()
+    assert watcher.poll_interval == 1.0
+    assert watcher.polls == 6
+
+
+def test_manager_ignores_its_own_registry_writes():
+    machine = EmulatedMachine()
+    manager = TouchpadManager(registry_manager=machine.create_registry_manager())
+    watcher = RegistryWatcher(manager.registry_manager.read_registry_state, manager.on_external_change)
+    watcher.last_state = True
+    manager.touchpad_state = TouchpadState.ENABLED
+    # 注册表写入时同步检查，模拟监视线程在 set_touchpad 返回前读到新值
+    machine.winreg.add_change_listener(lambda root, path, name: watcher.check())
+
+    assert manager.set_touchpad(False, cause="typing")
+    assert watcher.changes == 1 and watcher.last_state is False
+    assert manager.touchpad_state == TouchpadState.DISABLED
+    assert not manager.external_disable
+    assert manager.stats.snapshot()["disabled_count"] == 1
+
+    # Fn 键在外部启用后又禁用: 这次是外部变化
+    machine.toggle_touchpad()
+    assert manager.touchpad_state == TouchpadState.ENABLED
+    machine.toggle_touchpad()
+    assert manager.touchpad_state == TouchpadState.DISABLED
+    assert manager.external_disable
+    assert watcher.changes == 3
@@ -0,0 +1,32 @@
+"""采样分析器: 诊断报告和采样线程同时写入同一文件"""
+
+import threading
+
+from sampling_profiler import SamplingProfiler
+
+
+def test_concurrent_writes(tmp_path):
+    path = str(tmp_path / "profile.collapsed")
+    profiler = SamplingProfiler(path)
+    for _ in range(5):
+        profiler.sample()
+
+    errors = []
+
+    def write_many():
+        for _ in range(50):
+            try:
+                profiler.write(path)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["profile.collapsed"]
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == profiler.written > 0
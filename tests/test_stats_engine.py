@@ -0,0 +1,40 @@
+"""流式统计: 最近一分钟的按键数随时间滚动，按键计数在锁内更新"""
+
+import threading
+
+from clock import VirtualClock, NS_PER_SECOND
+from stats_engine import StatsEngine
+
+
+def test_last_minute_keystrokes_rolls_forward_without_typing():
+    clock = VirtualClock()
+    stats = StatsEngine(clock=clock)
+    for i in range(30):
+        stats.record_keystroke(clock.monotonic_ns() + i * NS_PER_SECOND)
+    assert stats.snapshot(10 * NS_PER_SECOND)["last_minute_keystrokes"] == 0
+
+    # 停止打字后不再有按键推进窗口，快照按 now_ns 计算
+    assert stats.snapshot(90 * NS_PER_SECOND)["last_minute_keystrokes"] == 30
+    assert stats.snapshot(150 * NS_PER_SECOND)["last_minute_keystrokes"] == 0
+    assert stats.minute_keystrokes == 30  # 快照不修改窗口
+
+    stats.record_keystroke(130 * NS_PER_SECOND)
+    assert stats.snapshot(130 * NS_PER_SECOND)["last_minute_keystrokes"] == 0
+    assert stats.snapshot(190 * NS_PER_SECOND)["last_minute_keystrokes"] == 1
+
+
+def test_keystrokes_from_several_threads():
+    stats = StatsEngine(clock=VirtualClock())
+    count = 20000
+    threads = [threading.Thread(target=lambda: [stats.record_keystroke(0) for _ in range(count)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.keystrokes == 4 * count
+
+    stats.record_keystroke(0)
+    stats.reset()
+    snapshot = stats.snapshot()
+    assert snapshot["keystrokes"] == 0 and stats.minute_keystrokes == 0
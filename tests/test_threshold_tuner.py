@@ -0,0 +1,63 @@
+"""阈值调优模型与虚拟时钟上的完整回放(replay_harness)对照"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import replay_harness
+import threshold_tuner
+from touchpad_manager import TouchpadManager
+
+
+def synthetic_trace(seed: int = 1) -> "np.ndarray":
+    """打字暴发(按键间隔0.15秒)之间的停顿避开各参数的边界和监控周期"""
+    rng = np.random.default_rng(seed)
+    timestamps = []
+    t = 0.0
+    for _ in range(40):
+        for _ in range(rng.integers(3, 15)):
+            timestamps.append(t)
+            t += 0.15
+        t += rng.choice([0.8, 2.6, 3.3, 6.0, 12.0])
+    return np.array(timestamps)
+
+
+@pytest.mark.parametrize("idle_threshold, min_disable_time, delay_before_enable", [
+    (2.0, 0.5, 0.0),
+    (2.0, 0.5, 1.0),  # 2.6秒的停顿落在启用前的等待中
+    (3.0, 0.1, 0.5),
+    (5.0, 2.0, 0.2),
+])
+def test_evaluate_grid_matches_replay(idle_threshold, min_disable_time, delay_before_enable):
+    timestamps = synthetic_trace()
+    result = threshold_tuner.evaluate_grid(timestamps, np.array([idle_threshold]),
+                                           np.array([min_disable_time]), np.array([delay_before_enable]))
+    replayed = replay_harness.replay((timestamps * 1e9).astype(np.int64), idle_threshold,
+                                     min_disable_time, delay_before_enable, speed=0)
+
+    actuations = int(result["actuations"][0, 0, 0])
+    assert actuations == replayed.actuations
+    # 回放在监控周期上检查空闲，每次启用最多晚一个周期
+    tolerance = actuations / 2 * TouchpadManager.MONITOR_INTERVAL
+    assert float(result["disabled_time"][0, 0, 0]) == pytest.approx(replayed.disabled_time, abs=tolerance)
+
+
+def test_disabled_time_bounded_by_trace():
+    timestamps = synthetic_trace(seed=2)
+    idle_values = threshold_tuner.parse_grid("1:10:0.5")
+    min_disable_values = threshold_tuner.parse_grid("0.1:2:0.1")
+    delay_values = threshold_tuner.parse_grid("0:1:0.1")
+    result = threshold_tuner.evaluate_grid(timestamps, idle_values, min_disable_values, delay_values)
+
+    hold = idle_values[:, None, None] + delay_values[None, None, :]
+    duration = timestamps[-1] - timestamps[0]
+    assert (result["disabled_time"] <= duration + hold + 1e-9).all()
+    assert (result["lockout_time"] <= result["disabled_time"] + 1e-9).all()
+
+
+def test_applicable_mask_flags_long_min_disable():
+    mask = threshold_tuner.applicable_mask(np.array([1.0, 2.0]), np.array([0.5, 1.5, 2.5]), np.array([0.0, 0.5]))
+    assert mask[:, 0].all() and mask[1, 1].all()
+    assert not mask[0, 1, 0] and mask[0, 1, 1]
+    assert not mask[1, 2, 0] and mask[1, 2, 1]
+    assert not mask[0, 2].any()
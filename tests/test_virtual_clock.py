@@ -0,0 +1,50 @@
+"""在虚拟时钟上运行 TouchpadManager: 数小时的打字和空闲在毫秒内完成"""
+
+import pytest
+
+from clock import Clock, VirtualClock, NS_PER_SECOND
+from emulation import EmulatedMachine
+from replay_harness import ReplayDriver, create_manager
+
+
+def test_clock_is_abstract():
+    with pytest.raises(TypeError):
+        Clock()
+
+
+def test_virtual_clock_advance():
+    clock = VirtualClock(start_ns=5 * NS_PER_SECOND, wall_origin=1000.0)
+    clock.sleep(1.5)
+    clock.advance_to(4.0)  # 不会倒退
+    assert clock.monotonic() == 6.5
+    assert clock.wall_time() == 1001.5
+    assert clock.to_wall_time(5 * NS_PER_SECOND) == 1000.0
+
+
+def test_idle_threshold_over_simulated_hours():
+    clock = VirtualClock()
+    machine = EmulatedMachine(preset="precision", clock=clock)
+    manager = create_manager(machine.create_registry_manager(), clock, idle_threshold=3.0,
+                             min_disable_time=0.5, delay_before_enable=0.2)
+    driver = ReplayDriver(manager, clock)
+    driver.start()
+
+    # 8小时内每10分钟打一段字
+    settle = 3.0 + 0.2 + 2 * manager.MONITOR_INTERVAL
+    for _ in range(48):
+        start = clock.monotonic() + 600.0
+        for i in range(20):
+            driver.key_press(start + i * 0.2)
+        last_key = clock.monotonic()
+        assert not machine.touchpad_enabled
+
+        driver.run_until(last_key + 3.0 - manager.MONITOR_INTERVAL)
+        assert not machine.touchpad_enabled
+        driver.run_until(last_key + settle)
+        assert machine.touchpad_enabled
+    driver.stop()
+
+    assert clock.monotonic() > 8 * 3600
+    snapshot = manager.stats.snapshot()
+    assert snapshot["disabled_count"] == 48 and snapshot["enabled_count"] == 48
+    assert snapshot["keystrokes"] == 48 * 20
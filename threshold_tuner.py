@@ -0,0 +1,275 @@
+"""
+离线阈值调优工具 - 回放按键时间轨迹，批量评估空闲阈值参数组合
+
+用法:
+    python touchpad_manager.py tune trace1.npy trace2.txt [--idle 1:10:0.5] [--output fragment.json]
+
+轨迹文件只包含按键时间戳（不含任何按键内容）:
+    .tpt        trace_recorder 记录的二进制轨迹
+    .npy        浮点数组为秒；整数数组视为纳秒(time.monotonic_ns)
+    .txt/.csv   每行一个时间戳(秒)，取第一列，'#' 开头的行为注释
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# 默认参数网格 (起始:结束:步长，包含结束值)
+DEFAULT_IDLE_GRID = "1:10:0.5"
+DEFAULT_MIN_DISABLE_GRID = "0.1:2:0.1"
+DEFAULT_DELAY_GRID = "0:1:0.1"
+
+# 重新启用后多少秒内又开始打字，视为一次"误触暴露窗口"
+DEFAULT_EXPOSURE_WINDOW = 2.0
+
+# 推荐评分权重
+DEFAULT_EXPOSURE_WEIGHT = 10.0
+DEFAULT_ACTUATION_WEIGHT = 1.0
+DEFAULT_LOCKOUT_WEIGHT = 2.0
+
+
+def parse_grid(spec: str) -> "np.ndarray":
+    """解析网格参数: '1,2,5' 或 '1:10:0.5'"""
+    spec = spec.strip()
+    if ":" in spec:
+        parts = [float(p) for p in spec.split(":")]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError(f"无效的网格范围: {spec}")
+        start, stop, step = parts
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        values = start + step * np.arange(max(count, 0))
+    else:
+        values = np.array([float(p) for p in spec.split(",") if p.strip()])
+
+    if values.size == 0:
+        raise ValueError(f"网格为空: {spec}")
+    return np.unique(np.round(values, 6))
+
+
+def load_trace(path: str) -> "np.ndarray":
+    """加载单个轨迹文件，返回排序后的秒级时间戳数组"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".tpt":
+        from trace_recorder import load_trace_array
+        raw, _ = load_trace_array(path)
+        timestamps = (raw - raw.min()).astype(np.float64) / 1e9 if raw.size else raw.astype(np.float64)
+    elif ext == ".npy":
+        raw = np.load(path, allow_pickle=False).ravel()
+        if np.issubdtype(raw.dtype, np.integer):
+            timestamps = (raw - raw.min()).astype(np.float64) / 1e9 if raw.size else raw.astype(np.float64)
+        else:
+            timestamps = raw.astype(np.float64)
+    else:
+        timestamps = np.loadtxt(path, comments="#", delimiter="," if ext == ".csv" else None,
+                                usecols=0, ndmin=1, dtype=np.float64)
+
+    timestamps = timestamps[np.isfinite(timestamps)]
+    timestamps.sort(kind="stable")
+    return timestamps
+
+
+def applicable_mask(idle_values: "np.ndarray",
+                    min_disable_values: "np.ndarray",
+                    delay_values: "np.ndarray") -> "np.ndarray":
+    """模型适用的参数组合，形状为 (len(idle), len(min_disable), len(delay))
+
+    TouchpadManager 的 min_disable_time 从上次自动启用的检查时刻算起，而下一次暴发的最后一次按键
+    至少在 delay_before_enable 之后，所以 min_disable_time <= idle_threshold + delay_before_enable
+    时它不起作用。更大的 min_disable_time 会把后续暴发合并进延长的禁用区间，evaluate_grid 不模拟这种情况。
+    """
+    thr, mn, dl = np.meshgrid(idle_values, min_disable_values, delay_values, indexing="ij")
+    return mn <= thr + dl + 1e-9
+
+
+def evaluate_grid(timestamps: "np.ndarray",
+                  idle_values: "np.ndarray",
+                  min_disable_values: "np.ndarray",
+                  delay_values: "np.ndarray",
+                  exposure_window: float = DEFAULT_EXPOSURE_WINDOW) -> Dict[str, "np.ndarray"]:
+    """在一个轨迹上评估全部参数组合
+
+    模型与 TouchpadManager 一致: 按键立即禁用；最后一次按键后空闲 idle_threshold 秒时，
+    等待 delay_before_enable 秒后重新启用。等待期间的按键不会阻止启用(触控板仍处于禁用状态)，
+    启用后的下一次按键再次禁用，因此间隔超过 idle_threshold 就是一次新的暴发。
+    禁用时间为各暴发禁用区间的并集，不超过轨迹长度加一次 idle_threshold + delay_before_enable。
+
+    min_disable_time 不参与计算，只对 applicable_mask 为 True 的组合结果正确(监控周期的取整也不模拟)。
+    返回的每个数组形状均为 (len(idle), len(min_disable), len(delay))。
+    """
+    thr, mn, dl = np.meshgrid(idle_values, min_disable_values, delay_values, indexing="ij")
+    shape = thr.shape
+    thr, dl = thr.ravel(), dl.ravel()
+
+    n = timestamps.size
+    if n == 0:
+        zeros = np.zeros(shape)
+        return {
+            "actuations": zeros.astype(np.int64),
+            "disabled_time": zeros,
+            "lockout_time": zeros,
+            "exposure_windows": zeros.astype(np.int64),
+            "exposure_time": zeros,
+        }
+
+    gaps = np.diff(timestamps)
+    sorted_gaps = np.sort(gaps)
+    gap_prefix = np.concatenate(([0.0], np.cumsum(sorted_gaps)))
+
+    # 空闲超过 idle_threshold 的间隔都会重新启用触控板，形成新的输入暴发
+    k_thr = np.searchsorted(sorted_gaps, thr, side="right")
+    bursts = (gaps.size - k_thr) + 1
+    in_burst_time = gap_prefix[k_thr]
+
+    # 每个暴发在最后一次按键后再禁用 hold 秒；间隔不超过 hold 时与下一个暴发相接，只计入间隔本身
+    hold = thr + dl
+    k_hold = np.searchsorted(sorted_gaps, hold, side="right")
+    lockout = (gap_prefix[k_hold] - gap_prefix[k_thr]) + (gaps.size - k_hold + 1) * hold
+
+    # 重新启用时已经恢复打字，或启用后 exposure_window 秒内又开始打字 -> 掌心误触暴露窗口
+    k_exp = np.searchsorted(sorted_gaps, hold + exposure_window, side="right")
+    exposure_windows = k_exp - k_thr
+    exposure_time = (gap_prefix[k_exp] - gap_prefix[k_hold]) - (k_exp - k_hold) * hold
+
+    return {
+        "actuations": (2 * bursts).reshape(shape),
+        "disabled_time": (in_burst_time + lockout).reshape(shape),
+        "lockout_time": lockout.reshape(shape),
+        "exposure_windows": exposure_windows.reshape(shape),
+        "exposure_time": exposure_time.reshape(shape),
+    }
+
+
+def evaluate_traces(traces: Sequence["np.ndarray"],
+                    idle_values: "np.ndarray",
+                    min_disable_values: "np.ndarray",
+                    delay_values: "np.ndarray",
+                    exposure_window: float = DEFAULT_EXPOSURE_WINDOW) -> Dict[str, "np.ndarray"]:
+    """评估多个轨迹并累加结果"""
+    totals: Dict[str, "np.ndarray"] = {}
+    for timestamps in traces:
+        result = evaluate_grid(timestamps, idle_values, min_disable_values, delay_values, exposure_window)
+        for key, value in result.items():
+            totals[key] = totals[key] + value if key in totals else value
+    return totals
+
+
+def score_results(results: Dict[str, "np.ndarray"],
+                  exposure_weight: float = DEFAULT_EXPOSURE_WEIGHT,
+                  actuation_weight: float = DEFAULT_ACTUATION_WEIGHT,
+                  lockout_weight: float = DEFAULT_LOCKOUT_WEIGHT) -> "np.ndarray":
+    """计算评分(越低越好): 误触暴露、开关次数和停止打字后的锁定时间(分钟)的加权和"""
+    return (exposure_weight * results["exposure_windows"]
+            + actuation_weight * results["actuations"]
+            + lockout_weight * results["lockout_time"] / 60.0)
+
+
+def build_config_fragment(idle_threshold: float, min_disable_time: float, delay_before_enable: float) -> Dict:
+    """生成可合并到 user_config.json 的配置片段"""
+    return {
+        "idle_threshold": round(float(idle_threshold), 3),
+        "compatibility": {
+            "delay_before_enable": round(float(delay_before_enable), 3),
+            "min_disable_time": round(float(min_disable_time), 3)
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """tune 子命令入口"""
+    parser = argparse.ArgumentParser(
+        prog="touchpad_manager tune",
+        description="回放按键时间轨迹，评估空闲阈值参数组合并推荐配置"
+    )
+    parser.add_argument("traces", nargs="+", help="轨迹文件(.tpt/.npy/.txt/.csv)")
+    parser.add_argument("--idle", default=DEFAULT_IDLE_GRID, help="idle_threshold 网格 (默认 %(default)s)")
+    parser.add_argument("--min-disable", default=DEFAULT_MIN_DISABLE_GRID, help="min_disable_time 网格 (默认 %(default)s)")
+    parser.add_argument("--delay", default=DEFAULT_DELAY_GRID, help="delay_before_enable 网格 (默认 %(default)s)")
+    parser.add_argument("--exposure-window", type=float, default=DEFAULT_EXPOSURE_WINDOW,
+                        help="重新启用后多少秒内恢复打字视为误触暴露 (默认 %(default)s)")
+    parser.add_argument("--exposure-weight", type=float, default=DEFAULT_EXPOSURE_WEIGHT)
+    parser.add_argument("--actuation-weight", type=float, default=DEFAULT_ACTUATION_WEIGHT)
+    parser.add_argument("--lockout-weight", type=float, default=DEFAULT_LOCKOUT_WEIGHT)
+    parser.add_argument("--top", type=int, default=10, help="显示前N个组合")
+    parser.add_argument("--output", help="将推荐的配置片段写入此文件")
+    args = parser.parse_args(argv)
+
+    if not HAS_NUMPY:
+        print("错误: tune 命令需要 numpy，请安装: pip install numpy")
+        return 1
+
+    try:
+        idle_values = parse_grid(args.idle)
+        min_disable_values = parse_grid(args.min_disable)
+        delay_values = parse_grid(args.delay)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 2
+
+    load_start = time.perf_counter()
+    traces = []
+    for path in args.traces:
+        try:
+            traces.append(load_trace(path))
+        except Exception as e:
+            print(f"加载轨迹失败 {path}: {e}")
+            return 1
+
+    total_events = sum(t.size for t in traces)
+    total_hours = sum((t[-1] - t[0]) for t in traces if t.size) / 3600.0
+    print(f"已加载 {len(traces)} 个轨迹, {total_events} 个按键事件, 共 {total_hours:.2f} 小时 "
+          f"({time.perf_counter() - load_start:.2f}秒)")
+
+    eval_start = time.perf_counter()
+    results = evaluate_traces(traces, idle_values, min_disable_values, delay_values, args.exposure_window)
+    scores = score_results(results, args.exposure_weight, args.actuation_weight, args.lockout_weight)
+    combos = scores.size
+    print(f"已评估 {combos} 个参数组合 ({time.perf_counter() - eval_start:.2f}秒)")
+
+    valid = applicable_mask(idle_values, min_disable_values, delay_values)
+    if not valid.any():
+        print("错误: 所有组合的 min_disable_time 都大于 idle_threshold + delay_before_enable，无法评估")
+        return 2
+    if not valid.all():
+        print(f"跳过 {int((~valid).sum())} 个 min_disable_time 大于 idle_threshold + delay_before_enable 的组合"
+              f"(后续按键会合并进延长的禁用区间，模型不适用)")
+
+    order = np.argsort(np.where(valid, scores, np.inf), axis=None, kind="stable")[:int(valid.sum())]
+    print()
+    print(f"{'空闲阈值':>8} {'最小禁用':>8} {'启用延迟':>8} {'开关次数':>8} {'禁用时间(s)':>12} {'暴露窗口':>8} {'暴露时间(s)':>12} {'评分':>10}")
+    for flat_index in order[:max(args.top, 1)]:
+        i, j, k = np.unravel_index(flat_index, scores.shape)
+        print(f"{idle_values[i]:>8.2f} {min_disable_values[j]:>8.2f} {delay_values[k]:>8.2f} "
+              f"{int(results['actuations'][i, j, k]):>8d} {results['disabled_time'][i, j, k]:>12.1f} "
+              f"{int(results['exposure_windows'][i, j, k]):>8d} {results['exposure_time'][i, j, k]:>12.1f} "
+              f"{scores[i, j, k]:>10.1f}")
+
+    i, j, k = np.unravel_index(order[0], scores.shape)
+    fragment = build_config_fragment(idle_values[i], min_disable_values[j], delay_values[k])
+    print()
+    print("推荐配置 (合并到 config/user_config.json):")
+    print(json.dumps(fragment, indent=2, ensure_ascii=False))
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(fragment, f, indent=2, ensure_ascii=False)
+            print(f"配置片段已保存到: {args.output}")
+        except Exception as e:
+            print(f"保存配置片段失败: {e}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
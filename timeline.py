@@ -0,0 +1,151 @@
+"""
+触控板状态时间线 - 最近切换的环形缓冲区和增量绘制的时间线视图
+
+TransitionRing 用 array 模块的两个并行数组保存(时间戳, 状态)，容量固定，
+不为每次切换创建 Python 对象，内存与会话长度无关。每次追加分配一个递增的序号，
+读取方用序号增量获取新切换。
+
+TimelineView 在 Tk Canvas(或接口相同的对象)上绘制最近 window 秒的时间线:
+每段状态是一个矩形，新切换只追加矩形并更新当前段的终点，通过 scrollregion
+滚动视图，移出窗口的矩形被删除，不做整体重绘。
+"""
+
+from array import array
+from collections import deque
+from typing import Iterator, Tuple
+
+DEFAULT_CAPACITY = 4096
+DEFAULT_WINDOW = 3600.0
+
+STATE_DISABLED = 0
+STATE_ENABLED = 1
+STATE_UNKNOWN = -1
+
+
+class TransitionRing:
+    """固定容量的切换环形缓冲区(时间戳为单调时钟秒)"""
+
+    __slots__ = ("capacity", "timestamps", "states", "total")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.states = array("b", bytes(capacity))
+        self.total = 0  # 累计追加次数，也是下一次追加的序号
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, timestamp: float, enabled: bool):
+        index = self.total % self.capacity
+        self.timestamps[index] = timestamp
+        self.states[index] = STATE_ENABLED if enabled else STATE_DISABLED
+        self.total += 1
+
+    @property
+    def first_sequence(self) -> int:
+        """缓冲区中最早一条的序号"""
+        return max(0, self.total - self.capacity)
+
+    def since(self, sequence: int) -> Iterator[Tuple[int, float, int]]:
+        """序号不小于 sequence 的切换 (序号, 时间戳, 状态)；已被覆盖的部分跳过"""
+        end = self.total
+        for seq in range(max(sequence, end - self.capacity), end):
+            index = seq % self.capacity
+            yield seq, self.timestamps[index], self.states[index]
+
+    def state_at(self, timestamp: float) -> int:
+        """timestamp 时的状态(缓冲区中找不到时返回 STATE_UNKNOWN)"""
+        state = STATE_UNKNOWN
+        for _, ts, value in self.since(self.first_sequence):
+            if ts > timestamp:
+                break
+            state = value
+        return state
+
+    def memory_bytes(self) -> int:
+        return self.timestamps.itemsize * len(self.timestamps) + self.states.itemsize * len(self.states)
+
+
+class TimelineView:
+    """在 Canvas 上增量绘制最近 window 秒的状态时间线"""
+
+    COLORS = {
+        STATE_ENABLED: "#4caf50",
+        STATE_DISABLED: "#e53935",
+        STATE_UNKNOWN: "#bdbdbd",
+    }
+
+    def __init__(self, canvas, ring: TransitionRing, width: int, height: int,
+                 window: float = DEFAULT_WINDOW, origin: float = 0.0):
+        self.canvas = canvas
+        self.ring = ring
+        self.width = width
+        self.height = height
+        self.window = window
+        self.origin = origin  # x=0 对应的时间
+        self.scale = width / window  # 像素/秒
+
+        self.next_sequence = ring.first_sequence
+        self.current_item = None
+        self.current_start = 0.0
+        self.segments = deque()  # (矩形 id, 结束 x)，按时间顺序
+        self.items_created = 0
+
+    def _x(self, timestamp: float) -> float:
+        return (timestamp - self.origin) * self.scale
+
+    def _start_segment(self, timestamp: float, state: int):
+        x = self._x(timestamp)
+        self.current_item = self.canvas.create_rectangle(
+            x, 0, x, self.height, fill=self.COLORS.get(state, self.COLORS[STATE_UNKNOWN]), width=0
+        )
+        self.current_start = x
+        self.items_created += 1
+
+    def _close_segment(self, timestamp: float):
+        if self.current_item is None:
+            return
+        x = self._x(timestamp)
+        self.canvas.coords(self.current_item, self.current_start, 0, x, self.height)
+        self.segments.append((self.current_item, x))
+        self.current_item = None
+
+    def update(self, now: float):
+        """追加新的切换，延长当前段到 now 并滚动视图"""
+        left = now - self.window
+        if self.current_item is None and self.next_sequence == self.ring.first_sequence:
+            # 第一次绘制: 窗口开始时的状态
+            self._start_segment(left, self.ring.state_at(left))
+
+        # 已经移出窗口的切换(例如暂停更新期间)只保留最后一次的状态，从窗口左边开始
+        stale = None
+        for seq, timestamp, state in self.ring.since(self.next_sequence):
+            self.next_sequence = seq + 1
+            if timestamp < left:
+                stale = state
+                continue
+            if stale is not None:
+                self._close_segment(left)
+                self._start_segment(left, stale)
+                stale = None
+            self._close_segment(timestamp)
+            self._start_segment(timestamp, state)
+        if stale is not None:
+            self._close_segment(left)
+            self._start_segment(left, stale)
+
+        if self.current_item is not None:
+            self.canvas.coords(self.current_item, self.current_start, 0, self._x(now), self.height)
+
+        # 删除完全移出窗口的段
+        left_x = self._x(left)
+        while self.segments and self.segments[0][1] < left_x:
+            self.canvas.delete(self.segments.popleft()[0])
+
+        self.canvas.configure(scrollregion=(left_x, 0, self._x(now), self.height))
+        self.canvas.xview_moveto(0)
+
+    @property
+    def item_count(self) -> int:
+        return len(self.segments) + (1 if self.current_item is not None else 0)
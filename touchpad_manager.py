@@ -7,7 +7,7 @@
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
 import threading
 import time
 import sys
@@ -19,12 +19,23 @@ from datetime import datetime, timedelta
 from enum import Enum
 import logging
 import logging.handlers
-from typing import Optional, Dict, Any, List, Callable, Union
+from typing import Optional, Dict, Any, List, Callable, Set, Tuple, Union
 import atexit
 import subprocess
+from collections import deque
 import webbrowser
 import platform
 
+from clock import Clock, SYSTEM_CLOCK, NS_PER_SECOND
+from backend_selector import BackendSelector, LatencyHistogram, BACKEND_NAMES, DEFAULT_ORDER, format_report as format_backend_report
+from circuit_breaker import CircuitBreaker, CircuitState
+from log_filter import DedupFilter
+from profiles import ProfileManager
+from stats_engine import StatsEngine
+import span_tracer
+from timeline import TransitionRing, TimelineView, DEFAULT_CAPACITY as TIMELINE_CAPACITY
+from diagnostics import ResourceRecorder
+
 # 检测操作系统
 PLATFORM = sys.platform
 IS_WINDOWS = PLATFORM == 'win32'
@@ -32,6 +43,8 @@ IS_WINDOWS = PLATFORM == 'win32'
 # 导入平台相关模块 - 增强容错性
 HAS_WINDOWS_DEPS = False
 HAS_KEYBOARD_ALT = False
+winreg = None
+win32api = None
 
 if IS_WINDOWS:
     try:
@@ -89,9 +102,13 @@ def create_directories():
 create_directories()
 
 # 配置日志 - 使用轮转文件处理器防止日志过大
+# 重复日志去重过滤器(文件和控制台处理器共用)
+log_filter = DedupFilter()
+
 def setup_logging():
     """设置日志配置"""
-    logger = logging.getLogger(__name__)
+    # 使用固定名称，以便其他模块通过 "touchpad_manager.xxx" 子日志器共享处理器
+    logger = logging.getLogger("touchpad_manager")
     logger.setLevel(logging.INFO)
     
     # 清除现有处理器
@@ -114,6 +131,7 @@ def setup_logging():
             encoding='utf-8'
         )
         file_handler.setFormatter(formatter)
+        file_handler.addFilter(log_filter)
         logger.addHandler(file_handler)
     except Exception as e:
         print(f"无法创建日志文件: {e}")
@@ -122,6 +140,7 @@ def setup_logging():
     # 控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
+    console_handler.addFilter(log_filter)
     logger.addHandler(console_handler)
     
     return logger
@@ -163,14 +182,60 @@ class RegistryManager:
     
     AUTO_RUN_KEY_PATH = r"Software\Microsoft\Windows\CurrentVersion\Run"
     
-    def __init__(self):
+    # 笔记本厂商和型号 (HKEY_LOCAL_MACHINE)
+    BIOS_KEY_PATH = r"HARDWARE\DESCRIPTION\System\BIOS"
+    BIOS_VALUES = (("manufacturer", "SystemManufacturer"), ("model", "SystemProductName"), ("version", "SystemVersion"))
+    
+    # 低级钩子超时 (HKEY_CURRENT_USER，值 LowLevelHooksTimeout，毫秒)
+    HOOK_TIMEOUT_KEY_PATH = r"Control Panel\Desktop"
+    
+    # 设置更改广播 (win32con.HWND_BROADCAST / WM_SETTINGCHANGE)
+    HWND_BROADCAST = 0xFFFF
+    WM_SETTINGCHANGE = 0x001A
+    
+    # 兼容模式使用的 PowerShell 命令
+    PNP_DEVICE_FILTER = 'Get-PnpDevice -Class HIDClass | Where-Object {$_.FriendlyName -like \"*TouchPad*\" -or $_.FriendlyName -like \"*Touch Pad*\"}'
+    PNP_ENABLE_COMMAND = f'powershell "Enable-PnpDevice -Confirm:$false -InstanceId ({PNP_DEVICE_FILTER}).InstanceId"'
+    PNP_DISABLE_COMMAND = f'powershell "Disable-PnpDevice -Confirm:$false -InstanceId ({PNP_DEVICE_FILTER}).InstanceId"'
+    PNP_STATUS_COMMAND = f'powershell "({PNP_DEVICE_FILTER}).Status"'
+    
+    # 各控制方式作用的层: 注册表和快捷键控制驱动开关，兼容模式控制 PnP 设备，两层都启用时触控板才可用
+    BACKEND_LAYERS = {"registry": "driver", "shortcut": "driver", "compatibility": "device"}
+    # 可以直接设置为启用/禁用、在后台重新测试的控制方式(快捷键只能翻转，不参与)
+    RETEST_BACKENDS = ("registry", "compatibility")
+    
+    def __init__(self, winreg_api=None, win32_api=None, run_command: Optional[Callable] = None,
+                 keyboard_simulator=None, clock: Optional[Clock] = None,
+                 notifier_factory: Optional[Callable[[str], Any]] = None):
+        """winreg_api / win32_api / run_command / keyboard_simulator / notifier_factory 可替换为模拟实现(见 emulation 包)"""
+        self.winreg = winreg_api if winreg_api is not None else winreg
+        self.notifier_factory = notifier_factory
+        self.win32api = win32_api if win32_api is not None else win32api
+        self.run_command = run_command if run_command is not None else subprocess.run
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        
+        # 控制方式延迟/成功率统计和选择
+        self.backend_selector = BackendSelector(clock=self.clock)
+        self.requested_state: Optional[bool] = None
+        self.last_backend: Optional[str] = None  # 最近一次成功的控制方式
+        
+        # 每种控制方式一个熔断器; on_circuit_change(backend, old_state, new_state) 在状态变化时调用
+        self.on_circuit_change: Optional[Callable[[str, CircuitState, CircuitState], None]] = None
+        self.circuit_breakers = {
+            name: CircuitBreaker(name, clock=self.clock, on_transition=self._on_circuit_transition)
+            for name in DEFAULT_ORDER
+        }
+        self._backend_lock = threading.Lock()
+        self._retest_thread: Optional[threading.Thread] = None
+        self._disabled_backends: Set[str] = set()  # 上次启用后成功禁用过触控板的 RETEST_BACKENDS
+        
         self.detected_key_path: Optional[str] = None
         self.detected_value_name: Optional[str] = None
-        self.key_value_type = winreg.REG_DWORD
+        self.key_value_type = self.winreg.REG_DWORD if self.winreg is not None else 4
         self.invert_logic = False
         self.compatibility_mode = False
         self.use_keyboard_shortcut = False  # 是否使用键盘快捷键
-        self.keyboard_simulator = None
+        self.keyboard_simulator = keyboard_simulator
         
         # 检测控制方式
         self.detect_control_method()
@@ -179,62 +244,261 @@ class RegistryManager:
         """检测最佳的控制方式"""
         # 先尝试注册表检测
         if self.detect_touchpad_registry():
-            print("检测到有效的注册表控制方式")
+            logger.info("检测到有效的注册表控制方式")
             return True
         else:
             # 尝试初始化键盘模拟器
             try:
-                from keyboard_simulator import get_keyboard_simulator
-                self.keyboard_simulator = get_keyboard_simulator()
+                if self.keyboard_simulator is None:
+                    from keyboard_simulator import get_keyboard_simulator
+                    self.keyboard_simulator = get_keyboard_simulator()
                 if self.keyboard_simulator:
                     self.use_keyboard_shortcut = True
                     self.compatibility_mode = True
-                    print("将使用键盘快捷键控制触控板")
+                    logger.info("将使用键盘快捷键控制触控板")
                     return True
             except ImportError:
-                print("键盘模拟器不可用")
+                logger.warning("键盘模拟器不可用")
             
-            print("未找到有效的触控板控制方式")
+            logger.warning("未找到有效的触控板控制方式")
             return False
     
+    def redetect_control_method(self) -> bool:
+        """重新检测控制方式(保留延迟统计、熔断器、回调和键盘模拟器)"""
+        with self._backend_lock:
+            self.detected_key_path = None
+            self.detected_value_name = None
+            self.invert_logic = False
+            self.compatibility_mode = False
+            self.use_keyboard_shortcut = False
+            return self.detect_control_method()
+    
+    def available_backends(self) -> List[str]:
+        """当前可用的控制方式(按默认优先级)"""
+        backends = []
+        # 方法1: 检测到注册表方式
+        if not self.compatibility_mode and self.detected_key_path:
+            backends.append("registry")
+        # 方法2: 键盘快捷键（用于切换触控板）
+        if self.use_keyboard_shortcut and self.keyboard_simulator:
+            backends.append("shortcut")
+        # 方法3: 兼容模式（设备管理器）
+        backends.append("compatibility")
+        return backends
+    
     def set_touchpad_state(self, enable: bool) -> bool:
-        """设置触控板状态 - 使用多种方法"""
+        """设置触控板状态 - 按测得的延迟和成功率依次尝试多种方法"""
         # 记录操作
         action = "启用" if enable else "禁用"
-        print(f"尝试{action}触控板...")
+        logger.debug(f"尝试{action}触控板...")
+        self.requested_state = enable
+        
+        success = False
+        wait_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+        with self._backend_lock:
+            if wait_ns:
+                span_tracer.end("queue.backend_lock", wait_ns)
+            backends = self.backend_selector.order(self.available_backends())
+            attempted = False
+            for backend in backends:
+                # 熔断中的方式跳过，交给下一种方式
+                if not self.circuit_breakers[backend].allow():
+                    continue
+                attempted = True
+                if self._run_backend(backend, enable):
+                    success = True
+                    self.last_backend = backend
+                    break
+            
+            # 全部熔断时，启用请求仍然尝试所有方式，避免触控板一直处于禁用状态
+            if not attempted and enable:
+                for backend in backends:
+                    if self._run_backend(backend, enable):
+                        success = True
+                        self.last_backend = backend
+                        break
+            
+            if success and enable:
+                self._enable_other_layers()
+            elif success and self.last_backend in self.RETEST_BACKENDS:
+                self._disabled_backends.add(self.last_backend)
         
-        # 方法1: 如果检测到注册表方式，优先使用
-        if not self.compatibility_mode and self.detected_key_path:
-            success = self._set_via_registry(enable)
-            if success:
-                return True
+        self._start_retest()
+        return success
+    
+    def _backend_method(self, backend: str) -> Callable[[bool], bool]:
+        return {
+            "registry": self._set_via_registry,
+            "shortcut": self._set_via_shortcut,
+            "compatibility": self._set_via_compatibility,
+        }[backend]
+    
+    def _run_backend(self, backend: str, enable: bool) -> bool:
+        """调用一种控制方式并记录延迟和结果"""
+        method = self._backend_method(backend)
         
-        # 方法2: 使用键盘快捷键（用于切换触控板）
-        if self.use_keyboard_shortcut and self.keyboard_simulator:
-            # 注意：快捷键通常是切换而不是设置特定状态
-            # 所以我们先检测当前状态，然后决定是否需要切换
-            current_state = self.get_touchpad_state()
-            if current_state is not None:
-                # 如果当前状态与目标状态不同，发送快捷键
-                if (enable and not current_state) or (not enable and current_state):
-                    print(f"通过快捷键切换触控板状态")
-                    return self._send_touchpad_hotkey()
-                else:
-                    print(f"触控板已经是目标状态，无需操作")
-                    return True
+        span_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+        start_ns = self.clock.monotonic_ns()
+        try:
+            success = bool(method(enable))
+        except Exception as e:
+            logger.error(f"控制方式 {backend} 执行异常: {e}")
+            success = False
+        if span_ns:
+            span_tracer.end(f"backend.{backend}", span_ns)
+        self.backend_selector.record(backend, (self.clock.monotonic_ns() - start_ns) / NS_PER_SECOND, success)
+        
+        breaker = self.circuit_breakers[backend]
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        return success
+    
+    def configure_circuit_breakers(self, failure_threshold=None, base_backoff=None, max_backoff=None):
+        """应用熔断器配置"""
+        for breaker in self.circuit_breakers.values():
+            breaker.configure(failure_threshold, base_backoff, max_backoff)
+    
+    def _on_circuit_transition(self, backend: str, old_state: CircuitState, new_state: CircuitState):
+        """熔断器状态变化: 每次变化只记录一条日志"""
+        breaker = self.circuit_breakers[backend]
+        name = BACKEND_NAMES.get(backend, backend)
+        if new_state == CircuitState.OPEN:
+            logger.warning(f"控制方式 {name} 连续失败 {breaker.consecutive_failures} 次，暂停使用 {breaker.backoff:.0f} 秒")
+        elif new_state == CircuitState.HALF_OPEN:
+            logger.info(f"控制方式 {name} 退避结束，尝试恢复")
+        else:
+            logger.info(f"控制方式 {name} 已恢复")
+        
+        if self.on_circuit_change:
+            try:
+                self.on_circuit_change(backend, old_state, new_state)
+            except Exception as e:
+                logger.error(f"熔断通知失败: {e}")
+    
+    def _start_retest(self):
+        """在后台重新测试未被选中的控制方式"""
+        if self._retest_thread is not None and self._retest_thread.is_alive():
+            return
+        
+        candidates = [name for name in self.available_backends() if name in self.RETEST_BACKENDS]
+        due = self.backend_selector.due_retests(candidates)
+        if not due:
+            return
+        
+        self._retest_thread = threading.Thread(target=self._retest_backends, args=(due,), daemon=True)
+        self._retest_thread.start()
+    
+    def _enable_other_layers(self):
+        """启用成功后，恢复之前由另一层的控制方式禁用的触控板(调用时已持有 _backend_lock)"""
+        layer = self.BACKEND_LAYERS.get(self.last_backend)
+        for backend in sorted(self._disabled_backends):
+            if self.BACKEND_LAYERS[backend] == layer or self._run_backend(backend, True):
+                self._disabled_backends.discard(backend)
+    
+    def _retest_backends(self, backends: List[str]):
+        """重新设置一次，测量各方式当前的延迟和成功率，不改变触控板状态
+        
+        与最近一次成功的方式在同一层时重新设置请求的状态；在另一层时设置为启用(未选中的层本来就应启用)，
+        否则禁用状态会留在另一层，之后的启用只恢复选中的一层。
+        """
+        for backend in backends:
+            with self._backend_lock:
+                enable = self.requested_state
+                if enable is None:
+                    return
+                if self.BACKEND_LAYERS[backend] != self.BACKEND_LAYERS.get(self.last_backend):
+                    enable = True
+                if self.circuit_breakers[backend].allow() and self._run_backend(backend, enable) and enable:
+                    self._disabled_backends.discard(backend)
+    
+    def benchmark_backend(self, restore_state: bool, seconds: float = 30.0, pause: float = 0.25,
+                          progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """在真实硬件上反复切换触控板，测量当前首选控制方式的延迟，结束时恢复为 restore_state
+        
+        每次调用之间间隔 pause 秒并且只在调用期间持有控制锁；结果不计入控制方式的选择统计。
+        """
+        backends = self.backend_selector.order(self.available_backends())
+        backend = self.last_backend if self.last_backend in backends else (backends[0] if backends else None)
+        if backend is None:
+            return {"backend": None, "error": "没有可用的控制方式"}
+        
+        method = self._backend_method(backend)
+        histogram = LatencyHistogram()
+        failures = 0
+        enable = not restore_state
+        start_ns = self.clock.monotonic_ns()
+        deadline_ns = start_ns + int(seconds * NS_PER_SECOND)
+        logger.info(f"开始测试控制方式 {backend} ({seconds:.0f}秒)")
+        
+        while self.clock.monotonic_ns() < deadline_ns:
+            with self._backend_lock:
+                call_ns = self.clock.monotonic_ns()
+                try:
+                    success = bool(method(enable))
+                except Exception as e:
+                    logger.debug(f"测试控制方式 {backend} 出错: {e}")
+                    success = False
+                elapsed = (self.clock.monotonic_ns() - call_ns) / NS_PER_SECOND
+            if success:
+                histogram.add(elapsed)
             else:
-                # 无法检测状态，直接发送快捷键
-                print(f"无法检测当前状态，直接发送切换快捷键")
-                return self._send_touchpad_hotkey()
+                failures += 1
+            enable = not enable
+            if progress is not None:
+                progress(min(1.0, (self.clock.monotonic_ns() - start_ns) / (deadline_ns - start_ns)))
+            self.clock.sleep(pause)
+        
+        # 恢复测试前的状态(首选方式失败时按正常顺序尝试所有方式)
+        with self._backend_lock:
+            try:
+                restored = bool(method(restore_state))
+            except Exception:
+                restored = False
+        if not restored:
+            restored = self.set_touchpad_state(restore_state)
         
-        # 方法3: 使用兼容模式（设备管理器）
-        return self._set_via_compatibility(enable)
+        return {
+            "backend": backend,
+            "seconds": round((self.clock.monotonic_ns() - start_ns) / NS_PER_SECOND, 1),
+            "calls": histogram.count + failures,
+            "failures": failures,
+            "restored": restored,
+            "latency": histogram.summary(),
+        }
+    
+    def get_backend_report(self) -> Dict[str, Any]:
+        """控制方式的选择结果、延迟统计和熔断状态"""
+        report = self.backend_selector.snapshot(self.available_backends())
+        for name, data in report["backends"].items():
+            data["circuit"] = self.circuit_breakers[name].snapshot()
+        return report
+    
+    def _set_via_shortcut(self, enable: bool) -> bool:
+        """通过键盘快捷键设置触控板状态"""
+        # 注意：快捷键通常是切换而不是设置特定状态
+        # 所以我们先检测当前状态，然后决定是否需要切换
+        current_state = self.get_touchpad_state()
+        if current_state is not None:
+            # 如果当前状态与目标状态不同，发送快捷键
+            if (enable and not current_state) or (not enable and current_state):
+                logger.debug(f"通过快捷键切换触控板状态")
+                return self._send_touchpad_hotkey()
+            else:
+                logger.debug(f"触控板已经是目标状态，无需操作")
+                return True
+        else:
+            # 无法检测状态，直接发送快捷键
+            logger.debug(f"无法检测当前状态，直接发送切换快捷键")
+            return self._send_touchpad_hotkey()
     
     def _send_touchpad_hotkey(self) -> bool:
         """发送触控板切换快捷键"""
         if not self.keyboard_simulator:
             return False
         
+        start_ns = span_tracer.begin() if span_tracer.ENABLED else 0
         try:
             # 检查模拟器是否有 toggle_touchpad_hotkey 方法
             if hasattr(self.keyboard_simulator, 'toggle_touchpad_hotkey'):
@@ -244,18 +508,21 @@ class RegistryManager:
                 # 发送 F11 快捷键（最常见的触控板切换键）
                 return self.keyboard_simulator.send_shortcut(['F11'])
             else:
-                print("键盘模拟器没有可用的快捷键发送方法")
+                logger.error("键盘模拟器没有可用的快捷键发送方法")
                 return False
         except Exception as e:
-            print(f"发送触控板快捷键失败: {e}")
+            logger.error(f"发送触控板快捷键失败: {e}")
             return False
+        finally:
+            if start_ns:
+                span_tracer.end("backend.shortcut.inject", start_ns)
     
     def _set_via_registry(self, enable: bool) -> bool:
         """通过注册表设置触控板状态"""
         try:
             # 检查必需的注册表键值
             if not self.detected_key_path or not self.detected_value_name:
-                print("注册表键路径或值名称为空，无法通过注册表设置")
+                logger.error("注册表键路径或值名称为空，无法通过注册表设置")
                 return False
             
             # 根据逻辑反转设置计算值
@@ -265,29 +532,39 @@ class RegistryManager:
                 value = 1 if enable else 0  # 启用=1, 禁用=0
             
             # 打开注册表键进行写操作
-            key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER, 
+            tracing = span_tracer.ENABLED
+            start_ns = span_tracer.begin() if tracing else 0
+            key = self.winreg.OpenKey(
+                self.winreg.HKEY_CURRENT_USER, 
                 self.detected_key_path, 
                 0, 
-                winreg.KEY_SET_VALUE | winreg.KEY_READ
+                self.winreg.KEY_SET_VALUE | self.winreg.KEY_READ
             )
+            if tracing:
+                span_tracer.end("backend.registry.open", start_ns)
+                start_ns = span_tracer.begin()
             
-            winreg.SetValueEx(key, self.detected_value_name, 0, self.key_value_type, value)
-            winreg.CloseKey(key)
+            self.winreg.SetValueEx(key, self.detected_value_name, 0, self.key_value_type, value)
+            self.winreg.CloseKey(key)
+            if tracing:
+                span_tracer.end("backend.registry.write", start_ns)
+                start_ns = span_tracer.begin()
             
             # 通知系统设置已更改
             try:
                 # 修复：确保传递正确的参数类型
-                win32api.SendMessage(win32con.HWND_BROADCAST, win32con.WM_SETTINGCHANGE, 0, 0)
+                self.win32api.SendMessage(self.HWND_BROADCAST, self.WM_SETTINGCHANGE, 0, 0)
             except Exception as e:
-                print(f"发送设置更改消息失败: {e}")
+                logger.warning(f"发送设置更改消息失败: {e}")
                 # 继续执行，这不是致命错误
+            if tracing:
+                span_tracer.end("backend.registry.broadcast", start_ns)
             
-            print(f"通过注册表设置触控板: {'启用' if enable else '禁用'} (值={value})")
+            logger.debug(f"通过注册表设置触控板: {'启用' if enable else '禁用'} (值={value})")
             return True
             
         except Exception as e:
-            print(f"注册表设置失败: {e}")
+            logger.error(f"注册表设置失败: {e}")
             return False
     
     def _set_via_compatibility(self, enable: bool) -> bool:
@@ -295,129 +572,192 @@ class RegistryManager:
         try:
             if enable:
                 # 启用触控板
-                cmd = 'powershell "Enable-PnpDevice -Confirm:$false -InstanceId (Get-PnpDevice -Class HIDClass | Where-Object {$_.FriendlyName -like \"*TouchPad*\" -or $_.FriendlyName -like \"*Touch Pad*\"}).InstanceId"'
+                cmd = self.PNP_ENABLE_COMMAND
             else:
                 # 禁用触控板
-                cmd = 'powershell "Disable-PnpDevice -Confirm:$false -InstanceId (Get-PnpDevice -Class HIDClass | Where-Object {$_.FriendlyName -like \"*TouchPad*\" -or $_.FriendlyName -like \"*Touch Pad*\"}).InstanceId"'
+                cmd = self.PNP_DISABLE_COMMAND
             
-            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
+            start_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+            result = self.run_command(cmd, capture_output=True, text=True, shell=True)
+            if start_ns:
+                span_tracer.end("backend.powershell", start_ns)
             
             if result.returncode == 0:
-                print(f"兼容模式: 触控板已{'启用' if enable else '禁用'}")
+                logger.debug(f"兼容模式: 触控板已{'启用' if enable else '禁用'}")
                 return True
             else:
-                print(f"兼容模式设置失败: {result.stderr}")
+                logger.error(f"兼容模式设置失败: {result.stderr}")
                 return False
                 
         except Exception as e:
-            print(f"兼容模式执行失败: {e}")
+            logger.error(f"兼容模式执行失败: {e}")
             return False
     
     def detect_touchpad_registry(self) -> bool:
         """检测触控板注册表位置"""
-        if not HAS_WINDOWS_DEPS:
+        if self.winreg is None:
             return False
             
-        print("正在检测触控板注册表位置...")
+        logger.info("正在检测触控板注册表位置...")
         
         for key_path, value_name in self.TOUCHPAD_KEY_PATHS:
             try:
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, winreg.KEY_READ)
+                key = self.winreg.OpenKey(self.winreg.HKEY_CURRENT_USER, key_path, 0, self.winreg.KEY_READ)
                 try:
-                    value, reg_type = winreg.QueryValueEx(key, value_name)
+                    value, reg_type = self.winreg.QueryValueEx(key, value_name)
                     
                     # 记录找到的键
                     self.detected_key_path = key_path
                     self.detected_value_name = value_name
                     self.key_value_type = reg_type
                     
-                    print(f"检测到触控板注册表: {key_path}\\{value_name}")
-                    print(f"注册表类型: {reg_type}, 当前值: {value}")
+                    logger.info(f"检测到触控板注册表: {key_path}\\{value_name}")
+                    logger.info(f"注册表类型: {reg_type}, 当前值: {value}")
                     
                     # 判断是否需要反转逻辑
                     if "Disable" in value_name:
                         self.invert_logic = True
-                        print("检测到禁用式注册表键，启用反转逻辑")
+                        logger.info("检测到禁用式注册表键，启用反转逻辑")
                     
-                    winreg.CloseKey(key)
+                    self.winreg.CloseKey(key)
                     return True
                     
                 except FileNotFoundError:
-                    winreg.CloseKey(key)
+                    self.winreg.CloseKey(key)
                     continue
                 except Exception as e:
-                    winreg.CloseKey(key)
-                    print(f"读取注册表失败 {key_path}\\{value_name}: {e}")
+                    self.winreg.CloseKey(key)
+                    logger.warning(f"读取注册表失败 {key_path}\\{value_name}: {e}")
                     
             except FileNotFoundError:
                 continue
             except Exception as e:
-                print(f"打开注册表键失败 {key_path}: {e}")
+                logger.warning(f"打开注册表键失败 {key_path}: {e}")
         
-        print("未找到标准触控板注册表键")
+        logger.info("未找到标准触控板注册表键")
         return False
     
     def get_touchpad_state(self) -> Optional[bool]:
         """获取触控板状态 - 通过多种方法"""
-        if not HAS_WINDOWS_DEPS:
+        if self.winreg is None and self.run_command is subprocess.run:
             return None
         
         # 方法1: 通过注册表
         if self.detected_key_path and not self.compatibility_mode:
-            try:
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.detected_key_path, 0, winreg.KEY_READ)
-                value, _ = winreg.QueryValueEx(key, self.detected_value_name)
-                winreg.CloseKey(key)
-                
-                # 根据逻辑反转设置返回状态
-                if self.invert_logic:
-                    return bool(value == 0)
-                else:
-                    return bool(value)
-                    
-            except Exception as e:
-                print(f"注册表读取失败: {e}")
+            state = self.read_registry_state()
+            if state is not None:
+                return state
         
         # 方法2: 通过设备管理器（兼容模式）
         try:
-            cmd = 'powershell "(Get-PnpDevice -Class HIDClass | Where-Object {$_.FriendlyName -like \"*TouchPad*\" -or $_.FriendlyName -like \"*Touch Pad*\"}).Status"'
-            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
+            cmd = self.PNP_STATUS_COMMAND
+            result = self.run_command(cmd, capture_output=True, text=True, shell=True)
             
             if result.returncode == 0:
                 status = result.stdout.strip()
-                print(f"设备管理器状态: {status}")
+                logger.debug(f"设备管理器状态: {status}")
                 return "OK" in status or "Running" in status
             else:
-                print(f"设备管理器查询失败: {result.stderr}")
+                logger.warning(f"设备管理器查询失败: {result.stderr}")
                 return None
                 
         except Exception as e:
-            print(f"设备管理器查询异常: {e}")
+            logger.warning(f"设备管理器查询异常: {e}")
+            return None
+    
+    def read_registry_state(self) -> Optional[bool]:
+        """只通过注册表读取触控板状态(不启动 PowerShell)，失败返回 None"""
+        if self.winreg is None or not self.detected_key_path:
+            return None
+        
+        try:
+            key = self.winreg.OpenKey(self.winreg.HKEY_CURRENT_USER, self.detected_key_path, 0, self.winreg.KEY_READ)
+            value, _ = self.winreg.QueryValueEx(key, self.detected_value_name)
+            self.winreg.CloseKey(key)
+            
+            # 根据逻辑反转设置返回状态
+            if self.invert_logic:
+                return bool(value == 0)
+            else:
+                return bool(value)
+                
+        except Exception as e:
+            logger.warning(f"注册表读取失败: {e}")
+            return None
+    
+    def get_hook_timeout(self) -> Optional[float]:
+        """低级钩子超时 LowLevelHooksTimeout (秒)，未设置时返回 None"""
+        if self.winreg is None:
+            return None
+        try:
+            key = self.winreg.OpenKey(self.winreg.HKEY_CURRENT_USER, self.HOOK_TIMEOUT_KEY_PATH, 0, self.winreg.KEY_READ)
+            try:
+                value = self.winreg.QueryValueEx(key, "LowLevelHooksTimeout")[0]
+            finally:
+                self.winreg.CloseKey(key)
+            return int(value) / 1000 if int(value) > 0 else None
+        except (OSError, ValueError):
+            return None
+    
+    def get_machine_info(self) -> Dict[str, Optional[str]]:
+        """笔记本厂商、型号和检测到的触控板注册表路径(写入导出的统计和问题报告)"""
+        info = {field: None for field, _ in self.BIOS_VALUES}
+        if self.winreg is not None:
+            try:
+                key = self.winreg.OpenKey(self.winreg.HKEY_LOCAL_MACHINE, self.BIOS_KEY_PATH, 0, self.winreg.KEY_READ)
+                try:
+                    for field, value_name in self.BIOS_VALUES:
+                        try:
+                            info[field] = str(self.winreg.QueryValueEx(key, value_name)[0]).strip() or None
+                        except OSError:
+                            pass
+                finally:
+                    self.winreg.CloseKey(key)
+            except OSError as e:
+                logger.debug(f"读取BIOS信息失败: {e}")
+        
+        info["registry_path"] = (f"{self.detected_key_path}\\{self.detected_value_name}"
+                                 if self.detected_key_path else None)
+        return info
+    
+    def create_change_notifier(self):
+        """为检测到的触控板注册表键创建变更通知，不可用时返回 None(改用轮询)"""
+        if not self.detected_key_path:
             return None
+        if self.notifier_factory is not None:
+            return self.notifier_factory(self.detected_key_path)
+        if self.winreg is not None and self.winreg is winreg:
+            from registry_watcher import create_win32_notifier
+            return create_win32_notifier(self.detected_key_path)
+        return None
     
     def set_auto_start(self, app_name: str, app_path: str, enable: bool) -> bool:
         """设置开机自启动"""
+        if self.winreg is None:
+            logger.warning("注册表不可用，无法设置开机自启动")
+            return False
+        
         try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.AUTO_RUN_KEY_PATH, 0, winreg.KEY_SET_VALUE)
+            key = self.winreg.OpenKey(self.winreg.HKEY_CURRENT_USER, self.AUTO_RUN_KEY_PATH, 0, self.winreg.KEY_SET_VALUE)
             
             if enable:
                 # 添加开机启动
-                winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, f'"{app_path}" --minimized')
-                print(f"已设置开机自启动: {app_name}")
+                self.winreg.SetValueEx(key, app_name, 0, self.winreg.REG_SZ, f'"{app_path}" --minimized')
+                logger.info(f"已设置开机自启动: {app_name}")
             else:
                 # 移除开机启动
                 try:
-                    winreg.DeleteValue(key, app_name)
-                    print(f"已移除开机自启动: {app_name}")
+                    self.winreg.DeleteValue(key, app_name)
+                    logger.info(f"已移除开机自启动: {app_name}")
                 except FileNotFoundError:
                     # 如果键不存在，那就算了
                     pass
             
-            winreg.CloseKey(key)
+            self.winreg.CloseKey(key)
             return True
             
         except Exception as e:
-            print(f"设置开机自启动失败: {e}")
+            logger.error(f"设置开机自启动失败: {e}")
             return False
 
 class HotkeyManager:
@@ -425,8 +765,10 @@ class HotkeyManager:
     
     def __init__(self):
         self.hotkeys: Dict[str, Callable] = {}
+        self.alt_hotkeys: Dict[str, Callable] = {}  # 通过keyboard库注册的热键
         self.listener = None
         self.alt_listener = None
+        self.suspended_pynput: Optional[bool] = None  # suspend() 时 pynput 监听是否在运行
         
     def register_hotkey(self, key_combination: str, callback: Callable, use_alt_lib=False):
         """注册热键"""
@@ -437,6 +779,7 @@ class HotkeyManager:
         if use_alt_lib and HAS_KEYBOARD_ALT:
             try:
                 keyboard_alt.add_hotkey(key_combination, callback)
+                self.alt_hotkeys[key_combination] = callback
                 logger.info(f"使用keyboard库注册热键: {key_combination}")
             except Exception as e:
                 logger.error(f"使用keyboard库注册热键失败: {e}")
@@ -479,9 +822,33 @@ class HotkeyManager:
         if HAS_KEYBOARD_ALT:
             try:
                 keyboard_alt.unhook_all_hotkeys()
+                self.alt_hotkeys.clear()
                 logger.info("keyboard热键已清除")
             except Exception as e:
                 logger.error(f"清除keyboard热键失败: {e}")
+    
+    def suspend(self):
+        """暂停热键监听(会话锁定或睡眠期间)，resume() 恢复"""
+        if self.suspended_pynput is not None:
+            return
+        self.suspended_pynput = self.listener is not None
+        alt_hotkeys = dict(self.alt_hotkeys)
+        self.stop_listening()
+        self.alt_hotkeys = alt_hotkeys
+    
+    def resume(self):
+        """恢复 suspend() 暂停的热键监听"""
+        if self.suspended_pynput is None:
+            return
+        use_pynput, self.suspended_pynput = self.suspended_pynput, None
+        
+        if HAS_KEYBOARD_ALT:
+            for key_combination, callback in self.alt_hotkeys.items():
+                try:
+                    keyboard_alt.add_hotkey(key_combination, callback)
+                except Exception as e:
+                    logger.error(f"恢复keyboard热键失败: {e}")
+        self.start_listening(use_pynput)
 
 class ConfigManager:
     """配置管理器"""
@@ -517,7 +884,8 @@ class ConfigManager:
             "hotkeys": {
                 "toggle_touchpad": "ctrl+alt+t",
                 "toggle_monitoring": "ctrl+alt+m",
-                "exit_app": "ctrl+alt+q"
+                "exit_app": "ctrl+alt+q",
+                "toggle_profiler": "ctrl+alt+p"
             },
             "appearance": {
                 "theme": "default",
@@ -534,12 +902,71 @@ class ConfigManager:
             "logging": {
                 "level": "INFO",
                 "max_size_mb": 5,
-                "backup_count": 5
+                "backup_count": 5,
+                "dedup_interval": 60  # 相同日志在此秒数内只记录一次，之后汇总重复次数；0 为不去重
+            },
+            "backend_selection": {
+                "enabled": True,  # 按测得的延迟自动选择最快的控制方式
+                "min_success_rate": 0.8,
+                "min_samples": 3,
+                "retest_interval": 300  # 秒，0 表示不在后台重新测试
+            },
+            "registry_watcher": {
+                "enabled": True,  # 检测 Fn 键或其他工具在外部切换触控板
+                "min_poll_interval": 0.5,  # 变更通知不可用时的轮询间隔(秒)，状态不变时逐步加倍
+                "max_poll_interval": 30
+            },
+            "profiles": {
+                # 按前台应用的可执行文件名覆盖设置，例如:
+                # "code.exe": {"idle_threshold": 1.5}, "mspaint.exe": {"auto_disable": False}
+            },
+            "metrics": {
+                "enabled": False,  # 本地指标端点 http://127.0.0.1:9464/metrics (Prometheus 文本格式)
+                "host": "127.0.0.1",  # 只允许回环地址
+                "port": 9464
+            },
+            "timeline": {
+                "capacity": 4096,  # 内存中保留的最近切换数(统计页时间线)
+                "window_minutes": 60  # 时间线显示的时长
+            },
+            "history": {
+                "enabled": True,  # 切换历史保存在 SQLite 数据库中
+                "path": "",  # 留空使用 log/touchpad_history.db
+                "retention_days": 90,  # 明细保留天数
+                "rollup_retention_days": 730  # 按天汇总保留天数
+            },
+            "profiler": {
+                "interval_ms": 10,  # 采样间隔(单次采样耗时过长时自动加倍)
+                "max_seconds": 300,  # 超过后自动停止并写入 log/profile_*.collapsed
+                "max_stacks": 5000  # 保留的不同调用栈数量上限
+            },
+            "diagnostics": {
+                "benchmark_seconds": 30  # 报告问题时可选的控制方式测试时长(0 为不测试)
+            },
+            "hook_watchdog": {
+                "enabled": True,  # 检测被系统静默移除的键盘钩子并自动重新安装
+                "check_interval": 2.0,  # 对比系统输入时间的间隔(秒)
+                "silent_checks": 3  # 连续几次有按键输入但钩子没有收到事件时判定失效
+            },
+            "game_mode": {
+                "enabled": True,  # 以下应用或全屏应用在前台时卸载键盘钩子
+                "pause_on_fullscreen": True,
+                "processes": ["mstsc.exe", "msrdc.exe", "vmconnect.exe"]
+            },
+            "session_monitor": {
+                "enabled": True,  # 锁屏/睡眠时暂停键盘钩子和定时器
+                "pause_on_display_off": True  # 显示器关闭时也暂停
+            },
+            "circuit_breaker": {
+                "failure_threshold": 3,  # 连续失败多少次后暂停使用该控制方式
+                "base_backoff": 5,  # 首次暂停秒数，之后每次试探失败加倍
+                "max_backoff": 300
             },
             "keyboard_shortcut": {
                 "enabled": False,
                 "keys": ["F11"],
-                "display": "F11"
+                "display": "F11",
+                "hold_time": 0.1  # 按键保持时间(秒)，0 为一次性提交按下和释放(部分笔记本不识别)
             }
         }
     
@@ -633,30 +1060,76 @@ class ConfigManager:
 class TouchpadManager:
     """触控板管理器 - 增强版：支持多种控制方式和状态检测"""
     
-    def __init__(self):
+    # 监控线程检查空闲状态的周期(秒)
+    MONITOR_INTERVAL = 0.3
+    
+    def __init__(self, registry_manager: Optional[RegistryManager] = None, clock: Optional[Clock] = None):
+        # 间隔计算全部使用单调时钟(纳秒)，墙上时间只用于显示
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
         self.touchpad_state = TouchpadState.UNKNOWN
-        self.last_activity_time = time.time()
+        self.last_activity_ns = self.clock.monotonic_ns()
+        self.last_keypress_ns: Optional[int] = None
+        self.last_idle_enable_ns = self.last_activity_ns  # 上次因空闲自动启用的时间
+        self.session_start_ns: Optional[int] = None
         self.is_monitoring = False
         self.monitor_thread = None
         self.keyboard_listener = None
+        self.listener_factory = None  # 可替换为模拟监听器(emulation.FakeKeyboardHook)，默认 pynput
+        self.hook_watchdog = None  # 检测被系统移除的键盘钩子
+        self.trace_recorder = None
+        self.registry_watcher = None
+        self.external_disable = False  # 触控板被外部(Fn键或其他工具)禁用时不自动启用
+        self._setting_touchpad = False
+        self.session_monitor = None
+        self.session_paused = False  # 锁屏/睡眠期间暂停钩子和定时器
+        self._session_resumed = threading.Event()
+        self._session_resumed.set()
+        
+        # 游戏/全屏应用在前台时卸载键盘钩子
+        self.foreground_monitor = None
+        self.hook_paused_for: Optional[str] = None
+        self.hook_paused_since_ns: Optional[int] = None
+        self.hook_pauses = deque(maxlen=50)  # 最近的暂停区间
+        self.hook_pause_count = 0
+        self.hook_paused_ns = 0
+        self.hook_uninstall_latency = LatencyHistogram()
+        self.hook_reinstall_latency = LatencyHistogram()
+        
+        # 本地指标端点(默认关闭)；键盘回调耗时只在看门狗、端点或流程跟踪开启时测量
+        self.metrics_server = None
+        self.hook_callback_latency = LatencyHistogram()
+        self.time_hook_callback = False
+        self.monitor_wakeups = 0
+        
+        # 切换流程跟踪 (--trace)
+        self.span_trace_path: Optional[str] = None
+        
+        # 采样分析器(界面按钮、热键或 --profile 开启)
+        self.profiler = None
+        
+        # 进程内存随时间的变化(诊断包)；测试控制方式期间不自动切换
+        self.resource_recorder = ResourceRecorder(self.clock)
+        self.benchmarking = False
+        
         self.idle_threshold = 5.0  # 默认5秒
         
-        # 统计数据
-        self.stats = {
-            "disabled_count": 0,
-            "enabled_count": 0,
-            "total_runtime": 0,
-            "start_time": None,
-            "last_disable_time": None,
-            "last_enable_time": None,
-            "last_keypress_time": None
-        }
+        # 按前台应用选择的配置(空闲阈值、是否自动禁用)
+        self.profiles = ProfileManager(clock=self.clock)
+        
+        # 切换历史(SQLite)，由 start_history 打开
+        self.history = None
+        
+        # 统计数据(流式更新，get_stats 读取快照)
+        self.stats = StatsEngine(self.clock)
         
         # 初始化管理器
         self.config_manager = ConfigManager()
-        self.registry_manager = RegistryManager()
+        self.registry_manager = registry_manager if registry_manager is not None else RegistryManager()
         self.hotkey_manager = HotkeyManager()
         
+        # 最近的状态切换(固定容量，统计页时间线读取)
+        self.transitions = TransitionRing(int(self.config_manager.get("timeline.capacity", TIMELINE_CAPACITY)))
+        
         # 加载配置
         self.load_config()
         
@@ -669,6 +1142,38 @@ class TouchpadManager:
         """加载配置"""
         self.idle_threshold = self.config_manager.get("idle_threshold", 5.0)
         logger.info(f"加载配置: 空闲阈值={self.idle_threshold}秒")
+        
+        # 按应用的配置
+        self.profiles.configure(self.config_manager.get("profiles", {}))
+        
+        # 重复日志去重
+        log_filter.summary_interval = float(self.config_manager.get("logging.dedup_interval", 60))
+        
+        # 控制方式选择策略
+        selector = getattr(self.registry_manager, "backend_selector", None)
+        if selector is not None:
+            selector.configure(
+                self.config_manager.get("backend_selection.enabled"),
+                self.config_manager.get("backend_selection.min_success_rate"),
+                self.config_manager.get("backend_selection.min_samples"),
+                self.config_manager.get("backend_selection.retest_interval")
+            )
+        
+        # 控制方式熔断器
+        if hasattr(self.registry_manager, "configure_circuit_breakers"):
+            self.registry_manager.configure_circuit_breakers(
+                self.config_manager.get("circuit_breaker.failure_threshold"),
+                self.config_manager.get("circuit_breaker.base_backoff"),
+                self.config_manager.get("circuit_breaker.max_backoff")
+            )
+        
+        # 快捷键控制方式: 应用配置的快捷键和按键保持时间
+        simulator = getattr(self.registry_manager, "keyboard_simulator", None)
+        if simulator is not None and hasattr(simulator, "configure"):
+            simulator.configure(
+                self.config_manager.get("keyboard_shortcut.keys"),
+                self.config_manager.get("keyboard_shortcut.hold_time")
+            )
     
     def detect_touchpad(self) -> bool:
         """检测触控板状态"""
@@ -676,6 +1181,9 @@ class TouchpadManager:
             state = self.registry_manager.get_touchpad_state()
             if state is not None:
                 self.touchpad_state = TouchpadState.from_bool(state)
+                now_ns = self.clock.monotonic_ns()
+                self.stats.record_state(state, now_ns)
+                self.transitions.append(now_ns / NS_PER_SECOND, state)
                 logger.info(f"触控板状态: {self.touchpad_state.value}")
                 return True
             else:
@@ -687,25 +1195,32 @@ class TouchpadManager:
             self.touchpad_state = TouchpadState.UNKNOWN
             return False
     
-    def set_touchpad(self, enable: bool, force=False) -> bool:
-        """设置触控板状态"""
+    def set_touchpad(self, enable: bool, force=False, cause: str = "manual") -> bool:
+        """设置触控板状态
+        
+        cause 记录在切换历史中: typing / idle / manual / session / stop / profile / test
+        """
+        if self.benchmarking:
+            logger.debug("正在测试控制方式，跳过设置")
+            return False
+        
         # 如果状态相同且不强制，则跳过
         current_state_bool = self.touchpad_state == TouchpadState.ENABLED
         if not force and current_state_bool == enable:
             logger.debug(f"触控板状态已为{'启用' if enable else '禁用'}，跳过设置")
             return True
         
+        self._setting_touchpad = True
+        span_ns = span_tracer.begin() if span_tracer.ENABLED else 0
         try:
+            start_ns = self.clock.monotonic_ns()
             if self.registry_manager.set_touchpad_state(enable):
+                now_ns = self.clock.monotonic_ns()
                 self.touchpad_state = TouchpadState.ENABLED if enable else TouchpadState.DISABLED
+                self.external_disable = False
                 
                 # 更新统计
-                if enable:
-                    self.stats["enabled_count"] += 1
-                    self.stats["last_enable_time"] = time.time()
-                else:
-                    self.stats["disabled_count"] += 1
-                    self.stats["last_disable_time"] = time.time()
+                self._record_transition(enable, cause, now_ns, (now_ns - start_ns) / NS_PER_SECOND)
                 
                 # 播放声音提示
                 if self.config_manager.get("enable_sounds") and HAS_WINSOUND:
@@ -719,9 +1234,375 @@ class TouchpadManager:
         except Exception as e:
             logger.error(f"设置触控板时出错: {e}")
             return False
+        finally:
+            self._setting_touchpad = False
+            if span_ns:
+                span_tracer.end("actuation.enable" if enable else "actuation.disable", span_ns)
+    
+    def benchmark_backend(self, seconds: float = 30.0,
+                          progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """在真实硬件上测试当前控制方式(诊断包)，期间暂停自动切换，结束后恢复触控板状态"""
+        if not hasattr(self.registry_manager, "benchmark_backend"):
+            return {"backend": None, "error": "不支持"}
+        
+        restore_state = self.touchpad_state != TouchpadState.DISABLED
+        self.benchmarking = True
+        self._setting_touchpad = True  # 注册表监视忽略测试造成的变化
+        try:
+            return self.registry_manager.benchmark_backend(restore_state, seconds, progress=progress)
+        finally:
+            self._setting_touchpad = False
+            self.benchmarking = False
+    
+    def _record_transition(self, enable: bool, cause: str, now_ns: int, latency: Optional[float] = None):
+        """记录一次触控板状态变化(统计和切换历史)"""
+        if cause == "external":
+            dwell = self.stats.record_state(enable, now_ns)
+            backend = None
+        else:
+            dwell = self.stats.record_toggle(enable, now_ns, latency)
+            backend = getattr(self.registry_manager, "last_backend", None)
+            if enable:
+                self.profiles.active.enabled_count += 1
+            else:
+                self.profiles.active.disabled_count += 1
+        
+        self.transitions.append(now_ns / NS_PER_SECOND, enable)
+        if self.history is not None:
+            self.history.record(self.clock.to_wall_time(now_ns), enable, cause, backend, latency, dwell)
+    
+    def start_history(self) -> bool:
+        """打开切换历史数据库(后台批量写入)"""
+        if self.history is not None:
+            return True
+        if not self.config_manager.get("history.enabled", True):
+            return False
+        
+        from history_store import HistoryStore, DEFAULT_HISTORY_PATH
+        
+        try:
+            history = HistoryStore(
+                self.config_manager.get("history.path") or DEFAULT_HISTORY_PATH,
+                retention_days=self.config_manager.get("history.retention_days", 90),
+                rollup_retention_days=self.config_manager.get("history.rollup_retention_days", 730)
+            )
+            history.open()
+        except Exception as e:
+            logger.error(f"打开切换历史失败: {e}")
+            return False
+        
+        self.history = history
+        return True
+    
+    def start_metrics_server(self) -> bool:
+        """启动本地指标端点(Prometheus 文本格式，只监听回环地址)"""
+        if self.metrics_server is not None:
+            return True
+        if not self.config_manager.get("metrics.enabled", False):
+            return False
+        
+        from metrics_server import MetricsServer, collect_metrics, DEFAULT_HOST, DEFAULT_PORT
+        
+        server = MetricsServer(
+            lambda: collect_metrics(self),
+            self.config_manager.get("metrics.host", DEFAULT_HOST),
+            int(self.config_manager.get("metrics.port", DEFAULT_PORT))
+        )
+        try:
+            server.start()
+        except OSError as e:
+            logger.error(f"启动指标端点失败: {e}")
+            return False
+        
+        self.metrics_server = server
+        self._update_hook_timing()
+        return True
+    
+    def stop_metrics_server(self):
+        """停止本地指标端点"""
+        server = self.metrics_server
+        if server is not None:
+            self.metrics_server = None
+            self._update_hook_timing()
+            server.stop()
+    
+    def stop_history(self):
+        """写入剩余的切换历史并关闭"""
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+    
+    def on_external_change(self, enabled: bool):
+        """注册表监视检测到触控板状态变化(由注册表监视线程调用)"""
+        # 本程序正在写入时的变化是自己造成的
+        if self._setting_touchpad:
+            return
+        
+        new_state = TouchpadState.from_bool(enabled)
+        if new_state == self.touchpad_state:
+            return
+        
+        self.touchpad_state = new_state
+        self.external_disable = not enabled
+        self._record_transition(enabled, "external", self.clock.monotonic_ns())
+        if enabled:
+            logger.info("检测到触控板在外部被启用")
+        else:
+            logger.info("检测到触控板在外部被禁用，暂停自动启用")
+    
+    def start_registry_watcher(self) -> bool:
+        """启动注册表监视，检测外部切换触控板"""
+        if self.registry_watcher is not None:
+            return True
+        if not self.config_manager.get("registry_watcher.enabled", True):
+            return False
+        
+        registry_manager = self.registry_manager
+        if not hasattr(registry_manager, "read_registry_state") or registry_manager.read_registry_state() is None:
+            logger.info("没有可读取的触控板注册表值，不启动注册表监视")
+            return False
+        
+        from registry_watcher import RegistryWatcher
+        
+        self.registry_watcher = RegistryWatcher(
+            registry_manager.read_registry_state,
+            self.on_external_change,
+            notifier=registry_manager.create_change_notifier(),
+            min_interval=self.config_manager.get("registry_watcher.min_poll_interval", 0.5),
+            max_interval=self.config_manager.get("registry_watcher.max_poll_interval", 30.0)
+        )
+        self.registry_watcher.start()
+        return True
+    
+    def stop_registry_watcher(self):
+        """停止注册表监视"""
+        if self.registry_watcher is not None:
+            self.registry_watcher.stop()
+            self.registry_watcher = None
+    
+    def redetect_control_method(self) -> bool:
+        """重新检测控制方式，重新应用配置并按新的注册表位置重启注册表监视"""
+        result = self.registry_manager.redetect_control_method()
+        self.load_config()
+        if self.registry_watcher is not None:
+            self.stop_registry_watcher()
+            self.start_registry_watcher()
+        return result
+    
+    def start_foreground_monitor(self, source=None) -> bool:
+        """监视前台应用，游戏或全屏应用在前台时卸载键盘钩子
+        
+        source 为 None 时使用 Windows 前台窗口事件(不可用时返回 False)
+        """
+        if self.foreground_monitor is not None:
+            return True
+        if not self.config_manager.get("game_mode.enabled", True) and not self.profiles.profiles:
+            return False
+        
+        from foreground_monitor import ForegroundMonitor, create_win32_foreground_source
+        
+        if source is None:
+            source = create_win32_foreground_source()
+            if source is None:
+                return False
+        
+        monitor = ForegroundMonitor(source)
+        monitor.add_listener(self.on_foreground_change)
+        self.foreground_monitor = monitor
+        return monitor.start()
+    
+    def stop_foreground_monitor(self):
+        """停止前台应用监视，并结束当前的钩子暂停"""
+        if self.foreground_monitor is not None:
+            self.foreground_monitor.stop()
+            self.foreground_monitor = None
+        if self.hook_paused_for is not None:
+            self._end_hook_pause()
+    
+    def hook_pause_reason(self, window) -> Optional[str]:
+        """前台窗口需要卸载键盘钩子时返回原因"""
+        if not self.config_manager.get("game_mode.enabled", True):
+            return None
+        processes = [name.lower() for name in self.config_manager.get("game_mode.processes", [])]
+        if window.process_name in processes:
+            return window.process_name
+        if window.fullscreen and self.config_manager.get("game_mode.pause_on_fullscreen", True):
+            return f"全屏应用 {window.process_name or window.pid}"
+        return None
+    
+    def on_foreground_change(self, window):
+        """前台应用变化(由前台监视线程调用)"""
+        profile = self.profiles.activate(window.pid, window.process_name)
+        
+        # 切换到不自动禁用的应用(如绘图软件)时立即恢复触控板
+        if (not profile.auto_disable and self.is_monitoring and
+                self.touchpad_state == TouchpadState.DISABLED and not self.external_disable):
+            self.set_touchpad(True, cause="profile")
+        
+        reason = self.hook_pause_reason(window)
+        if reason is not None and self.hook_paused_for is None:
+            self.pause_keyboard_hook(reason)
+        elif reason is None and self.hook_paused_for is not None:
+            self.resume_keyboard_hook()
+    
+    def pause_keyboard_hook(self, reason: str):
+        """完全卸载键盘钩子，避免给游戏/远程桌面的每次按键增加延迟"""
+        self.hook_paused_for = reason
+        self.hook_paused_since_ns = self.clock.monotonic_ns()
+        self.hook_pause_count += 1
+        
+        listener = self.keyboard_listener
+        if listener is None:
+            logger.info(f"前台为 {reason}，暂停键盘监听")
+            return
+        
+        start_ns = self.clock.monotonic_ns()
+        self.stop_keyboard_listener()
+        listener.join(1.0)
+        elapsed = (self.clock.monotonic_ns() - start_ns) / NS_PER_SECOND
+        self.hook_uninstall_latency.add(elapsed)
+        logger.info(f"前台为 {reason}，已卸载键盘钩子 ({elapsed * 1000:.1f}ms)")
+    
+    def resume_keyboard_hook(self):
+        """离开游戏/全屏应用后重新安装键盘钩子"""
+        reason = self._end_hook_pause()
+        if not self.is_monitoring or self.session_paused:
+            return
+        
+        start_ns = self.clock.monotonic_ns()
+        if not self.start_keyboard_listener():
+            logger.warning("重新安装键盘钩子失败")
+            return
+        if self.keyboard_listener is not None and hasattr(self.keyboard_listener, "wait"):
+            self.keyboard_listener.wait()
+        elapsed = (self.clock.monotonic_ns() - start_ns) / NS_PER_SECOND
+        self.hook_reinstall_latency.add(elapsed)
+        logger.info(f"已离开 {reason}，重新安装键盘钩子 ({elapsed * 1000:.1f}ms)")
+    
+    def _end_hook_pause(self) -> Optional[str]:
+        """记录一个暂停区间，返回暂停原因"""
+        reason, self.hook_paused_for = self.hook_paused_for, None
+        now_ns = self.clock.monotonic_ns()
+        duration_ns = now_ns - self.hook_paused_since_ns
+        self.hook_paused_ns += duration_ns
+        self.hook_pauses.append({
+            "start": self.clock.to_wall_time(self.hook_paused_since_ns),
+            "duration": round(duration_ns / NS_PER_SECOND, 3),
+            "reason": reason,
+        })
+        self.hook_paused_since_ns = None
+        return reason
+    
+    def get_hook_pause_report(self) -> Dict[str, Any]:
+        """键盘钩子暂停区间和卸载/重新安装耗时"""
+        paused_ns = self.hook_paused_ns
+        if self.hook_paused_since_ns is not None:
+            paused_ns += self.clock.monotonic_ns() - self.hook_paused_since_ns
+        
+        def latency(histogram):
+            return {
+                "count": histogram.count,
+                "p50_ms": round(histogram.percentile(50) * 1000, 3),
+                "p99_ms": round(histogram.percentile(99) * 1000, 3),
+            }
+        
+        return {
+            "paused_for": self.hook_paused_for,
+            "pause_count": self.hook_pause_count,
+            "paused_seconds": round(paused_ns / NS_PER_SECOND, 1),
+            "pauses": list(self.hook_pauses),
+            "uninstall": latency(self.hook_uninstall_latency),
+            "reinstall": latency(self.hook_reinstall_latency),
+            "foreground": self.foreground_monitor.stats() if self.foreground_monitor is not None else None,
+            "watchdog": self.hook_watchdog.stats() if self.hook_watchdog is not None else None,
+        }
+    
+    def start_session_monitor(self, source=None) -> bool:
+        """监视锁屏/睡眠/显示器状态，暂停期间释放键盘钩子和定时器
+        
+        source 为 None 时使用 Windows 会话通知(不可用时返回 False)
+        """
+        if self.session_monitor is not None:
+            return True
+        if not self.config_manager.get("session_monitor.enabled", True):
+            return False
+        
+        from session_monitor import SessionMonitor, create_win32_session_source
+        
+        if source is None:
+            source = create_win32_session_source()
+            if source is None:
+                return False
+        
+        monitor = SessionMonitor(
+            source,
+            pause_on_display_off=self.config_manager.get("session_monitor.pause_on_display_off", True),
+            clock=self.clock
+        )
+        monitor.register_timer("activity_monitor", self.MONITOR_INTERVAL)
+        monitor.add_listener(self.on_session_change)
+        self.session_monitor = monitor
+        return monitor.start()
+    
+    def stop_session_monitor(self):
+        """停止会话状态监视"""
+        if self.session_monitor is not None:
+            self.session_monitor.stop()
+            self.session_monitor = None
+    
+    def on_session_change(self, active: bool, event=None):
+        """会话状态变化(由会话事件线程调用)"""
+        if active:
+            self.resume_session()
+        else:
+            self.suspend_session()
+    
+    def suspend_session(self):
+        """会话锁定或睡眠: 恢复安全状态(触控板启用)，释放钩子并暂停定时器"""
+        if self.session_paused:
+            return
+        
+        # 解锁后用户可能先用触控板，锁定前确保触控板可用
+        if self.touchpad_state == TouchpadState.DISABLED and not self.external_disable:
+            self.set_touchpad(True, force=True, cause="session")
+        
+        self.session_paused = True
+        self._session_resumed.clear()
+        self.stop_keyboard_listener()
+        self.stop_registry_watcher()
+        self.hotkey_manager.suspend()
+    
+    def resume_session(self):
+        """会话恢复: 核对一次触控板状态，重新安装钩子"""
+        if not self.session_paused:
+            return
+        
+        # 只读取注册表值(无需调用 PowerShell)，读不到时保留锁定前设置的状态
+        read_state = getattr(self.registry_manager, "read_registry_state", None)
+        state = read_state() if read_state is not None else None
+        if state is not None and TouchpadState.from_bool(state) != self.touchpad_state:
+            logger.info(f"会话恢复时触控板状态已变为{'启用' if state else '禁用'}")
+            self.touchpad_state = TouchpadState.from_bool(state)
+            self.external_disable = not state
+            self._record_transition(state, "external", self.clock.monotonic_ns())
+        
+        # 锁定期间的时间不算作空闲或打字
+        now_ns = self.clock.monotonic_ns()
+        self.last_activity_ns = now_ns
+        self.last_idle_enable_ns = now_ns
+        
+        self.session_paused = False
+        self.hotkey_manager.resume()
+        if self.is_monitoring:
+            self.start_registry_watcher()
+            self.start_foreground_monitor()
+            if not self.start_keyboard_listener():
+                logger.warning("会话恢复后键盘监听启动失败")
+        self._session_resumed.set()
     
     def play_sound(self, enable: bool):
         """播放声音提示"""
+        start_ns = span_tracer.begin() if span_tracer.ENABLED else 0
         try:
             if enable:
                 winsound.Beep(1000, 100)  # 启用声音
@@ -729,30 +1610,170 @@ class TouchpadManager:
                 winsound.Beep(500, 100)   # 禁用声音
         except Exception as e:
             logger.warning(f"播放声音失败: {e}")
+        if start_ns:
+            span_tracer.end("sound.beep", start_ns)
     
     def on_key_press(self, key):
         """键盘按下事件处理"""
+        if not self.time_hook_callback:
+            return self._handle_key_press(key)
+        
+        start_ns = time.perf_counter_ns()
+        result = self._handle_key_press(key)
+        end_ns = time.perf_counter_ns()
+        watchdog = self.hook_watchdog
+        if watchdog is not None:
+            watchdog.record_callback(self.last_keypress_ns, end_ns - start_ns)
+        self.hook_callback_latency.add((end_ns - start_ns) / NS_PER_SECOND)
+        if span_tracer.ENABLED:
+            span_tracer.end("hook.callback", start_ns, end_ns)
+        return result
+    
+    def _update_hook_timing(self):
+        """看门狗、指标端点或流程跟踪开启时才测量键盘回调耗时"""
+        self.time_hook_callback = (self.hook_watchdog is not None or self.metrics_server is not None or
+                                   span_tracer.ENABLED)
+    
+    def start_span_trace(self, path: str, capacity: Optional[int] = None):
+        """开始记录切换流程的耗时区间，stop_span_trace 时写入 path (Chrome trace 格式)"""
+        self.span_trace_path = path
+        span_tracer.start(capacity or span_tracer.DEFAULT_CAPACITY)
+        self._update_hook_timing()
+        logger.info(f"切换流程跟踪已开始，退出时写入: {path}")
+    
+    def stop_span_trace(self):
+        """停止记录并写入跟踪文件"""
+        path, self.span_trace_path = self.span_trace_path, None
+        if path is None:
+            return
         try:
-            current_time = time.time()
-            self.last_activity_time = current_time
-            self.stats["last_keypress_time"] = current_time
+            span_tracer.stop(path)
+        except Exception as e:
+            logger.error(f"写入跟踪文件失败: {e}")
+        self._update_hook_timing()
+    
+    @property
+    def profiling(self) -> bool:
+        return self.profiler is not None and self.profiler.running
+    
+    def start_profiler(self, path: Optional[str] = None) -> bool:
+        """开始采样所有线程的调用栈，停止时写入 path (默认 log/profile_<时间>.collapsed)"""
+        if self.profiling:
+            return True
+        
+        from sampling_profiler import SamplingProfiler
+        
+        if path is None:
+            path = os.path.join("log", f"profile_{time.strftime('%Y%m%d_%H%M%S')}.collapsed")
+        try:
+            self.profiler = SamplingProfiler(
+                path,
+                interval=self.config_manager.get("profiler.interval_ms", 10) / 1000,
+                max_seconds=self.config_manager.get("profiler.max_seconds", 300),
+                max_stacks=self.config_manager.get("profiler.max_stacks", 5000),
+            )
+            self.profiler.start()
+            return True
+        except Exception as e:
+            logger.error(f"启动采样分析失败: {e}")
+            self.profiler = None
+            return False
+    
+    def stop_profiler(self) -> Optional[str]:
+        """停止采样并写入结果，返回文件路径"""
+        if self.profiler is None or not self.profiler.running:
+            return None
+        return self.profiler.stop()
+    
+    def toggle_profiler(self) -> Optional[str]:
+        """切换采样分析，停止时返回结果文件路径"""
+        if self.profiling:
+            return self.stop_profiler()
+        self.start_profiler()
+        return None
+    
+    def get_profile_report(self) -> Optional[Dict[str, Any]]:
+        """最近一次采样的统计和最常见的调用栈(正在采样时先写入当前结果)"""
+        profiler = self.profiler
+        if profiler is None:
+            return None
+        if profiler.running:
+            try:
+                profiler.write(profiler.path)
+            except Exception as e:
+                logger.error(f"写入采样结果失败: {e}")
+        report = profiler.stats()
+        report["top_stacks"] = profiler.top_stacks()
+        return report
+    
+    def _handle_key_press(self, key):
+        try:
+            now_ns = self.clock.monotonic_ns()
+            self.last_activity_ns = now_ns
+            self.last_keypress_ns = now_ns
+            self.stats.record_keystroke(now_ns)
             
-            # 只有在监控中且触控板启用时才禁用它
-            if self.is_monitoring and self.touchpad_state == TouchpadState.ENABLED:
+            if self.trace_recorder is not None:
+                self.trace_recorder.record(key)
+            
+            span_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+            profile = self.profiles.active
+            profile.keypresses += 1
+            
+            # 只有在监控中且触控板启用时才禁用它(当前应用的配置可以关闭自动禁用)
+            disable = self.is_monitoring and self.touchpad_state == TouchpadState.ENABLED and profile.auto_disable
+            if span_ns:
+                span_tracer.end("policy.typing_decision", span_ns)
+            if disable:
                 logger.debug("检测到按键，禁用触控板")
-                self.set_touchpad(False)
+                self.set_touchpad(False, cause="typing")
             
             return True  # 继续传递事件
         except Exception as e:
             logger.error(f"处理按键事件时出错: {e}")
             return True
     
+    def start_trace_recording(self, path: str, capacity: Optional[int] = None) -> bool:
+        """开始记录按键时间轨迹(只记录时间戳和按键类别)"""
+        self.stop_trace_recording()
+        try:
+            from trace_recorder import TraceRecorder, DEFAULT_CAPACITY
+            self.trace_recorder = TraceRecorder(path, capacity or DEFAULT_CAPACITY)
+            return True
+        except Exception as e:
+            logger.error(f"启动按键轨迹记录失败: {e}")
+            self.trace_recorder = None
+            return False
+    
+    def stop_trace_recording(self):
+        """停止记录按键时间轨迹"""
+        recorder = self.trace_recorder
+        if recorder is None:
+            return
+        
+        self.trace_recorder = None
+        try:
+            recorder.close()
+        except Exception as e:
+            logger.error(f"关闭按键轨迹文件失败: {e}")
+    
     def start_keyboard_listener(self):
         """启动键盘监听器"""
-        if HAS_PYNPUT:
+        if self.hook_paused_for is not None:
+            logger.info(f"前台为 {self.hook_paused_for}，暂不启动键盘监听")
+            return True
+        
+        factory = self.listener_factory
+        if factory is None and HAS_PYNPUT:
+            factory = keyboard.Listener
+        
+        if factory is not None:
             try:
-                self.keyboard_listener = keyboard.Listener(on_press=self.on_key_press)
+                self.keyboard_listener = factory(on_press=self.on_key_press,
+                                                 win32_event_filter=self._hook_event_filter)
                 self.keyboard_listener.start()
+                if self.hook_watchdog is not None:
+                    self.hook_watchdog.reset(self.clock.monotonic_ns())
                 logger.info("pynput键盘监听器已启动")
                 return True
             except Exception as e:
@@ -762,49 +1783,150 @@ class TouchpadManager:
             logger.warning("pynput不可用，键盘监听不可用")
             return False
     
+    def _hook_event_filter(self, msg, data) -> bool:
+        """pynput 的 win32_event_filter(钩子线程): 快捷键控制方式注入的按键带有模拟器的标记，不传给 on_key_press
+        
+        SendInput 注入的事件同样经过低级键盘钩子，不过滤会被当作打字重新禁用触控板。
+        """
+        simulator = getattr(self.registry_manager, "keyboard_simulator", None)
+        return simulator is None or data.dwExtraInfo != getattr(simulator, "extra_info", None)
+    
+    def stop_keyboard_listener(self):
+        """停止键盘监听器"""
+        if self.keyboard_listener:
+            try:
+                self.keyboard_listener.stop()
+                logger.info("键盘监听器已停止")
+            except Exception as e:
+                logger.error(f"停止键盘监听器失败: {e}")
+            finally:
+                self.keyboard_listener = None
+    
+    def start_hook_watchdog(self, source=None) -> bool:
+        """创建键盘钩子看门狗(source 为 None 时使用 Windows 输入活动来源)"""
+        if self.hook_watchdog is not None:
+            return True
+        if not self.config_manager.get("hook_watchdog.enabled", True):
+            return False
+        
+        from hook_watchdog import HookWatchdog, DEFAULT_HOOK_TIMEOUT, create_win32_input_source
+        
+        if source is None:
+            source = create_win32_input_source()
+            if source is None:
+                logger.info("系统输入活动不可用，看门狗只检测回调超时和监听线程退出")
+        
+        hook_timeout = self.registry_manager.get_hook_timeout() or DEFAULT_HOOK_TIMEOUT
+        self.hook_watchdog = HookWatchdog(
+            source,
+            hook_timeout=hook_timeout,
+            check_interval=self.config_manager.get("hook_watchdog.check_interval", 2.0),
+            silent_checks=self.config_manager.get("hook_watchdog.silent_checks", 3),
+            clock=self.clock,
+        )
+        self._update_hook_timing()
+        return True
+    
+    def check_keyboard_hook(self):
+        """检查键盘钩子是否仍然有效，失效时重新安装(监控线程每个周期调用一次)"""
+        watchdog = self.hook_watchdog
+        listener = self.keyboard_listener
+        if watchdog is None or listener is None or self.hook_paused_for is not None or self.session_paused:
+            return
+        
+        if hasattr(listener, "is_alive") and not listener.is_alive():
+            reason = "listener_stopped"
+        else:
+            reason = watchdog.check(self.clock.monotonic_ns())
+        if reason is not None:
+            self.recover_keyboard_hook(reason)
+    
+    def recover_keyboard_hook(self, reason: str) -> bool:
+        """重新安装键盘钩子并记录一次失效"""
+        logger.warning(f"键盘钩子失效({reason})，重新安装")
+        watchdog = self.hook_watchdog
+        now_ns = self.clock.monotonic_ns()
+        silent_ns = watchdog.silent_ns(now_ns) if watchdog is not None else 0
+        self.stop_keyboard_listener()
+        recovered = self.start_keyboard_listener()
+        if recovered and self.keyboard_listener is not None and hasattr(self.keyboard_listener, "wait"):
+            self.keyboard_listener.wait()
+        elapsed = (self.clock.monotonic_ns() - now_ns) / NS_PER_SECOND
+        if watchdog is not None:
+            watchdog.record_incident(reason, now_ns, silent_ns, elapsed, recovered)
+        if not recovered:
+            logger.error("重新安装键盘钩子失败")
+        return recovered
+    
+    def get_idle_time(self) -> float:
+        """距上次键盘活动的空闲时间(秒)"""
+        return (self.clock.monotonic_ns() - self.last_activity_ns) / NS_PER_SECOND
+    
+    def check_idle(self):
+        """检查空闲状态，满足条件时重新启用触控板(监控线程每个周期调用一次)"""
+        span_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+        now_ns = self.clock.monotonic_ns()
+        idle_time = (now_ns - self.last_activity_ns) / NS_PER_SECOND
+        threshold = self.profiles.active.idle_threshold
+        if threshold is None:
+            threshold = self.idle_threshold
+        
+        # 获取配置的延迟时间
+        delay_before_enable = self.config_manager.get("compatibility.delay_before_enable", 0.2)
+        min_disable_duration = self.config_manager.get("compatibility.min_disable_time", 0.5)  # 最小禁用时间
+        
+        # 计算从上次自动启用到现在的时间
+        time_since_last_enable = (now_ns - self.last_idle_enable_ns) / NS_PER_SECOND
+        
+        # 如果空闲时间超过阈值且触控板被禁用，启用它
+        if (idle_time >= threshold and 
+            self.touchpad_state == TouchpadState.DISABLED and
+            not self.external_disable and
+            time_since_last_enable >= min_disable_duration):
+            
+            logger.debug(f"空闲 {idle_time:.1f}秒，启用触控板")
+            
+            if span_ns:
+                # 空闲阈值到期后等到本次监控周期才处理的时间
+                span_tracer.end("policy.idle_decision", span_ns)
+                deadline_wait_ns = int((idle_time - threshold) * NS_PER_SECOND)
+                span_tracer.end("queue.idle_deadline", span_ns - deadline_wait_ns, span_ns)
+            
+            # 添加一个小延迟，确保系统准备好
+            settle_ns = span_tracer.begin() if span_tracer.ENABLED else 0
+            self.clock.sleep(delay_before_enable)
+            if settle_ns:
+                span_tracer.end("policy.settle_delay", settle_ns)
+            self.set_touchpad(True, cause="idle")
+            self.last_idle_enable_ns = now_ns
+    
     def monitor_activity(self):
         """监控活动状态"""
         logger.info("开始监控活动状态")
         
         # 添加延迟，避免立即启用
-        last_disable_time = time.time()
+        self.last_idle_enable_ns = self.clock.monotonic_ns()
         
         while self.is_monitoring:
             try:
-                current_time = time.time()
-                idle_time = current_time - self.last_activity_time
-                
-                # 获取配置的延迟时间
-                delay_before_enable = self.config_manager.get("compatibility.delay_before_enable", 0.2)
-                min_disable_duration = self.config_manager.get("compatibility.min_disable_time", 0.5)  # 最小禁用时间
-                
-                # 计算从上次禁用到现在的时间
-                time_since_last_disable = current_time - last_disable_time
-                
-                # 如果空闲时间超过阈值且触控板被禁用，启用它
-                if (idle_time >= self.idle_threshold and 
-                    self.touchpad_state == TouchpadState.DISABLED and
-                    time_since_last_disable >= min_disable_duration):
-                    
-                    logger.debug(f"空闲 {idle_time:.1f}秒，启用触控板")
-                    
-                    # 添加一个小延迟，确保系统准备好
-                    time.sleep(delay_before_enable)
-                    self.set_touchpad(True)
-                    last_disable_time = current_time
+                # 会话锁定或睡眠期间不轮询，等待恢复
+                if not self._session_resumed.is_set():
+                    self._session_resumed.wait()
+                    continue
                 
-                # 更新运行时间统计
-                if self.stats["start_time"]:
-                    self.stats["total_runtime"] = current_time - self.stats["start_time"]
+                self.monitor_wakeups += 1
+                self.check_idle()
+                self.check_keyboard_hook()
+                self.resource_recorder.maybe_sample(self.clock.monotonic_ns())
                 
                 # 降低CPU使用率
-                time.sleep(0.3)  # 稍微增加睡眠时间
+                self.clock.sleep(self.MONITOR_INTERVAL)
                 
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 logger.error(f"监控循环错误: {e}")
-                time.sleep(1)
+                self.clock.sleep(1)
         
         logger.info("活动监控线程结束")
     
@@ -819,12 +1941,24 @@ class TouchpadManager:
             logger.warning("触控板检测失败，但将继续尝试")
         
         self.is_monitoring = True
-        self.stats["start_time"] = time.time()
-        self.last_activity_time = time.time()
+        self.session_start_ns = self.clock.monotonic_ns()
+        self.stats.start_session(self.session_start_ns)
+        self.last_activity_ns = self.session_start_ns
         
-        # 启动键盘监听
-        if not self.start_keyboard_listener():
-            logger.warning("键盘监听启动失败，触控板自动禁用功能可能无法正常工作")
+        if self.session_paused:
+            # 会话锁定期间启动: 钩子和监视在会话恢复时启动
+            self._session_resumed.clear()
+        else:
+            # 监视外部切换(Fn键等)
+            self.start_registry_watcher()
+            
+            # 游戏/全屏应用在前台时暂停键盘监听
+            self.start_foreground_monitor()
+            
+            # 启动键盘监听
+            self.start_hook_watchdog()
+            if not self.start_keyboard_listener():
+                logger.warning("键盘监听启动失败，触控板自动禁用功能可能无法正常工作")
         
         # 启动活动监控线程
         try:
@@ -853,14 +1987,12 @@ class TouchpadManager:
         self.is_monitoring = False
         
         # 停止键盘监听
-        if self.keyboard_listener:
-            try:
-                self.keyboard_listener.stop()
-                logger.info("键盘监听器已停止")
-            except Exception as e:
-                logger.error(f"停止键盘监听器失败: {e}")
-            finally:
-                self.keyboard_listener = None
+        self.stop_keyboard_listener()
+        
+        self.stop_foreground_monitor()
+        
+        # 唤醒因会话暂停而等待的监控线程
+        self._session_resumed.set()
         
         # 等待监控线程结束
         if self.monitor_thread and self.monitor_thread.is_alive():
@@ -870,14 +2002,15 @@ class TouchpadManager:
             except Exception as e:
                 logger.error(f"等待监控线程停止时出错: {e}")
         
-        # 确保触控板被启用
-        if self.touchpad_state == TouchpadState.DISABLED:
-            self.set_touchpad(True, force=True)
+        self.stop_registry_watcher()
+        
+        # 确保触控板被启用(用户在外部禁用的除外)
+        if self.touchpad_state == TouchpadState.DISABLED and not self.external_disable:
+            self.set_touchpad(True, force=True, cause="stop")
         
         # 更新统计信息
-        if self.stats["start_time"]:
-            self.stats["total_runtime"] = time.time() - self.stats["start_time"]
-            self.stats["start_time"] = None
+        self.stats.end_session()
+        self.session_start_ns = None
         
         logger.info("触控板监控已停止")
         return True
@@ -898,32 +2031,56 @@ class TouchpadManager:
     
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
-        stats = self.stats.copy()
-        
-        if self.stats["start_time"]:
-            stats["total_runtime"] = time.time() - self.stats["start_time"]
+        stats = self.stats.snapshot()
         
-        # 计算平均禁用间隔
-        if stats["disabled_count"] > 1 and stats["last_disable_time"] and stats["last_enable_time"]:
-            stats["avg_disable_interval"] = (stats["last_disable_time"] - stats["last_enable_time"]) / max(1, stats["disabled_count"] - 1)
-        else:
-            stats["avg_disable_interval"] = 0
-        
-        # 当前会话时间
-        stats["current_session"] = time.time() - self.stats["start_time"] if self.stats["start_time"] else 0
+        # 最后按键时间只在显示时换算为墙上时间
+        last_keypress_ns = self.last_keypress_ns
+        stats["last_keypress_time"] = self.clock.to_wall_time(last_keypress_ns) if last_keypress_ns is not None else None
         
         # 空闲阈值
         stats["idle_threshold"] = self.idle_threshold
         
+        # 游戏/全屏应用导致的键盘钩子暂停
+        stats["hook_paused_count"] = self.hook_pause_count
+        
+        # 被系统移除后自动重新安装的键盘钩子
+        stats["hook_recoveries"] = self.hook_watchdog.recoveries if self.hook_watchdog is not None else 0
+        
+        # 当前应用配置和各配置的统计
+        profile_stats = self.profiles.stats()
+        stats["active_profile"] = profile_stats["active"]
+        stats["profiles"] = profile_stats["profiles"]
+        
+        # 锁屏/睡眠期间节省的定时器唤醒
+        if self.session_monitor is not None:
+            stats["wakeups_saved_per_hour"] = self.session_monitor.stats()["wakeups_saved_per_hour"]
+        
         return stats
     
     def cleanup(self):
         """清理资源"""
         logger.info("正在清理资源...")
         self.stop_monitoring()
+        self.stop_session_monitor()
+        self.stop_history()
+        self.stop_metrics_server()
+        self.stop_trace_recording()
+        self.stop_span_trace()
+        self.stop_profiler()
         self.hotkey_manager.stop_listening()
+        log_filter.flush(logger)
         logger.info("资源清理完成")
 
+def _optional_path_arg(flag: str, default: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """解析可带文件路径的启动参数(flag [路径])，返回 (是否给出参数, 路径或 default)"""
+    if flag not in sys.argv:
+        return False, None
+    index = sys.argv.index(flag)
+    if index + 1 < len(sys.argv) and not sys.argv[index + 1].startswith("--"):
+        return True, sys.argv[index + 1]
+    return True, default
+
+
 class TouchpadApp:
     """主应用程序"""
     
@@ -936,10 +2093,17 @@ class TouchpadApp:
         self.is_minimized = False
         self.update_interval = 1000  # UI更新间隔(ms)
         self.last_update_time = 0
+        self.ui_timer_paused = False  # 会话锁定期间停止UI刷新
         
         # 初始化UI组件引用
         self.status_labels = {}
         self.stats_labels = {}
+        self.backend_label = None
+        self.history_label = None
+        self.history_refresh_ns = 0  # 最近7天汇总每分钟刷新一次
+        self.timeline = None  # 统计页的状态时间线
+        self.diagnostics_thread = None  # 报告问题时生成诊断包的后台线程
+        self.diagnostics_dialog = None
         self.log_text = None
         
         # Tkinter变量将在initialize_app中创建
@@ -989,6 +2153,12 @@ class TouchpadApp:
         self.manager = TouchpadManager()
         self.config_manager = self.manager.config_manager
         
+        # 控制方式熔断/恢复时通知用户(回调可能来自键盘监听线程)
+        if hasattr(self.manager.registry_manager, "on_circuit_change"):
+            self.manager.registry_manager.on_circuit_change = (
+                lambda backend, old_state, new_state: self.root.after(0, self.notify_circuit_change, backend, new_state)
+            )
+        
         # 初始化Tkinter变量（必须在创建根窗口后）
         self.auto_start_var = tk.BooleanVar()
         self.start_minimized_var = tk.BooleanVar()
@@ -1015,6 +2185,19 @@ class TouchpadApp:
         # 绑定窗口事件
         self.bind_window_events()
         
+        # 切换历史
+        self.manager.start_history()
+        
+        # 本地指标端点(默认关闭)
+        self.manager.start_metrics_server()
+        
+        # 锁屏/睡眠时暂停钩子、监控和UI刷新
+        if self.manager.start_session_monitor():
+            self.manager.session_monitor.register_timer("ui_update", self.update_interval / 1000)
+            self.manager.session_monitor.add_listener(
+                lambda active, event: self.root.after(0, self.on_session_change, active)
+            )
+        
         # 启动UI更新循环
         self.update_ui()
         
@@ -1410,8 +2593,15 @@ class TouchpadApp:
             ("启用次数", "enabled_count", "次"),
             ("总运行时间", "total_runtime", ""),
             ("当前会话", "current_session", ""),
+            ("禁用时间占比", "duty_cycle", "%"),
+            ("每小时切换", "toggles_per_hour", "次"),
+            ("每分钟按键", "keystrokes_per_minute", "次"),
             ("最后按键", "last_keypress_time", ""),
-            ("空闲阈值", "idle_threshold", "秒")
+            ("空闲阈值", "idle_threshold", "秒"),
+            ("锁屏/睡眠节省唤醒", "wakeups_saved_per_hour", "次/小时"),
+            ("游戏/全屏暂停监听", "hook_paused_count", "次"),
+            ("键盘钩子自动恢复", "hook_recoveries", "次"),
+            ("当前应用配置", "active_profile", "")
         ]
         
         for i, (label, key, unit) in enumerate(stats_data):
@@ -1434,9 +2624,62 @@ class TouchpadApp:
         # 配置网格权重
         for i in range(2):
             stats_grid.columnconfigure(i, weight=1)
-        for i in range(3):
+        for i in range((len(stats_data) + 1) // 2):
             stats_grid.rowconfigure(i, weight=1)
         
+        # 控制方式延迟和选择结果
+        backend_frame = ttk.LabelFrame(stats_frame, text="控制方式", padding="10")
+        backend_frame.pack(fill=tk.X, padx=15)
+        
+        self.backend_label = ttk.Label(
+            backend_frame,
+            text="尚无测量数据",
+            justify=tk.LEFT,
+            font=("Consolas", 9)
+        )
+        self.backend_label.pack(anchor=tk.W)
+        
+        # 切换历史: 最近7天
+        history_frame = ttk.LabelFrame(stats_frame, text="最近7天", padding="10")
+        history_frame.pack(fill=tk.X, padx=15, pady=(10, 0))
+        
+        self.history_label = ttk.Label(
+            history_frame,
+            text="尚无历史记录",
+            justify=tk.LEFT,
+            font=("Consolas", 9)
+        )
+        self.history_label.pack(anchor=tk.W)
+        
+        # 最近的状态时间线: 绿色为启用，红色为禁用，只追加新的段并滚动
+        window_minutes = float(self.config_manager.get("timeline.window_minutes", 60))
+        timeline_frame = ttk.LabelFrame(stats_frame, text=f"最近{window_minutes:g}分钟", padding="10")
+        timeline_frame.pack(fill=tk.X, padx=15, pady=(10, 0))
+        
+        timeline_width, timeline_height = 560, 24
+        timeline_canvas = tk.Canvas(
+            timeline_frame,
+            width=timeline_width,
+            height=timeline_height,
+            highlightthickness=0,
+            background="white"
+        )
+        timeline_canvas.pack(anchor=tk.W)
+        
+        axis_frame = ttk.Frame(timeline_frame, width=timeline_width)
+        axis_frame.pack(anchor=tk.W, fill=tk.X)
+        ttk.Label(axis_frame, text=f"{window_minutes:g}分钟前", font=("Microsoft YaHei", 8)).pack(side=tk.LEFT)
+        ttk.Label(axis_frame, text="现在", font=("Microsoft YaHei", 8)).pack(side=tk.RIGHT)
+        
+        self.timeline = TimelineView(
+            timeline_canvas,
+            self.manager.transitions,
+            timeline_width,
+            timeline_height,
+            window_minutes * 60,
+            origin=self.manager.clock.monotonic()
+        )
+        
         # 重置统计按钮
         button_frame = ttk.Frame(stats_frame)
         button_frame.pack(pady=20)
@@ -1452,6 +2695,12 @@ class TouchpadApp:
             text="导出统计",
             command=self.export_stats
         ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            button_frame,
+            text="导出历史",
+            command=self.export_history
+        ).pack(side=tk.LEFT, padx=5)
     
     def create_log_display(self, parent):
         """创建日志显示"""
@@ -1560,6 +2809,13 @@ class TouchpadApp:
             text="报告问题",
             command=self.report_issue
         ).pack(side=tk.LEFT, padx=5)
+        
+        self.profiler_button = ttk.Button(
+            button_frame,
+            text="性能采样",
+            command=self.toggle_profiler
+        )
+        self.profiler_button.pack(side=tk.LEFT, padx=5)
     
     def create_status_bar(self, parent):
         """创建状态栏"""
@@ -1621,6 +2877,12 @@ class TouchpadApp:
             use_alt_lib
         )
         
+        self.manager.hotkey_manager.register_hotkey(
+            hotkeys.get("toggle_profiler", "ctrl+alt+p"),
+            self.toggle_profiler_hotkey,
+            use_alt_lib
+        )
+        
         # 启动热键监听
         success = self.manager.hotkey_manager.start_listening(not use_alt_lib)
         if not success:
@@ -1658,6 +2920,25 @@ class TouchpadApp:
             # 启用调试模式
             logging.getLogger().setLevel(logging.DEBUG)
             logger.info("调试模式已启用")
+        
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        
+        # 记录按键时间轨迹: --record-trace [文件路径]
+        present, trace_path = _optional_path_arg(
+            "--record-trace", os.path.join("log", f"keystroke_trace_{timestamp}.tpt"))
+        if present:
+            self.manager.start_trace_recording(trace_path)
+        
+        # 切换流程耗时跟踪: --trace [文件路径] (Chrome trace 格式，退出时写入)
+        present, span_path = _optional_path_arg("--trace", os.path.join("log", f"actuation_trace_{timestamp}.json"))
+        if present:
+            self.manager.start_span_trace(span_path)
+        
+        # 采样分析: --profile [文件路径] (折叠栈格式，退出或达到最长时间时写入；未给出路径时使用默认文件名)
+        present, profile_path = _optional_path_arg("--profile")
+        if present:
+            self.manager.start_profiler(profile_path)
+            self.profiler_button.config(text="停止性能采样")
     
     def start_monitoring(self):
         """开始监控"""
@@ -1698,6 +2979,21 @@ class TouchpadApp:
         else:
             self.start_monitoring()
     
+    def toggle_profiler_hotkey(self):
+        """热键切换采样分析"""
+        self.root.after(0, self.toggle_profiler)
+    
+    def toggle_profiler(self):
+        """开始/停止采样分析"""
+        path = self.manager.toggle_profiler()
+        if self.manager.profiling:
+            self.profiler_button.config(text="停止性能采样")
+            self.show_notification("性能采样", "正在采样所有线程的调用栈，再次点击或按热键停止")
+        else:
+            self.profiler_button.config(text="性能采样")
+            if path:
+                self.show_notification("性能采样", f"采样结果已保存到: {path}")
+    
     def toggle_touchpad_hotkey(self):
         """热键切换触控板"""
         self.root.after(0, self.toggle_touchpad)
@@ -1785,8 +3081,8 @@ class TouchpadApp:
             status = "已启用" if enable else "已禁用"
             self.show_notification("兼容模式", f"兼容模式{status}")
             
-            # 重新初始化注册表管理器
-            self.manager.registry_manager = RegistryManager()
+            # 重新检测控制方式(沿用现有的注册表管理器，保留统计、熔断器和回调)
+            self.manager.redetect_control_method()
             
         except Exception as e:
             logger.error(f"切换兼容模式失败: {e}")
@@ -1828,6 +3124,20 @@ class TouchpadApp:
         self.is_minimized = True
         logger.info("窗口已最小化")
     
+    def notify_circuit_change(self, backend: str, state: CircuitState):
+        """控制方式熔断或恢复时显示一次通知"""
+        name = BACKEND_NAMES.get(backend, backend)
+        if state == CircuitState.OPEN:
+            self.show_notification("控制方式已暂停", f"{name} 连续失败，已切换到其他控制方式")
+        elif state == CircuitState.CLOSED:
+            self.show_notification("控制方式已恢复", f"{name} 已恢复正常")
+    
+    def on_session_change(self, active: bool):
+        """会话恢复时重新开始UI刷新(暂停由 update_ui 自行停止调度)"""
+        if active and self.ui_timer_paused:
+            self.ui_timer_paused = False
+            self.update_ui()
+    
     def show_notification(self, title: str, message: str, duration=3):
         """显示通知"""
         if not self.config_manager.get("enable_notifications", True):
@@ -1852,6 +3162,7 @@ class TouchpadApp:
     
     def update_ui(self):
         """更新UI状态"""
+        span_ns = span_tracer.begin() if span_tracer.ENABLED else 0
         try:
             # 更新状态标签
             state_texts = {
@@ -1870,7 +3181,7 @@ class TouchpadApp:
                 desc = "监控中 - 等待输入"
                 
                 if self.manager.touchpad_state == TouchpadState.DISABLED:
-                    idle_time = time.time() - self.manager.last_activity_time
+                    idle_time = self.manager.get_idle_time()
                     desc = f"监控中 - 打字中(触控板禁用) - 空闲 {idle_time:.1f}秒"
             else:
                 monitoring_text = "已停止"
@@ -1925,6 +3236,17 @@ class TouchpadApp:
                     else:
                         label.config(text=str(value))
             
+            # 更新控制方式统计
+            if self.backend_label is not None and hasattr(self.manager.registry_manager, "get_backend_report"):
+                self.backend_label.config(text=format_backend_report(self.manager.registry_manager.get_backend_report()))
+            
+            # 状态时间线(增量绘制新的切换)
+            if self.timeline is not None:
+                self.timeline.update(self.manager.clock.monotonic())
+            
+            # 最近7天的切换历史(只读取按天汇总表)
+            self.update_history_display()
+            
             # 更新状态栏
             self.statusbar_left.config(text=f"状态: {desc}")
             self.statusbar_center.config(text=f"触控板: {text}")
@@ -1935,9 +3257,28 @@ class TouchpadApp:
             
         except Exception as e:
             logger.error(f"更新UI时出错: {e}")
+        if span_ns:
+            span_tracer.end("ui.update", span_ns)
+        
+        # 安排下一次更新(会话锁定期间不再调度)
+        if self.manager.session_paused:
+            self.ui_timer_paused = True
+        else:
+            self.root.after(self.update_interval, self.update_ui)
+    
+    def update_history_display(self, force=False):
+        """刷新最近7天的切换汇总"""
+        history = self.manager.history
+        if self.history_label is None or history is None:
+            return
+        
+        now_ns = time.monotonic_ns()
+        if not force and now_ns - self.history_refresh_ns < 60 * NS_PER_SECOND:
+            return
+        self.history_refresh_ns = now_ns
         
-        # 安排下一次更新
-        self.root.after(self.update_interval, self.update_ui)
+        from history_store import format_days
+        self.history_label.config(text=format_days(history.query_days(7)))
     
     def update_log_display(self):
         """更新日志显示"""
@@ -1970,15 +3311,9 @@ class TouchpadApp:
     def reset_stats(self):
         """重置统计信息"""
         if messagebox.askyesno("确认", "确定要重置统计信息吗？"):
-            self.manager.stats = {
-                "disabled_count": 0,
-                "enabled_count": 0,
-                "total_runtime": 0,
-                "start_time": None,
-                "last_disable_time": None,
-                "last_enable_time": None,
-                "last_keypress_time": None
-            }
+            self.manager.stats.reset()
+            self.manager.profiles.reset_stats()
+            self.manager.last_keypress_ns = None
             messagebox.showinfo("成功", "统计信息已重置")
             logger.info("统计信息已重置")
     
@@ -1986,6 +3321,14 @@ class TouchpadApp:
         """导出统计信息"""
         try:
             stats = self.manager.get_stats()
+            
+            # 型号和控制方式，便于汇总多台电脑的统计 (touchpad_manager aggregate)
+            registry_manager = self.manager.registry_manager
+            if hasattr(registry_manager, "get_machine_info"):
+                stats["machine"] = registry_manager.get_machine_info()
+            if hasattr(registry_manager, "get_backend_report"):
+                stats["control_backends"] = registry_manager.get_backend_report()
+            
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             filename = os.path.join("log", f"touchpad_stats_{timestamp}.json")
             
@@ -1998,6 +3341,52 @@ class TouchpadApp:
             logger.error(f"导出统计信息失败: {e}")
             messagebox.showerror("错误", f"导出统计信息失败:\n{str(e)}")
     
+    def export_history(self):
+        """导出切换历史明细(CSV/JSONL，可 gzip 压缩)"""
+        history = self.manager.history
+        if history is None:
+            messagebox.showwarning("提示", "切换历史未启用")
+            return
+        
+        days = simpledialog.askinteger("导出历史", "导出最近多少天的切换记录 (0 为全部):",
+                                       initialvalue=30, minvalue=0, parent=self.root)
+        if days is None:
+            return
+        
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        filename = filedialog.asksaveasfilename(
+            title="导出切换历史",
+            initialdir="log",
+            initialfile=f"touchpad_history_{timestamp}.csv",
+            defaultextension=".csv",
+            filetypes=[
+                ("CSV", "*.csv"),
+                ("CSV (gzip)", "*.csv.gz"),
+                ("JSON Lines", "*.jsonl"),
+                ("JSON Lines (gzip)", "*.jsonl.gz")
+            ]
+        )
+        if not filename:
+            return
+        
+        start = time.time() - days * 86400 if days else None
+        
+        # 在后台线程中导出，避免长历史阻塞界面
+        def worker():
+            from history_export import export_history
+            try:
+                history.flush()
+                count = export_history(history, filename, start)
+            except Exception as e:
+                message = f"导出切换历史失败:\n{str(e)}"
+                logger.error(f"导出切换历史失败: {e}")
+                self.root.after(0, lambda: messagebox.showerror("错误", message))
+                return
+            logger.info(f"切换历史已导出: {filename} ({count} 条)")
+            self.root.after(0, lambda: messagebox.showinfo("成功", f"已导出 {count} 条切换记录到: {filename}"))
+        
+        threading.Thread(target=worker, daemon=True, name="HistoryExport").start()
+    
     def clear_log(self):
         """清除日志"""
         if messagebox.askyesno("确认", "确定要清除日志吗？"):
@@ -2064,15 +3453,15 @@ class TouchpadApp:
             
             # 临时禁用
             if current_state == TouchpadState.ENABLED:
-                self.manager.set_touchpad(False)
+                self.manager.set_touchpad(False, cause="test")
                 time.sleep(0.5)
-                self.manager.set_touchpad(True)
+                self.manager.set_touchpad(True, cause="test")
             else:
-                self.manager.set_touchpad(True)
+                self.manager.set_touchpad(True, cause="test")
                 time.sleep(0.5)
-                self.manager.set_touchpad(False)
+                self.manager.set_touchpad(False, cause="test")
                 time.sleep(0.5)
-                self.manager.set_touchpad(True)
+                self.manager.set_touchpad(True, cause="test")
             
             messagebox.showinfo("测试", "触控板测试完成")
             logger.info("触控板测试完成")
@@ -2089,37 +3478,132 @@ class TouchpadApp:
             logger.error(f"检查更新失败: {e}")
             messagebox.showinfo("检查更新", f"检查更新失败:\n{str(e)}")
     
+    def collect_system_info(self) -> Dict[str, Any]:
+        """问题报告的内容(可在后台线程调用)"""
+        # 收集系统信息
+        system_info = {
+            "platform": PLATFORM,
+            "windows_version": platform.version(),
+            "python_version": sys.version,
+            "has_windows_deps": HAS_WINDOWS_DEPS,
+            "has_pynput": HAS_PYNPUT,
+            "has_keyboard_alt": HAS_KEYBOARD_ALT,
+            "app_version": "2.2",
+            "idle_threshold": self.manager.idle_threshold,
+            "compatibility_mode": self.config_manager.get("enable_compatibility_mode")
+        }
+        
+        # 笔记本型号和检测到的触控板注册表路径
+        if hasattr(self.manager.registry_manager, "get_machine_info"):
+            system_info["machine"] = self.manager.registry_manager.get_machine_info()
+        
+        # 控制方式的选择结果和延迟统计
+        if hasattr(self.manager.registry_manager, "get_backend_report"):
+            system_info["control_backends"] = self.manager.registry_manager.get_backend_report()
+        
+        # 被去重抑制的日志
+        system_info["suppressed_logs"] = log_filter.stats()
+        
+        # 各应用配置的统计
+        system_info["profiles"] = self.manager.profiles.stats()
+        
+        # 游戏/全屏应用暂停键盘钩子的区间和耗时
+        system_info["keyboard_hook"] = self.manager.get_hook_pause_report()
+        
+        # 切换历史数据库
+        if self.manager.history is not None:
+            system_info["history"] = self.manager.history.stats()
+        
+        # 采样分析结果(正在采样时先写入当前结果)
+        profile = self.manager.get_profile_report()
+        if profile is not None:
+            system_info["profile"] = profile
+        
+        # 锁屏/睡眠暂停统计
+        if self.manager.session_monitor is not None:
+            system_info["session"] = self.manager.session_monitor.stats()
+        
+        # 注册表监视(外部切换检测)
+        if self.manager.registry_watcher is not None:
+            system_info["registry_watcher"] = self.manager.registry_watcher.stats()
+        
+        return system_info
+    
     def report_issue(self):
-        """报告问题"""
+        """报告问题: 保存问题报告，并在后台线程生成诊断包(zip)"""
+        if self.diagnostics_thread is not None and self.diagnostics_thread.is_alive():
+            messagebox.showinfo("报告问题", "正在生成诊断包，请稍候")
+            return
+        
+        benchmark_seconds = self.config_manager.get("diagnostics.benchmark_seconds", 30)
+        if benchmark_seconds > 0 and not messagebox.askyesno(
+            "报告问题",
+            f"是否在诊断包中包含 {benchmark_seconds} 秒的控制方式测试？\n"
+            "测试期间触控板会反复启用/禁用，结束后恢复原状态，请不要使用触控板。"
+        ):
+            benchmark_seconds = 0
+        
+        # 进度窗口(关闭后仍在后台继续生成)
+        dialog = tk.Toplevel(self.root)
+        dialog.title("报告问题")
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        self.diagnostics_label = ttk.Label(dialog, text="正在收集诊断信息...", width=50)
+        self.diagnostics_label.pack(padx=15, pady=(15, 5))
+        self.diagnostics_progress = ttk.Progressbar(dialog, length=360, maximum=100, mode="determinate")
+        self.diagnostics_progress.pack(padx=15, pady=(5, 15))
+        dialog.protocol("WM_DELETE_WINDOW", self._close_diagnostics_dialog)
+        self.diagnostics_dialog = dialog
+        
+        self.diagnostics_thread = threading.Thread(
+            target=self._build_diagnostics, args=(benchmark_seconds,), daemon=True, name="Diagnostics"
+        )
+        self.diagnostics_thread.start()
+    
+    def _build_diagnostics(self, benchmark_seconds: float):
+        """后台线程: 保存问题报告并生成诊断包"""
+        import diagnostics
+        
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join("log", f"issue_report_{timestamp}.json")
+        bundle = os.path.join("log", f"diagnostics_{timestamp}.zip")
         try:
-            # 收集系统信息
-            system_info = {
-                "platform": PLATFORM,
-                "windows_version": platform.version(),
-                "python_version": sys.version,
-                "has_windows_deps": HAS_WINDOWS_DEPS,
-                "has_pynput": HAS_PYNPUT,
-                "has_keyboard_alt": HAS_KEYBOARD_ALT,
-                "app_version": "2.2",
-                "idle_threshold": self.manager.idle_threshold,
-                "compatibility_mode": self.config_manager.get("enable_compatibility_mode")
-            }
-            
-            # 保存问题报告
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join("log", f"issue_report_{timestamp}.json")
-            
+            system_info = self.collect_system_info()
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(system_info, f, indent=2, ensure_ascii=False)
+            logger.info(f"问题报告已保存: {filename}")
             
-            messagebox.showinfo("报告问题", 
-                f"问题报告已保存到: {filename}\n"
-                "请将此文件发送给开发者以便诊断问题。"
+            diagnostics.create_bundle(
+                self.manager, system_info, bundle, log_filter, benchmark_seconds,
+                progress=lambda fraction, text: self.root.after(0, self._update_diagnostics_progress, fraction, text)
             )
-            logger.info(f"问题报告已保存: {filename}")
         except Exception as e:
             logger.error(f"生成问题报告失败: {e}")
-            messagebox.showerror("错误", f"生成问题报告失败:\n{str(e)}")
+            message = f"生成问题报告失败:\n{str(e)}"
+            self.root.after(0, self._finish_diagnostics, message, True)
+            return
+        
+        message = (f"问题报告已保存到: {filename}\n"
+                   f"诊断包已保存到: {bundle}\n"
+                   "请将这两个文件发送给开发者以便诊断问题。")
+        self.root.after(0, self._finish_diagnostics, message, False)
+    
+    def _update_diagnostics_progress(self, fraction: float, text: str):
+        if self.diagnostics_dialog is not None:
+            self.diagnostics_progress.config(value=fraction * 100)
+            self.diagnostics_label.config(text=text)
+    
+    def _close_diagnostics_dialog(self):
+        if self.diagnostics_dialog is not None:
+            self.diagnostics_dialog.destroy()
+            self.diagnostics_dialog = None
+    
+    def _finish_diagnostics(self, message: str, error: bool):
+        self._close_diagnostics_dialog()
+        if error:
+            messagebox.showerror("错误", message)
+        else:
+            messagebox.showinfo("报告问题", message)
     
     def open_settings(self):
         """打开设置窗口"""
@@ -2230,6 +3714,11 @@ class TouchpadApp:
             
             # 停止所有监控
             self.manager.stop_monitoring()
+            self.manager.stop_session_monitor()
+            self.manager.stop_history()
+            self.manager.stop_metrics_server()
+            self.manager.stop_span_trace()
+            self.manager.stop_profiler()
             
             # 停止热键监听
             self.manager.hotkey_manager.stop_listening()
@@ -2257,6 +3746,38 @@ class TouchpadApp:
             traceback.print_exc()
             messagebox.showerror("致命错误", f"程序运行出错:\n{str(e)}")
 
+# 命令行子命令: 名称 -> 实现模块(模块需提供 main(argv) 函数)
+# 子命令在调用时才导入(numpy 等依赖不拖慢界面启动)；导入必须写成静态 import，PyInstaller 才能打包这些模块
+def _run_tune(argv: List[str]) -> int:
+    from threshold_tuner import main as tune_main
+    return tune_main(argv)
+
+def _run_replay(argv: List[str]) -> int:
+    from replay_harness import main as replay_main
+    return replay_main(argv)
+
+def _run_export(argv: List[str]) -> int:
+    from history_export import main as export_main
+    return export_main(argv)
+
+def _run_aggregate(argv: List[str]) -> int:
+    from fleet_aggregate import main as aggregate_main
+    return aggregate_main(argv)
+
+CLI_COMMANDS = {
+    "tune": _run_tune,
+    "replay": _run_replay,
+    "export": _run_export,
+    "aggregate": _run_aggregate,
+}
+
+def run_cli_command(argv: List[str]) -> Optional[int]:
+    """执行命令行子命令，如果argv不是子命令则返回None"""
+    if not argv or argv[0] not in CLI_COMMANDS:
+        return None
+    
+    return CLI_COMMANDS[argv[0]](argv[1:])
+
 def main():
     """主函数"""
     print("=" * 70)
@@ -2293,6 +3814,14 @@ def main():
     app.run()
 
 if __name__ == "__main__":
+    # 打包为EXE时 aggregate 的进程池子进程需要
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
+    exit_code = run_cli_command(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    
     try:
         main()
     except Exception as e:
@@ -0,0 +1,187 @@
+"""
+按键时间轨迹记录器 - 将按键时间戳和按键类别写入预分配的内存映射文件
+
+只记录时间戳(time.monotonic_ns)和按键类别，从不记录按键字符。
+
+文件格式 (.tpt，小端序):
+    头部 32 字节: magic(8s) version(I) record_size(I) capacity(Q) count(Q)
+    记录  9 字节: timestamp_ns(q) key_class(B)
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+from enum import IntEnum
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("touchpad_manager.trace")
+
+TRACE_MAGIC = b"TPTRACE1"
+TRACE_VERSION = 1
+TRACE_EXTENSION = ".tpt"
+HEADER = struct.Struct("<8sIIQQ")
+RECORD = struct.Struct("<qB")
+COUNT_OFFSET = 24  # 头部中 count 字段的偏移
+
+DEFAULT_CAPACITY = 1_000_000  # 约 9MB
+
+
+class KeyClass(IntEnum):
+    """按键类别 - 轨迹中只保存类别，不保存具体按键"""
+    OTHER = 0
+    CHARACTER = 1
+    SPACE = 2
+    ENTER = 3
+    EDIT = 4        # Backspace / Delete
+    MODIFIER = 5
+    NAVIGATION = 6
+    FUNCTION = 7
+
+
+_NAMED_KEY_CLASSES = {
+    "space": KeyClass.SPACE,
+    "enter": KeyClass.ENTER,
+    "backspace": KeyClass.EDIT,
+    "delete": KeyClass.EDIT,
+    "up": KeyClass.NAVIGATION,
+    "down": KeyClass.NAVIGATION,
+    "left": KeyClass.NAVIGATION,
+    "right": KeyClass.NAVIGATION,
+    "home": KeyClass.NAVIGATION,
+    "end": KeyClass.NAVIGATION,
+    "page_up": KeyClass.NAVIGATION,
+    "page_down": KeyClass.NAVIGATION,
+}
+
+_MODIFIER_PREFIXES = ("shift", "ctrl", "alt", "cmd", "caps_lock")
+
+
+def classify_key(key) -> KeyClass:
+    """将 pynput 按键对象归类，不读取按键字符以外的任何信息"""
+    if key is None:
+        return KeyClass.OTHER
+
+    char = getattr(key, "char", None)
+    if char is not None:
+        return KeyClass.SPACE if char == " " else KeyClass.CHARACTER
+
+    name = getattr(key, "name", None)
+    if not name:
+        return KeyClass.OTHER
+
+    key_class = _NAMED_KEY_CLASSES.get(name)
+    if key_class is not None:
+        return key_class
+    if name.startswith(_MODIFIER_PREFIXES):
+        return KeyClass.MODIFIER
+    if name[0] == "f" and name[1:].isdigit():
+        return KeyClass.FUNCTION
+    return KeyClass.OTHER
+
+
+class TraceRecorder:
+    """轨迹记录器 - 文件在创建时按容量预分配，写满后丢弃新事件"""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("轨迹容量必须大于0")
+
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        size = HEADER.size + capacity * RECORD.size
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._map, 0, TRACE_MAGIC, TRACE_VERSION, RECORD.size, capacity, 0)
+
+        logger.info(f"按键轨迹记录已开始: {path} (容量 {capacity} 个事件)")
+
+    def record(self, key=None, timestamp_ns: Optional[int] = None):
+        """记录一次按键 (在键盘监听线程中调用)"""
+        if self._map is None:
+            return
+
+        if self.count >= self.capacity:
+            if self.dropped == 0:
+                logger.warning(f"按键轨迹已写满 ({self.capacity} 个事件)，后续事件将被丢弃")
+            self.dropped += 1
+            return
+
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+
+        RECORD.pack_into(self._map, HEADER.size + self.count * RECORD.size, timestamp_ns, classify_key(key))
+        self.count += 1
+        struct.pack_into("<Q", self._map, COUNT_OFFSET, self.count)
+
+    def close(self):
+        """刷新并关闭轨迹文件"""
+        if self._map is None:
+            return
+
+        try:
+            self._map.flush()
+            self._map.close()
+        finally:
+            self._map = None
+            self._file.close()
+
+        logger.info(f"按键轨迹记录已结束: {self.path} ({self.count} 个事件, 丢弃 {self.dropped} 个)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _read_header(data) -> Tuple[int, int]:
+    """校验头部，返回 (record_size, count)"""
+    if len(data) < HEADER.size:
+        raise ValueError("轨迹文件过短")
+
+    magic, version, record_size, capacity, count = HEADER.unpack_from(data, 0)
+    if magic != TRACE_MAGIC:
+        raise ValueError("不是有效的按键轨迹文件")
+    if version != TRACE_VERSION or record_size != RECORD.size:
+        raise ValueError(f"不支持的轨迹版本: {version}")
+
+    count = min(count, capacity, (len(data) - HEADER.size) // RECORD.size)
+    return record_size, count
+
+
+def iter_trace(path: str) -> Iterator[Tuple[int, KeyClass]]:
+    """逐条读取轨迹，返回 (timestamp_ns, key_class)"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    _, count = _read_header(data)
+    end = HEADER.size + count * RECORD.size
+    for timestamp_ns, key_class in RECORD.iter_unpack(memoryview(data)[HEADER.size:end]):
+        yield timestamp_ns, KeyClass(key_class)
+
+
+def read_trace(path: str) -> List[Tuple[int, KeyClass]]:
+    """读取整个轨迹"""
+    return list(iter_trace(path))
+
+
+def load_trace_array(path: str):
+    """用 numpy 读取轨迹，返回 (timestamps_ns, key_classes) 两个数组"""
+    import numpy as np
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    _, count = _read_header(data)
+    records = np.frombuffer(data, dtype=np.dtype([("t", "<i8"), ("k", "u1")]), count=count, offset=HEADER.size)
+    return records["t"].copy(), records["k"].copy()
@@ -94,6 +94,11 @@ pyinstaller --onefile ^
             --add-data "config\icon.ico;config" ^
             --add-data "config\default_config.json;config" ^
             --add-data "log;log" ^
+            --hidden-import threshold_tuner ^
+            --hidden-import replay_harness ^
+            --hidden-import history_export ^
+            --hidden-import fleet_aggregate ^
+            --hidden-import numpy ^
             --name "触控板自动开关工具" ^
             --clean ^
             --noconfirm ^